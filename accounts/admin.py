@@ -3,7 +3,7 @@ Admin configuration for accounts app.
 """
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin as BaseUserAdmin
-from .models import User, Team, TeamMembership, UserProfile, UserSession, AIChat, AIChatMessage, AISuggestion, AIWorkflowAssistant, AIKnowledgeBase
+from .models import User, Team, TeamMembership, UserProfile, UserSession, DailySessionStats, AIChat, AIChatMessage, AISuggestion, AIWorkflowAssistant, AIKnowledgeBase
 
 
 @admin.register(User)
@@ -63,6 +63,13 @@ class UserSessionAdmin(admin.ModelAdmin):
     date_hierarchy = 'created_at'
 
 
+@admin.register(DailySessionStats)
+class DailySessionStatsAdmin(admin.ModelAdmin):
+    list_display = ['team', 'day', 'active_users', 'active_sessions']
+    list_filter = ['day', 'team']
+    date_hierarchy = 'day'
+
+
 @admin.register(AIChat)
 class AIChatAdmin(admin.ModelAdmin):
     list_display = ['user', 'session_id', 'title', 'is_active', 'created_at', 'updated_at']
@@ -5,3 +5,8 @@ class AccountsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'accounts'
     verbose_name = 'User Accounts'
+    
+    def ready(self):
+        from .signals import connect_membership_signals, connect_session_signals
+        connect_membership_signals()
+        connect_session_signals()
@@ -0,0 +1,29 @@
+"""
+Middleware for accounts app.
+"""
+from inspora.client_ip import get_client_ip
+
+from .session_tracking import touch
+
+
+class SessionTrackingMiddleware:
+    """
+    Report activity of authenticated sessions once the response is ready;
+    ``accounts.session_tracking`` debounces and batches the writes.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        user = getattr(request, 'user', None)
+        session = getattr(request, 'session', None)
+        if user is not None and user.is_authenticated and session is not None and session.session_key:
+            touch(
+                user.pk,
+                session.session_key,
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', ''),
+            )
+        return response
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:17
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0004_alter_user_employee_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailySessionStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('active_users', models.PositiveIntegerField(default=0)),
+                ('active_sessions', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('team', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_session_stats', to='accounts.team')),
+            ],
+            options={
+                'verbose_name_plural': 'Daily session stats',
+                'ordering': ['-day'],
+                'unique_together': {('team', 'day')},
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def add_creator_memberships(apps, schema_editor):
+    # Teams created before TeamCreateView added the creator as a member
+    Team = apps.get_model('accounts', 'Team')
+    TeamMembership = apps.get_model('accounts', 'TeamMembership')
+    missing = Team.objects.exclude(members__user_id=F('created_by_id'))
+    TeamMembership.objects.bulk_create([
+        TeamMembership(team_id=team_id, user_id=user_id, role='admin', can_manage_team=True,
+                       can_manage_projects=True, can_manage_members=True, can_view_analytics=True)
+        for team_id, user_id in missing.values_list('pk', 'created_by_id').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0005_dailysessionstats'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_creator_memberships, migrations.RunPython.noop),
+    ]
@@ -6,6 +6,7 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.core.validators import RegexValidator
 from django.urls import reverse
+from audit.mixins import FieldTrackingMixin
 
 
 class User(AbstractUser):
@@ -95,7 +96,7 @@ class Team(models.Model):
         return self.members.filter(is_active=True).count()
 
 
-class TeamMembership(models.Model):
+class TeamMembership(FieldTrackingMixin, models.Model):
     """
     Model for managing team memberships with roles and permissions.
     """
@@ -214,6 +215,23 @@ class UserSession(models.Model):
         return f"{self.user.username} - {self.session_key}"
 
 
+class DailySessionStats(models.Model):
+    """Active users and sessions of a team per day (see accounts.session_tracking)."""
+    day = models.DateField()
+    team = models.ForeignKey(Team, on_delete=models.CASCADE, related_name='daily_session_stats')
+    active_users = models.PositiveIntegerField(default=0)
+    active_sessions = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-day']
+        unique_together = ['team', 'day']
+        verbose_name_plural = 'Daily session stats'
+
+    def __str__(self):
+        return f"{self.team.name} - {self.day}: {self.active_users} users"
+
+
 class AIChat(models.Model):
     """AI chat conversations for user support."""
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='ai_chats')
@@ -0,0 +1,239 @@
+"""
+Membership permission resolution for Inspora platform.
+
+All of a user's project, team and portfolio memberships are loaded once per
+request and stored as ``{object_id: bitmask}`` dicts, so permission checks in
+views and APIs are dictionary lookups. The loaded maps are cached in Redis
+under a per-user membership version that is bumped whenever one of the
+user's memberships changes.
+
+A project's ``owner`` and a team's ``created_by`` hold every permission on
+it, whether or not they have a membership row.
+"""
+import json
+import logging
+
+from django.core.exceptions import PermissionDenied
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Bit positions are part of the cached payload format: append new flags,
+# never reorder, and bump CACHE_FORMAT when that is unavoidable.
+PROJECT_PERMISSIONS = ('is_owner', 'can_edit_project', 'can_manage_tasks', 'can_manage_members')
+TEAM_PERMISSIONS = ('is_owner', 'can_manage_team', 'can_manage_projects', 'can_manage_members', 'can_view_analytics')
+PORTFOLIO_PERMISSIONS = ('is_owner', 'can_edit_portfolio', 'can_manage_projects', 'can_manage_goals', 'can_view_analytics')
+
+PROJECT_BITS = {name: 1 << index for index, name in enumerate(PROJECT_PERMISSIONS)}
+TEAM_BITS = {name: 1 << index for index, name in enumerate(TEAM_PERMISSIONS)}
+PORTFOLIO_BITS = {name: 1 << index for index, name in enumerate(PORTFOLIO_PERMISSIONS)}
+
+CACHE_FORMAT = 2
+CACHE_TIMEOUT = 60 * 60
+VERSION_KEY = 'perm:version:{user_id}'
+PAYLOAD_KEY = 'perm:user:{user_id}'
+REQUEST_ATTR = '_membership_permissions'
+
+
+def _pack(rows):
+    """Fold ``(object_id, role, *flags)`` rows into ``{object_id: bitmask}``."""
+    packed = {}
+    for object_id, role, *flags in rows:
+        mask = 1 if role == 'owner' else 0
+        for index, flag in enumerate(flags, start=1):
+            if flag:
+                mask |= 1 << index
+        packed[object_id] = mask
+    return packed
+
+
+def _grant_all(packed, object_ids, bits):
+    """Give every permission in ``bits`` on ``object_ids``."""
+    everything = sum(bits.values())
+    for object_id in object_ids:
+        packed[object_id] = packed.get(object_id, 0) | everything
+    return packed
+
+
+class MembershipPermissions:
+    """
+    Immutable snapshot of one user's membership permissions.
+    """
+
+    def __init__(self, user_id, projects=None, teams=None, portfolios=None):
+        self.user_id = user_id
+        self.projects = projects or {}
+        self.teams = teams or {}
+        self.portfolios = portfolios or {}
+
+    @classmethod
+    def load(cls, user):
+        """Read every active membership and owned project or team of ``user`` from the database."""
+        from accounts.models import Team, TeamMembership
+        from portfolios.models import PortfolioMember
+        from projects.models import Project, ProjectMember
+
+        projects = ProjectMember.objects.filter(user=user, is_active=True).values_list(
+            'project_id', 'role', *PROJECT_PERMISSIONS[1:]
+        )
+        teams = TeamMembership.objects.filter(user=user, is_active=True).values_list(
+            'team_id', 'role', *TEAM_PERMISSIONS[1:]
+        )
+        portfolios = PortfolioMember.objects.filter(user=user, is_active=True).values_list(
+            'portfolio_id', 'role', *PORTFOLIO_PERMISSIONS[1:]
+        )
+        owned_projects = Project.objects.filter(owner=user).values_list('pk', flat=True)
+        created_teams = Team.objects.filter(created_by=user).values_list('pk', flat=True)
+        return cls(
+            user.pk,
+            projects=_grant_all(_pack(projects), owned_projects, PROJECT_BITS),
+            teams=_grant_all(_pack(teams), created_teams, TEAM_BITS),
+            portfolios=_pack(portfolios),
+        )
+
+    def to_json(self, version):
+        return json.dumps({
+            'format': CACHE_FORMAT,
+            'version': version,
+            'p': self.projects,
+            't': self.teams,
+            'f': self.portfolios,
+        })
+
+    @classmethod
+    def from_data(cls, user_id, data):
+        def ints(mapping):
+            return {int(key): mask for key, mask in mapping.items()}
+
+        return cls(user_id, projects=ints(data['p']), teams=ints(data['t']), portfolios=ints(data['f']))
+
+    # Membership checks
+
+    def is_project_member(self, project_id):
+        return project_id in self.projects
+
+    def is_team_member(self, team_id):
+        return team_id in self.teams
+
+    def is_portfolio_member(self, portfolio_id):
+        return portfolio_id in self.portfolios
+
+    # Permission checks
+
+    def has_project_perm(self, project_id, permission):
+        return bool(self.projects.get(project_id, 0) & PROJECT_BITS[permission])
+
+    def has_team_perm(self, team_id, permission):
+        return bool(self.teams.get(team_id, 0) & TEAM_BITS[permission])
+
+    def has_portfolio_perm(self, portfolio_id, permission):
+        return bool(self.portfolios.get(portfolio_id, 0) & PORTFOLIO_BITS[permission])
+
+    def project_ids(self, permission=None):
+        """Project ids the user belongs to, optionally narrowed to ``permission``."""
+        if permission is None:
+            return set(self.projects)
+        bit = PROJECT_BITS[permission]
+        return {project_id for project_id, mask in self.projects.items() if mask & bit}
+
+
+def resolve_permissions(user):
+    """
+    Return ``MembershipPermissions`` for ``user``, using the Redis cache.
+
+    Redis is an optimisation only: when it is unreachable the memberships are
+    read from the database.
+    """
+    if not user.is_authenticated:
+        return MembershipPermissions(None)
+
+    version_key = VERSION_KEY.format(user_id=user.pk)
+    payload_key = PAYLOAD_KEY.format(user_id=user.pk)
+
+    try:
+        client = get_redis()
+        version, payload = client.mget(version_key, payload_key)
+    except RedisError:
+        logger.warning('Permission cache unavailable; loading memberships from database')
+        return MembershipPermissions.load(user)
+
+    version = int(version or 0)
+    if payload is not None:
+        data = json.loads(payload)
+        if data.get('format') == CACHE_FORMAT and data.get('version') == version:
+            return MembershipPermissions.from_data(user.pk, data)
+
+    permissions = MembershipPermissions.load(user)
+    try:
+        client.set(payload_key, permissions.to_json(version), ex=CACHE_TIMEOUT)
+    except RedisError:
+        pass
+    return permissions
+
+
+def get_permissions(request):
+    """
+    Return the requester's permissions, resolving them at most once per request.
+
+    Works with both Django ``HttpRequest`` and DRF ``Request`` objects; the
+    snapshot is stored on the underlying ``HttpRequest``.
+    """
+    http_request = getattr(request, '_request', request)
+    user = request.user
+    cached = getattr(http_request, REQUEST_ATTR, None)
+    if cached is None or cached.user_id != user.pk:
+        cached = resolve_permissions(user)
+        setattr(http_request, REQUEST_ATTR, cached)
+    return cached
+
+
+def bump_membership_version(user_id):
+    """Invalidate the cached permissions of ``user_id``."""
+    try:
+        get_redis().incr(VERSION_KEY.format(user_id=user_id))
+    except RedisError:
+        logger.warning('Could not bump membership version for user %s', user_id)
+
+
+class ProjectPermissionRequiredMixin:
+    """
+    Require a ``ProjectMember`` permission on the project a view operates on;
+    the project's owner has them all.
+
+    When ``project_url_kwarg`` is set, the project id is read from the URL and
+    checked before the view runs; otherwise the check is made against the
+    ``project_id`` of the object returned by ``get_object``.
+    """
+    project_permission = None
+    project_url_kwarg = None
+
+    def check_project_permission(self, project_id):
+        if not get_permissions(self.request).has_project_perm(project_id, self.project_permission):
+            raise PermissionDenied
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated and self.project_url_kwarg:
+            self.check_project_permission(kwargs[self.project_url_kwarg])
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_object(self, queryset=None):
+        obj = super().get_object(queryset)
+        if not self.project_url_kwarg:
+            self.check_project_permission(obj.project_id)
+        return obj
+
+
+class TeamPermissionRequiredMixin:
+    """
+    Require a ``TeamMembership`` permission on the team given by ``pk``; the
+    team's creator has them all.
+    """
+    team_permission = None
+
+    def dispatch(self, request, *args, **kwargs):
+        if request.user.is_authenticated:
+            if not get_permissions(request).has_team_perm(kwargs['pk'], self.team_permission):
+                raise PermissionDenied
+        return super().dispatch(request, *args, **kwargs)
@@ -0,0 +1,224 @@
+"""
+Session activity tracking for Inspora platform.
+
+``SessionTrackingMiddleware`` reports every authenticated request here, but
+at most one report per session every ``SESSION_ACTIVITY_INTERVAL`` seconds
+(and the first of each day) gets past a Redis ``SET NX EX`` debounce key.
+Those are buffered in a Redis hash, and ``flush_activity`` periodically
+writes the whole buffer to ``UserSession`` with one upsert, so page hits
+never write to the database themselves.
+
+Each day's active sessions are also kept in a Redis hash (session key ->
+user id) for a few days. ``aggregate_day`` counts them, together with the
+``UserSession`` rows active that day, into ``DailySessionStats`` per team.
+
+While Redis is unavailable, reports are debounced per process and written
+directly.
+
+Buffered entries are cleaned before they are written: an invalid IP
+address is dropped and an entry without a usable session key or user is
+skipped, so one bad report cannot make every flush fail.
+"""
+import datetime
+import json
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from inspora.client_ip import clean_ip
+from inspora.redis_client import get_redis
+
+from .models import DailySessionStats, TeamMembership, UserSession
+
+logger = logging.getLogger(__name__)
+
+SEEN_KEY = 'accounts:sessions:seen:{day}:{session_key}'
+PENDING_KEY = 'accounts:sessions:pending'
+DAY_KEY = 'accounts:sessions:day:{day}'
+
+# UserSession.session_key max_length
+SESSION_KEY_LENGTH = 40
+
+# Days the per-day session hashes are kept for aggregation
+DAY_KEY_TTL = 3 * 24 * 60 * 60
+
+# Sessions debounced in process memory at most, while Redis is unavailable
+LOCAL_DEBOUNCE_LIMIT = 10000
+
+_local_seen = {}
+_local_lock = threading.Lock()
+
+
+def _claim_locally(session_key, day):
+    now = time.monotonic()
+    with _local_lock:
+        if _local_seen.get((session_key, day), 0) > now:
+            return False
+        if len(_local_seen) >= LOCAL_DEBOUNCE_LIMIT:
+            _local_seen.clear()
+        _local_seen[(session_key, day)] = now + settings.SESSION_ACTIVITY_INTERVAL
+        return True
+
+
+def _clean(session_key, entry):
+    """A writable copy of a buffered entry, or ``None`` when it cannot be written."""
+    if not isinstance(session_key, str) or not 0 < len(session_key) <= SESSION_KEY_LENGTH:
+        return None
+    if not isinstance(entry, dict) or type(entry.get('user_id')) is not int:
+        return None
+    user_agent = entry.get('user_agent')
+    return {
+        'user_id': entry['user_id'],
+        'ip_address': clean_ip(entry.get('ip_address')),
+        # Text columns cannot hold NUL characters on PostgreSQL
+        'user_agent': user_agent.replace('\x00', '') if isinstance(user_agent, str) else '',
+    }
+
+
+def touch(user_id, session_key, ip_address=None, user_agent='', now=None):
+    """Report activity on a session; returns whether it was recorded rather than debounced."""
+    day = timezone.localdate(now or timezone.now()).isoformat()
+    entry = _clean(session_key, {'user_id': user_id, 'ip_address': ip_address, 'user_agent': user_agent})
+    if entry is None:
+        return False
+    try:
+        client = get_redis()
+        if not client.set(SEEN_KEY.format(day=day, session_key=session_key), 1,
+                          nx=True, ex=settings.SESSION_ACTIVITY_INTERVAL):
+            return False
+        day_key = DAY_KEY.format(day=day)
+        pipe = client.pipeline(transaction=False)
+        pipe.hset(PENDING_KEY, session_key, json.dumps(entry))
+        pipe.hset(day_key, session_key, user_id)
+        pipe.expire(day_key, DAY_KEY_TTL)
+        pipe.execute()
+    except RedisError:
+        if not _claim_locally(session_key, day):
+            return False
+        _apply({session_key: entry})
+    return True
+
+
+def end_session(session_key):
+    """Mark a session inactive, e.g. on logout."""
+    try:
+        get_redis().hdel(PENDING_KEY, session_key)
+    except RedisError:
+        pass
+    UserSession.objects.filter(session_key=session_key).update(is_active=False)
+
+
+def _apply(entries):
+    """Upsert ``{session_key: entry}`` into ``UserSession`` with one statement."""
+    # Users may have been deleted since their activity was buffered
+    user_ids = set(get_user_model().objects.filter(
+        pk__in={entry['user_id'] for entry in entries.values()}).values_list('pk', flat=True))
+    sessions = [
+        UserSession(
+            session_key=session_key, user_id=entry['user_id'], ip_address=entry['ip_address'],
+            user_agent=entry['user_agent'], is_active=True,
+        )
+        for session_key, entry in entries.items()
+        if entry['user_id'] in user_ids
+    ]
+    # last_activity (auto_now) is set to the time of the flush
+    UserSession.objects.bulk_create(
+        sessions, update_conflicts=True, unique_fields=['session_key'],
+        update_fields=['user', 'ip_address', 'user_agent', 'last_activity', 'is_active'],
+    )
+    return len(sessions)
+
+
+def _take():
+    """Atomically read and clear the pending activity, dropping entries that cannot be written."""
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.hgetall(PENDING_KEY)
+    pipe.delete(PENDING_KEY)
+    pending, _deleted = pipe.execute()
+    entries = {}
+    for key, value in pending.items():
+        try:
+            entry = _clean(key.decode(), json.loads(value))
+        except ValueError:
+            entry = None
+        if entry is None:
+            logger.warning('Dropped malformed session activity for %r', key)
+            continue
+        entries[key.decode()] = entry
+    return entries
+
+
+def _restore(entries):
+    """Put taken activity back after a failed flush, keeping anything newer."""
+    pipe = get_redis().pipeline(transaction=False)
+    for session_key, entry in entries.items():
+        pipe.hsetnx(PENDING_KEY, session_key, json.dumps(entry))
+    pipe.execute()
+
+
+def flush_activity():
+    """Write buffered session activity to the database; returns the number of sessions written."""
+    try:
+        entries = _take()
+    except RedisError as e:
+        logger.warning('Could not read session activity: %s', e)
+        return 0
+    if not entries:
+        return 0
+    try:
+        with transaction.atomic():
+            return _apply(entries)
+    except Exception:
+        _restore(entries)
+        raise
+
+
+def aggregate_day(day):
+    """
+    Recount ``DailySessionStats`` of every team for ``day`` (a date in the
+    current time zone). Returns the number of teams with activity.
+    """
+    sessions = {}
+    try:
+        for session_key, user_id in get_redis().hgetall(DAY_KEY.format(day=day.isoformat())).items():
+            sessions[session_key.decode()] = int(user_id)
+    except RedisError as e:
+        logger.warning('Could not read active sessions of %s: %s', day, e)
+    start = timezone.make_aware(datetime.datetime.combine(day, datetime.time.min))
+    end = start + datetime.timedelta(days=1)
+    sessions.update(UserSession.objects.filter(last_activity__gte=start, last_activity__lt=end)
+                    .values_list('session_key', 'user_id'))
+
+    teams_of = {}
+    for user_id, team_id in TeamMembership.objects.filter(
+            user_id__in=set(sessions.values()), is_active=True).values_list('user_id', 'team_id'):
+        teams_of.setdefault(user_id, []).append(team_id)
+    users = {}
+    session_counts = {}
+    for user_id in sessions.values():
+        for team_id in teams_of.get(user_id, ()):
+            users.setdefault(team_id, set()).add(user_id)
+            session_counts[team_id] = session_counts.get(team_id, 0) + 1
+
+    stats = [
+        DailySessionStats(day=day, team_id=team_id, active_users=len(users[team_id]),
+                          active_sessions=session_counts[team_id])
+        for team_id in users
+    ]
+    DailySessionStats.objects.bulk_create(
+        stats, update_conflicts=True, unique_fields=['team', 'day'],
+        update_fields=['active_users', 'active_sessions', 'updated_at'],
+    )
+    return len(stats)
+
+
+def aggregate_recent(now=None):
+    """Recount today and yesterday; returns the number of team-day rows written."""
+    today = timezone.localdate(now or timezone.now())
+    return aggregate_day(today - datetime.timedelta(days=1)) + aggregate_day(today)
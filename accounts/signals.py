@@ -0,0 +1,57 @@
+"""
+Signal handlers for accounts app.
+"""
+from django.contrib.auth.signals import user_logged_out
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from .models import Team, TeamMembership
+from .permissions import bump_membership_version
+
+
+def invalidate_membership_permissions(sender, instance, **kwargs):
+    """Bump the member's permission cache version once the change commits."""
+    user_id = instance.user_id
+    transaction.on_commit(lambda: bump_membership_version(user_id))
+
+
+def invalidate_owner_permissions(sender, instance, created=False, **kwargs):
+    """Bump the permission cache version of a project's owners or a team's creator."""
+    if sender is Team:
+        user_ids = {instance.created_by_id}
+    else:
+        user_ids = {instance.owner_id}
+        if not created:
+            old_owner_id, _new = instance.get_field_diff().get('owner_id', (None, None))
+            if old_owner_id is None:
+                return
+            user_ids.add(old_owner_id)
+    for user_id in user_ids:
+        transaction.on_commit(lambda user_id=user_id: bump_membership_version(user_id))
+
+
+def connect_membership_signals():
+    from portfolios.models import PortfolioMember
+    from projects.models import Project, ProjectMember
+
+    for model in (ProjectMember, TeamMembership, PortfolioMember):
+        post_save.connect(invalidate_membership_permissions, sender=model,
+                          dispatch_uid=f'invalidate_permissions_{model._meta.label_lower}_save')
+        post_delete.connect(invalidate_membership_permissions, sender=model,
+                            dispatch_uid=f'invalidate_permissions_{model._meta.label_lower}_delete')
+    # Owners and team creators hold every permission without a membership
+    for model in (Project, Team):
+        post_save.connect(invalidate_owner_permissions, sender=model,
+                          dispatch_uid=f'invalidate_permissions_{model._meta.label_lower}_owner')
+
+
+def session_logged_out(sender, request, user, **kwargs):
+    """End the tracked session before logout discards its key."""
+    from .session_tracking import end_session
+
+    session_key = request.session.session_key if hasattr(request, 'session') else None
+    if session_key:
+        end_session(session_key)
+
+
+def connect_session_signals():
+    user_logged_out.connect(session_logged_out, dispatch_uid='accounts_session_logged_out')
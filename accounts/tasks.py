@@ -0,0 +1,18 @@
+"""
+Celery tasks for accounts app.
+"""
+from celery import shared_task
+
+from .session_tracking import aggregate_recent, flush_activity
+
+
+@shared_task
+def flush_session_activity():
+    """Write debounced session activity to UserSession."""
+    return flush_activity()
+
+
+@shared_task
+def aggregate_session_stats():
+    """Recount active users and sessions per team for today and yesterday."""
+    return aggregate_recent()
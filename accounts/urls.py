@@ -17,6 +17,7 @@ urlpatterns = [
     path('teams/<int:pk>/', views.TeamDetailView.as_view(), name='team_detail'),
     path('teams/<int:pk>/edit/', views.TeamEditView.as_view(), name='team_edit'),
     path('teams/<int:pk>/members/', views.TeamMembersView.as_view(), name='team_members'),
+    path('teams/<int:pk>/session-stats/', views.TeamSessionStatsView.as_view(), name='team_session_stats'),
     
     # Authentication (if not using Django's built-in)
     path('login/', views.LoginView.as_view(), name='login'),
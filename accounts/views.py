@@ -6,19 +6,23 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.contrib.auth.views import LoginView as AuthLoginView
 from django.contrib.auth import logout
-from django.views.generic import ListView, DetailView, CreateView, UpdateView
+from django.views.generic import ListView, DetailView, CreateView, UpdateView, View
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import reverse_lazy
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth import get_user_model
-from .models import Team, TeamMembership, AIChat, AISuggestion, AIWorkflowAssistant
+from projects.activity import get_user_feed
+from .permissions import TeamPermissionRequiredMixin, get_permissions
+from .models import Team, TeamMembership, DailySessionStats, AIChat, AISuggestion, AIWorkflowAssistant
 from .ai_services import AIChatService, AISuggestionService, AIWorkflowService
 from .forms import CustomUserCreationForm
 from .google_auth import get_google_oauth2_url, exchange_code_for_token, get_user_info_from_token
 import json
+from datetime import timedelta
 from django.core.exceptions import ValidationError
+from django.utils import timezone
 from django.conf import settings
 
 User = get_user_model()
@@ -27,7 +31,8 @@ User = get_user_model()
 @login_required
 def user_dashboard(request):
     """User dashboard view."""
-    return render(request, 'dashboard.html')
+    activity_feed = get_user_feed(request.user, get_permissions(request), limit=10)
+    return render(request, 'dashboard.html', {'activity_feed': activity_feed})
 
 
 class UserListView(LoginRequiredMixin, ListView):
@@ -84,9 +89,18 @@ class TeamCreateView(LoginRequiredMixin, CreateView):
     template_name = 'accounts/team_form.html'
     fields = ['name', 'description', 'is_public', 'max_members']
 
+    def form_valid(self, form):
+        form.instance.created_by = self.request.user
+        response = super().form_valid(form)
+        TeamMembership.objects.get_or_create(
+            team=self.object, user=self.request.user, defaults={'role': 'admin', 'can_manage_team': True}
+        )
+        return response
 
-class TeamEditView(LoginRequiredMixin, UpdateView):
+
+class TeamEditView(LoginRequiredMixin, TeamPermissionRequiredMixin, UpdateView):
     model = Team
+    team_permission = 'can_manage_team'
     template_name = 'accounts/team_form.html'
     fields = ['name', 'description', 'is_public', 'max_members']
 
@@ -105,6 +119,28 @@ class TeamMembersView(LoginRequiredMixin, ListView):
         return context
 
 
+class TeamSessionStatsView(LoginRequiredMixin, TeamPermissionRequiredMixin, View):
+    """Daily active users and sessions of a team over the last ``?days=`` (default 30)."""
+    team_permission = 'can_view_analytics'
+    max_days = 365
+
+    def get(self, request, pk):
+        try:
+            days = min(max(int(request.GET.get('days', 30)), 1), self.max_days)
+        except ValueError:
+            return JsonResponse({'error': 'days must be an integer.'}, status=400)
+        since = timezone.localdate() - timedelta(days=days - 1)
+        stats = DailySessionStats.objects.filter(team_id=pk, day__gte=since).order_by('day')
+        return JsonResponse({
+            'team': pk,
+            'days': [
+                {'day': row['day'].isoformat(), 'active_users': row['active_users'],
+                 'active_sessions': row['active_sessions']}
+                for row in stats.values('day', 'active_users', 'active_sessions')
+            ],
+        })
+
+
 class LoginView(AuthLoginView):
     template_name = 'accounts/login.html'
     redirect_authenticated_user = True
@@ -0,0 +1,331 @@
+"""
+Audit alerting for Inspora platform.
+
+Active ``AuditPolicy`` rows of type ``alerting`` raise an ``AuditAlert``
+when more than ``threshold`` matching audit logs fall within a sliding
+window of ``window`` seconds::
+
+    conditions = {"event_type": "login", "tags__contains": "failed"}
+    config = {
+        "threshold": 20, "window": 300, "group_by": ["ip_address"],
+        "alert_type": "security", "severity": "warning",
+        "title": "Repeated failed logins",
+        "cooldown": 900,
+    }
+
+``conditions`` are matched as in ``audit.conditions``; ``applies_to``
+narrows a policy to an app label or ``app_label.model``. Each distinct
+``group_by`` value (e.g. each IP address or user) has its own window.
+After an alert a group stays quiet for ``cooldown`` seconds (default: the
+window), and the alert links the logs in the window.
+
+Every batch written by the audit writer is checked once it commits.
+Policies are compiled once per process and reloaded when one changes
+(a version counter in Redis). Windows are Redis sorted sets of log ids
+scored by timestamp, updated for a whole batch in one pipeline; while Redis
+is unavailable they are kept in process memory.
+"""
+import logging
+import threading
+import time
+from collections import defaultdict, deque
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection, transaction
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+
+from .conditions import compile_conditions
+
+logger = logging.getLogger(__name__)
+
+POLICY_VERSION_KEY = 'audit:alerting:version'
+WINDOW_KEY = 'audit:alerting:{policy}:{group}'
+COOLDOWN_KEY = 'audit:alerting:{policy}:{group}:cooldown'
+
+# Seconds between checks of the policy version
+POLICY_CHECK_INTERVAL = 30
+
+# Logs linked to one alert at most
+MAX_LINKED_LOGS = 500
+
+DEFAULT_THRESHOLD = 10
+DEFAULT_WINDOW = 300
+
+
+class CompiledPolicy:
+    """An alerting policy ready to be checked against many logs."""
+
+    def __init__(self, policy):
+        config = policy.config or {}
+        self.pk = policy.pk
+        self.name = policy.name
+        self.match = compile_conditions(policy.conditions)
+        self.applies_to = (policy.applies_to or '').strip().lower()
+        self.threshold = int(config.get('threshold', DEFAULT_THRESHOLD))
+        self.window = int(config.get('window', DEFAULT_WINDOW))
+        self.cooldown = int(config.get('cooldown', self.window))
+        self.group_by = list(config.get('group_by') or [])
+        self.alert_type = config.get('alert_type', 'security')
+        self.severity = config.get('severity', 'warning')
+        self.title = config.get('title') or policy.name
+
+    def applies(self, values):
+        if self.applies_to and self.applies_to not in (values['app_label'], values['content_type']):
+            return False
+        return self.match(values)
+
+    def group(self, values):
+        """Window key for ``values``; ``None`` when every group field is empty."""
+        if not self.group_by:
+            return '*'
+        parts = [values.get(name) for name in self.group_by]
+        if all(part in (None, '') for part in parts):
+            return None
+        return '|'.join('' if part is None else str(part) for part in parts)
+
+
+class PolicySet:
+    """The compiled active alerting policies of this process."""
+
+    def __init__(self):
+        self.policies = []
+        self.version = None
+        self._checked_at = 0.0
+        self._stale = True
+        self._lock = threading.Lock()
+
+    def invalidate(self):
+        self._stale = True
+
+    def _remote_version(self):
+        try:
+            return int(get_redis().get(POLICY_VERSION_KEY) or 0)
+        except RedisError:
+            return None
+
+    def get(self):
+        now = time.monotonic()
+        if not self._stale and now - self._checked_at < POLICY_CHECK_INTERVAL:
+            return self.policies
+        with self._lock:
+            version = self._remote_version()
+            if self._stale or version is None or version != self.version:
+                self.policies = self._load()
+                self.version = version
+                self._stale = False
+            self._checked_at = now
+        return self.policies
+
+    def _load(self):
+        from .models import AuditPolicy
+
+        policies = []
+        for policy in AuditPolicy.objects.filter(policy_type='alerting', is_active=True):
+            try:
+                policies.append(CompiledPolicy(policy))
+            except (TypeError, ValueError) as e:
+                logger.warning('Alerting policy %s is invalid: %s', policy.pk, e)
+        return policies
+
+
+policy_set = PolicySet()
+
+
+def policy_changed(sender, instance, **kwargs):
+    if instance.policy_type != 'alerting':
+        return
+    policy_set.invalidate()
+
+    def publish():
+        try:
+            get_redis().incr(POLICY_VERSION_KEY)
+        except RedisError:
+            pass
+    transaction.on_commit(publish)
+
+
+# Windows
+
+class RedisWindows:
+    """Sliding windows as sorted sets of log ids scored by timestamp."""
+
+    def add(self, entries):
+        """
+        Add ``{(policy, group): [(log id, timestamp), ...]}`` and return the
+        window sizes by key; ``policy`` is a ``CompiledPolicy``.
+        """
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        keys = list(entries)
+        for policy, group in keys:
+            key = WINDOW_KEY.format(policy=policy.pk, group=group)
+            items = entries[(policy, group)]
+            latest = max(ts for _log_id, ts in items)
+            pipe.zadd(key, {log_id: ts for log_id, ts in items})
+            pipe.zremrangebyscore(key, '-inf', f'({latest - policy.window}')
+            pipe.zcard(key)
+            pipe.expire(key, policy.window + 60)
+        results = pipe.execute()
+        return {key: results[index * 4 + 2] for index, key in enumerate(keys)}
+
+    def claim(self, keys):
+        """Start the cooldown of each key; return the keys that were not cooling down."""
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        for policy, group in keys:
+            pipe.set(COOLDOWN_KEY.format(policy=policy.pk, group=group), 1, nx=True, ex=max(policy.cooldown, 1))
+        return [key for key, claimed in zip(keys, pipe.execute()) if claimed]
+
+    def members(self, keys):
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        for policy, group in keys:
+            pipe.zrevrange(WINDOW_KEY.format(policy=policy.pk, group=group), 0, MAX_LINKED_LOGS - 1)
+        return {key: [int(member) for member in members] for key, members in zip(keys, pipe.execute())}
+
+
+class MemoryWindows:
+    """Per-process sliding windows, used while Redis is unavailable."""
+
+    def __init__(self):
+        self._windows = defaultdict(deque)
+        self._cooldowns = {}
+        self._lock = threading.Lock()
+
+    def add(self, entries):
+        sizes = {}
+        with self._lock:
+            for (policy, group), items in entries.items():
+                window = self._windows[(policy.pk, group)]
+                window.extend(sorted(items, key=lambda item: item[1]))
+                latest = max(ts for _log_id, ts in items)
+                while window and window[0][1] < latest - policy.window:
+                    window.popleft()
+                sizes[(policy, group)] = len(window)
+        return sizes
+
+    def claim(self, keys):
+        now = time.time()
+        claimed = []
+        with self._lock:
+            for policy, group in keys:
+                if self._cooldowns.get((policy.pk, group), 0) <= now:
+                    self._cooldowns[(policy.pk, group)] = now + policy.cooldown
+                    claimed.append((policy, group))
+        return claimed
+
+    def members(self, keys):
+        with self._lock:
+            return {
+                (policy, group): [log_id for log_id, _ts in reversed(self._windows[(policy.pk, group)])][:MAX_LINKED_LOGS]
+                for policy, group in keys
+            }
+
+
+redis_windows = RedisWindows()
+memory_windows = MemoryWindows()
+
+
+# Detection
+
+def _values(log):
+    values = {field.attname: getattr(log, field.attname) for field in log._meta.concrete_fields}
+    values['user'] = log.user_id
+    content_type = ContentType.objects.get_for_id(log.content_type_id) if log.content_type_id else None
+    values['app_label'] = content_type.app_label if content_type else None
+    values['content_type'] = f'{content_type.app_label}.{content_type.model}' if content_type else None
+    return values
+
+
+def _alert(policy, group, count):
+    from .models import AuditAlert
+
+    where = f' for {", ".join(policy.group_by)} {group}' if policy.group_by else ''
+    return AuditAlert(
+        title=policy.title,
+        message=(f'{count} matching audit events{where} within {policy.window} seconds '
+                 f'(threshold {policy.threshold}).'),
+        alert_type=policy.alert_type,
+        severity=policy.severity,
+        alert_data={
+            'policy_id': policy.pk,
+            'group_by': policy.group_by,
+            'group': group,
+            'count': count,
+            'threshold': policy.threshold,
+            'window': policy.window,
+        },
+    )
+
+
+def _create_alerts(alerts, log_ids):
+    """Insert ``alerts`` and link each to its logs, in bulk."""
+    from .models import AuditAlert
+
+    if connection.features.can_return_rows_from_bulk_insert:
+        AuditAlert.objects.bulk_create(alerts)
+    else:
+        # Primary keys are needed for the links
+        for alert in alerts:
+            alert.save()
+    link = AuditAlert.related_audit_logs.through
+    link.objects.bulk_create([
+        link(auditalert_id=alert.pk, auditlog_id=log_id)
+        for alert, ids in zip(alerts, log_ids) for log_id in ids
+    ])
+
+
+def detect(logs):
+    """
+    Check saved ``AuditLog`` instances against the alerting policies and
+    create the alerts they raise. Returns the created alerts.
+    """
+    policies = policy_set.get()
+    if not policies or not logs:
+        return []
+
+    entries = defaultdict(list)
+    for log in logs:
+        values = _values(log)
+        for policy in policies:
+            if not policy.applies(values):
+                continue
+            group = policy.group(values)
+            if group is not None:
+                entries[(policy, group)].append((log.pk, log.timestamp.timestamp()))
+    if not entries:
+        return []
+
+    try:
+        windows = redis_windows
+        sizes = windows.add(entries)
+    except RedisError:
+        windows = memory_windows
+        sizes = windows.add(entries)
+    over = [key for key, size in sizes.items() if size > key[0].threshold]
+    if not over:
+        return []
+    try:
+        claimed = windows.claim(over)
+        members = windows.members(claimed)
+    except RedisError:
+        logger.warning('Audit alert windows unavailable; %s alerts not raised', len(over))
+        return []
+
+    alerts = [_alert(policy, group, sizes[(policy, group)]) for policy, group in claimed]
+    with transaction.atomic():
+        _create_alerts(alerts, [members[key] for key in claimed])
+    logger.info('Raised %s audit alerts', len(alerts))
+    return alerts
+
+
+def detect_after_commit(logs):
+    """Run ``detect`` once the transaction writing ``logs`` commits."""
+    def run():
+        try:
+            detect(logs)
+        except Exception:
+            logger.exception('Audit alert detection failed')
+    transaction.on_commit(run)
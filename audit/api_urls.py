@@ -0,0 +1,27 @@
+"""
+API URLs for audit app.
+"""
+from django.urls import path, include
+from django.http import JsonResponse
+from rest_framework.routers import SimpleRouter
+from . import api_views
+
+router = SimpleRouter()
+router.register('logs', api_views.AuditLogViewSet, basename='audit-log')
+
+def api_status(request):
+    """Simple API status endpoint for testing."""
+    return JsonResponse({
+        'status': 'success',
+        'message': 'Audit API is working!',
+        'app': 'audit',
+        'endpoints': {
+            'logs': '/api/audit/logs/',
+        }
+    })
+
+urlpatterns = [
+    path('', api_status, name='api_status'),
+    path('status/', api_status, name='api_status_detail'),
+    path('', include(router.urls)),
+]
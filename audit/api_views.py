@@ -0,0 +1,83 @@
+"""
+API views for audit app.
+"""
+from django.contrib.contenttypes.models import ContentType
+from django.db import connection
+from django.utils.dateparse import parse_datetime
+from rest_framework import permissions, viewsets
+from rest_framework.exceptions import ValidationError
+from .models import AuditLog
+from .pagination import KeysetPagination
+from .serializers import AuditLogSerializer, AuditLogDetailSerializer
+
+
+def _list(params, name, cast=str):
+    """Values of a filter given as ``?name=a,b`` and/or repeated ``?name=``."""
+    values = [value for raw in params.getlist(name) for value in raw.split(',') if value]
+    try:
+        return [cast(value) for value in values]
+    except ValueError:
+        raise ValidationError({name: 'Invalid value.'})
+
+
+def filter_logs(logs, params):
+    """Apply the log API's query parameters to ``logs``."""
+    for name, lookup, cast in (('user', 'user_id', int), ('event_type', 'event_type', str),
+                               ('severity', 'severity', str), ('ip_address', 'ip_address', str)):
+        values = _list(params, name, cast)
+        if len(values) == 1:
+            logs = logs.filter(**{lookup: values[0]})
+        elif values:
+            logs = logs.filter(**{f'{lookup}__in': values})
+
+    if params.get('content_type'):
+        app_label, _, model = params['content_type'].lower().partition('.')
+        try:
+            content_type = ContentType.objects.get_by_natural_key(app_label, model)
+        except ContentType.DoesNotExist:
+            raise ValidationError({'content_type': 'Expected app_label.model.'})
+        logs = logs.filter(content_type_id=content_type.pk)
+    if params.get('object_id'):
+        if not params.get('content_type'):
+            raise ValidationError({'object_id': 'Requires content_type.'})
+        logs = logs.filter(object_id__in=_list(params, 'object_id', int))
+
+    for tag in _list(params, 'tag'):
+        if connection.features.supports_json_field_contains:
+            logs = logs.filter(tags__contains=[tag])
+        else:
+            logs = logs.filter(tags__icontains=f'"{tag}"')
+
+    for name, lookup in (('since', 'timestamp__gte'), ('until', 'timestamp__lt')):
+        if params.get(name):
+            when = parse_datetime(params[name])
+            if when is None:
+                raise ValidationError({name: 'Expected an ISO 8601 datetime.'})
+            logs = logs.filter(**{lookup: when})
+    return logs
+
+
+class AuditLogViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Audit logs, newest first, for staff.
+
+    Filters: ``user``, ``event_type``, ``severity`` and ``ip_address`` (comma
+    separated for any of several), ``content_type`` (``app_label.model``)
+    with optional ``object_id``, ``tag`` (repeat to require several) and
+    ``since``/``until``. Pages follow ``next_cursor``; see
+    ``audit.pagination``.
+    """
+    permission_classes = [permissions.IsAdminUser]
+    pagination_class = KeysetPagination
+    filter_backends = []
+
+    def get_queryset(self):
+        logs = AuditLog.objects.select_related('user').with_related_objects()
+        if self.action == 'list':
+            logs = filter_logs(logs, self.request.query_params)
+        else:
+            logs = logs.prefetch_related('events')
+        return logs
+
+    def get_serializer_class(self):
+        return AuditLogSerializer if self.action == 'list' else AuditLogDetailSerializer
@@ -5,3 +5,10 @@ class AuditConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'audit'
     verbose_name = 'Audit Logging'
+
+    def ready(self):
+        from .capture import connect_audit_signals
+        from .exports import connect_export_signals
+
+        connect_audit_signals()
+        connect_export_signals()
@@ -0,0 +1,417 @@
+"""
+Audit capture for Inspora platform.
+
+Model creates/updates/deletes and logins/logouts are recorded as
+``AuditLog`` + ``AuditEvent`` pairs without an INSERT per event: each event
+is queued in a per-process ``AuditBuffer`` and written with ``bulk_create``
+when the buffer reaches ``AUDIT_BUFFER_SIZE`` events, when the oldest
+queued event is ``AUDIT_FLUSH_INTERVAL`` seconds old, at the end of each
+request (``AuditMiddleware``) and after each Celery task.
+
+With ``AUDIT_SPILL = 'redis'`` a flush appends the queued events to a Redis
+stream instead, in one round trip, so they survive a worker restart;
+``drain_audit_stream`` writes them to the database in batches and
+acknowledges them only once they are committed.
+
+Model changes are queued when their transaction commits, so rolled-back
+changes are never audited. Updates of models with ``FieldTrackingMixin``
+record only the fields that changed, from the values the instance was
+loaded with.
+"""
+import atexit
+import json
+import logging
+import os
+import socket
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in, user_logged_out, user_login_failed
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+from django.db.models.signals import post_save, post_delete
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from redis.exceptions import RedisError, ResponseError
+
+from inspora.client_ip import clean_ip, get_client_ip
+from inspora.redis_client import get_redis
+
+from .alerting import detect_after_commit, policy_changed
+from .chain import chain_logs
+from .mixins import FieldTrackingMixin
+from .rollups import add_logs
+
+logger = logging.getLogger(__name__)
+
+current_request = ContextVar('audit_request', default=None)
+
+STREAM_KEY = 'audit:events'
+STREAM_GROUP = 'audit-writers'
+
+# Stream entries claimed by a consumer that died are taken over after this long (ms)
+STREAM_CLAIM_IDLE = 60 * 1000
+
+class AuditJSONEncoder(DjangoJSONEncoder):
+    """Encode anything a model field can hold; unknown types become strings."""
+
+    def default(self, o):
+        try:
+            return super().default(o)
+        except TypeError:
+            return str(o)
+
+
+def _jsonable(data):
+    return json.loads(json.dumps(data, cls=AuditJSONEncoder))
+
+
+# Writing
+
+def write_records(records):
+    """Insert queued records (``{'log': {...}, 'events': [...]}``) in bulk."""
+    from .models import AuditLog, AuditEvent
+
+    if not records:
+        return 0
+    records = _jsonable(records)
+    logs = []
+    for record in records:
+        data = dict(record['log'])
+        data['timestamp'] = parse_datetime(data['timestamp'])
+        # One malformed address would fail the whole batch's insert
+        data['ip_address'] = clean_ip(data.get('ip_address'))
+        logs.append(AuditLog(**data))
+
+    with transaction.atomic():
+        chain_logs(logs)
+        if connection.features.can_return_rows_from_bulk_insert:
+            AuditLog.objects.bulk_create(logs)
+        else:
+            # Primary keys are needed for the events
+            for log in logs:
+                log.save()
+        events = []
+        for log, record in zip(logs, records):
+            for event in record['events']:
+                events.append(AuditEvent(audit_log=log, created_at=log.timestamp, **event))
+        AuditEvent.objects.bulk_create(events)
+        add_logs(logs)
+        detect_after_commit(logs)
+    return len(logs)
+
+
+def spill_records(records):
+    """Append records to the Redis stream in one round trip."""
+    pipe = get_redis().pipeline(transaction=False)
+    for record in records:
+        pipe.xadd(STREAM_KEY, {'record': json.dumps(record, cls=AuditJSONEncoder)})
+    pipe.execute()
+
+
+class AuditBuffer:
+    """Per-process queue of audit records, flushed in batches."""
+
+    def __init__(self):
+        self._records = []
+        self._oldest = None
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._records)
+
+    def add(self, record):
+        with self._lock:
+            self._records.append(record)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            due = (len(self._records) >= settings.AUDIT_BUFFER_SIZE
+                   or time.monotonic() - self._oldest >= settings.AUDIT_FLUSH_INTERVAL)
+        if due:
+            self.flush()
+
+    def drain(self):
+        with self._lock:
+            records, self._records, self._oldest = self._records, [], None
+        return records
+
+    def requeue(self, records):
+        """Put records that could not be written back in front of the queue, for the next flush."""
+        with self._lock:
+            self._records[:0] = records
+            self._oldest = time.monotonic()
+
+    def flush(self):
+        """
+        Write (or spill) everything queued; returns the number of records.
+
+        Records that cannot be written are spilled to the audit stream, or
+        kept in the queue while Redis is unavailable too.
+        """
+        records = self.drain()
+        if not records:
+            return 0
+        spilled = settings.AUDIT_SPILL == 'redis'
+        if spilled:
+            try:
+                spill_records(records)
+                return len(records)
+            except RedisError as e:
+                logger.warning('Audit stream unavailable (%s); writing %s records directly', e, len(records))
+        try:
+            return write_records(records)
+        except Exception:
+            logger.exception('Could not write %s audit records', len(records))
+        if not spilled:
+            try:
+                spill_records(records)
+                logger.warning('Spilled %s unwritten audit records to the audit stream', len(records))
+                return len(records)
+            except RedisError as e:
+                logger.warning('Audit stream unavailable (%s)', e)
+        logger.error('Keeping %s unwritten audit records queued for the next flush', len(records))
+        self.requeue(records)
+        return 0
+
+
+audit_buffer = AuditBuffer()
+atexit.register(audit_buffer.flush)
+
+
+# Stream consumer
+
+def _consumer_name():
+    return f'{socket.gethostname()}-{os.getpid()}'
+
+
+def _ensure_group(client):
+    try:
+        client.xgroup_create(STREAM_KEY, STREAM_GROUP, id='0', mkstream=True)
+    except ResponseError as e:
+        if 'BUSYGROUP' not in str(e):
+            raise
+
+
+def drain_stream(batch_size=500, max_batches=None, block=None):
+    """
+    Write spilled records from the Redis stream to the database.
+
+    Entries stay pending until their batch is committed, so a consumer that
+    dies mid-batch leaves them to be claimed by the next one. Returns the
+    number of records written.
+    """
+    client = get_redis()
+    _ensure_group(client)
+    consumer = _consumer_name()
+    written = batches = 0
+    # Take over entries of consumers that died before acknowledging them
+    claimed = client.xautoclaim(STREAM_KEY, STREAM_GROUP, consumer, STREAM_CLAIM_IDLE, count=batch_size)
+    entries = claimed[1] if claimed else []
+    while max_batches is None or batches < max_batches:
+        if not entries:
+            response = client.xreadgroup(STREAM_GROUP, consumer, {STREAM_KEY: '>'}, count=batch_size, block=block)
+            entries = response[0][1] if response else []
+        if not entries:
+            break
+        ids = [entry_id for entry_id, _fields in entries]
+        records = [json.loads(fields[b'record']) for _entry_id, fields in entries if fields]
+        written += write_records(records)
+        pipe = client.pipeline(transaction=False)
+        pipe.xack(STREAM_KEY, STREAM_GROUP, *ids)
+        pipe.xdel(STREAM_KEY, *ids)
+        pipe.execute()
+        batches += 1
+        entries = []
+    return written
+
+
+# Capture
+
+def _request_meta():
+    request = current_request.get()
+    if request is None:
+        return {}
+    user = getattr(request, 'user', None)
+    session = getattr(request, 'session', None)
+    return {
+        'user_id': user.pk if user is not None and user.is_authenticated else None,
+        'session_id': (session.session_key or '') if session is not None else '',
+        'ip_address': get_client_ip(request),
+        'user_agent': request.META.get('HTTP_USER_AGENT', ''),
+    }
+
+
+def _target(instance):
+    """The ``content_type_id``/``object_id`` columns of a log about ``instance``, plus details."""
+    target = {'content_type_id': ContentType.objects.get_for_model(type(instance)).pk,
+              'object_id': None, 'details': {}}
+    if isinstance(instance.pk, int) and instance.pk >= 0:
+        target['object_id'] = instance.pk
+    else:
+        target['details']['object_pk'] = str(instance.pk)
+    return target
+
+
+def record(event_type, description, severity='low', instance=None, details=None, events=(),
+           source='', tags=None, user=None, request_meta=None, target=None):
+    """
+    Queue one audit log with its events.
+
+    User, session, IP and user agent come from the current request unless
+    ``request_meta`` is given. The object is ``instance``, or ``target`` as
+    returned by ``_target`` when the log is written after the instance may
+    have changed (a deleted instance loses its pk).
+    """
+    log = {
+        'event_type': event_type,
+        'severity': severity,
+        'description': description,
+        'details': details or {},
+        'timestamp': timezone.now(),
+        'source': source,
+        'tags': tags or [],
+        'content_type_id': None,
+        'object_id': None,
+        **(_request_meta() if request_meta is None else request_meta),
+    }
+    if user is not None:
+        log['user_id'] = user.pk
+    if instance is not None:
+        target = _target(instance)
+    if target is not None:
+        log['content_type_id'] = target['content_type_id']
+        log['object_id'] = target['object_id']
+        log['details'] = {**log['details'], **target['details']}
+    audit_buffer.add({'log': log, 'events': list(events)})
+
+
+def _is_audited(model):
+    if model._meta.app_label in settings.AUDIT_EXCLUDED_APPS:
+        return False
+    if model._meta.label_lower in settings.AUDIT_EXCLUDED_MODELS:
+        return False
+    return not model.__name__.startswith('Historical')
+
+
+REDACTED = '[redacted]'
+
+
+def _is_redacted(model, name):
+    redacted = settings.AUDIT_REDACTED_FIELDS
+    return name in redacted or f'{model._meta.label_lower}.{name}' in redacted
+
+
+def _redact(model, values):
+    """Replace the values of sensitive fields; their names are kept so the change is still visible."""
+    return {name: REDACTED if _is_redacted(model, name) else value for name, value in values.items()}
+
+
+def _field_values(instance, fields=None):
+    # Deferred fields are left out rather than loaded one query at a time
+    deferred = instance.get_deferred_fields()
+    values = {}
+    for field in instance._meta.concrete_fields:
+        if field.attname in deferred:
+            continue
+        if fields is not None and field.name not in fields and field.attname not in fields:
+            continue
+        values[field.attname] = getattr(instance, field.attname)
+    return _redact(type(instance), values)
+
+
+def _label(instance):
+    return f'{instance._meta.label_lower} #{instance.pk}'
+
+
+def model_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or not _is_audited(sender):
+        return
+    if created:
+        event = {'name': 'create', 'category': sender._meta.label_lower,
+                 'before_data': {}, 'after_data': _field_values(instance), 'changed_fields': []}
+        description = f'Created {_label(instance)}'
+    else:
+        before = {}
+        if isinstance(instance, FieldTrackingMixin) and instance.get_loaded_values() is not None:
+            diff = instance.get_field_diff()
+            if not diff:
+                return
+            changed = list(diff)
+            before = _redact(sender, {name: old for name, (old, _new) in diff.items()})
+            after = _redact(sender, {name: new for name, (_old, new) in diff.items()})
+        else:
+            # e.g. the last_login update of every login: record only the saved fields
+            update_fields = kwargs.get('update_fields')
+            after = _field_values(instance, update_fields)
+            changed = list(update_fields or [])
+        event = {'name': 'update', 'category': sender._meta.label_lower,
+                 'before_data': before, 'after_data': after, 'changed_fields': changed}
+        description = f'Updated {_label(instance)}'
+
+    event_type = 'create' if created else 'update'
+    # Request details are taken now; the transaction may commit after the request ends
+    meta = _request_meta()
+    target = _target(instance)
+    transaction.on_commit(lambda: record(event_type, description, 'low', target=target,
+                                         events=[event], request_meta=meta))
+
+
+def model_deleted(sender, instance, **kwargs):
+    if not _is_audited(sender):
+        return
+    event = {'name': 'delete', 'category': sender._meta.label_lower,
+             'before_data': _field_values(instance), 'after_data': {}, 'changed_fields': []}
+    description = f'Deleted {_label(instance)}'
+    meta = _request_meta()
+    # The delete collector clears instance.pk before the transaction commits
+    target = _target(instance)
+    target['details']['object_repr'] = str(instance)
+    transaction.on_commit(lambda: record('delete', description, 'medium', target=target,
+                                         events=[event], request_meta=meta))
+
+
+def _meta_for(request):
+    token = current_request.set(request)
+    try:
+        return _request_meta()
+    finally:
+        current_request.reset(token)
+
+
+def logged_in(sender, request, user, **kwargs):
+    record('login', f'{user.get_username()} logged in', user=user, source='auth',
+           request_meta=_meta_for(request))
+
+
+def logged_out(sender, request, user, **kwargs):
+    name = user.get_username() if user is not None else 'Anonymous user'
+    record('logout', f'{name} logged out', user=user, source='auth', request_meta=_meta_for(request))
+
+
+def login_failed(sender, credentials, request=None, **kwargs):
+    record('login', 'Failed login', severity='medium', source='auth', tags=['failed'],
+           details={'username': credentials.get('username', '')}, request_meta=_meta_for(request))
+
+
+def flush_after_task(**kwargs):
+    audit_buffer.flush()
+
+
+def connect_audit_signals():
+    if not settings.AUDIT_ENABLED:
+        return
+    post_save.connect(model_saved, dispatch_uid='audit_model_saved')
+    post_delete.connect(model_deleted, dispatch_uid='audit_model_deleted')
+    user_logged_in.connect(logged_in, dispatch_uid='audit_logged_in')
+    user_logged_out.connect(logged_out, dispatch_uid='audit_logged_out')
+    user_login_failed.connect(login_failed, dispatch_uid='audit_login_failed')
+
+    from .models import AuditPolicy
+    post_save.connect(policy_changed, sender=AuditPolicy, dispatch_uid='audit_alerting_policy_saved')
+    post_delete.connect(policy_changed, sender=AuditPolicy, dispatch_uid='audit_alerting_policy_deleted')
+
+    from celery.signals import task_postrun
+    task_postrun.connect(flush_after_task, dispatch_uid='audit_flush_after_task', weak=False)
@@ -0,0 +1,299 @@
+"""
+Audit hash chain for Inspora platform.
+
+Audit logs form a tamper-evident hash chain. Logs are chained per UTC day of their timestamp. Each log written by the
+audit writer stores ``chain_hash = sha256(previous hash + content)``; the
+first log of a day chains from a seed derived from the date. The writer
+locks the day's ``AuditChainCheckpoint`` while it extends the chain, so
+concurrent writers append one after the other and the chain order is the
+primary-key order.
+
+Once a day is over it is sealed: the checkpoint keeps the Merkle root of the
+day's row hashes and a ``chain_root`` over that root and the previous
+sealed checkpoint. Altering, deleting or reordering a row breaks the day's
+chain; rewriting a whole day changes its Merkle root and every later
+``chain_root``. Days are independent segments, so ``verify_audit_chain``
+checks them in parallel, and checking one day only needs that day's rows
+and the stored checkpoints. Publishing the latest ``chain_root`` outside
+the database (e.g. in a ticket or signed email) makes it evident if the
+checkpoints themselves are rewritten.
+
+Retention keeps the ``(id, chain_hash)`` of each chained log it deletes as
+an ``AuditChainTombstone`` while other logs of its day remain, so the
+surviving logs are still replayed and checked against the Merkle root.
+Only a day that has lost all of its logs is marked pruned and skipped.
+"""
+import datetime
+import hashlib
+import heapq
+import json
+import logging
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Fields covered by a log's hash, in order; AuditLog's user and content_type FKs are
+# neither enforced nor cascaded so deleting a user or content type cannot rewrite them
+HASHED_FIELDS = (
+    'timestamp', 'event_type', 'severity', 'description', 'details', 'user_id', 'session_id',
+    'ip_address', 'user_agent', 'content_type_id', 'object_id', 'source', 'tags',
+)
+
+# A day is sealed this long after it ends, leaving time for late writes
+SEAL_GRACE = datetime.timedelta(hours=1)
+
+
+def _sha256(data):
+    return hashlib.sha256(data.encode()).hexdigest()
+
+
+def seed(day):
+    return _sha256(f'inspora-audit-chain:{day.isoformat()}')
+
+
+def content(values):
+    """Canonical text of a log's hashed fields, from a dict of ``HASHED_FIELDS``."""
+    values = dict(values)
+    values['timestamp'] = values['timestamp'].astimezone(datetime.timezone.utc).isoformat()
+    return json.dumps([values[name] for name in HASHED_FIELDS], sort_keys=True,
+                      separators=(',', ':'), ensure_ascii=False, cls=DjangoJSONEncoder)
+
+
+def link(previous, values):
+    return _sha256(f'{previous}\n{content(values)}')
+
+
+def day_of(when):
+    return when.astimezone(datetime.timezone.utc).date()
+
+
+def day_range(day):
+    start = datetime.datetime.combine(day, datetime.time.min, tzinfo=datetime.timezone.utc)
+    return start, start + datetime.timedelta(days=1)
+
+
+def merkle_root(hashes):
+    """Merkle root of hex ``hashes``; an odd node is carried up unchanged."""
+    level = [bytes.fromhex(value) for value in hashes]
+    if not level:
+        return hashlib.sha256(b'').hexdigest()
+    while len(level) > 1:
+        paired = [hashlib.sha256(level[i] + level[i + 1]).digest() for i in range(0, len(level) - 1, 2)]
+        if len(level) % 2:
+            paired.append(level[-1])
+        level = paired
+    return level[0].hex()
+
+
+def chain_root(previous_root, checkpoint_day, row_count, root):
+    return _sha256(f'{previous_root}\n{checkpoint_day.isoformat()}\n{row_count}\n{root}')
+
+
+# Writing
+
+def chain_logs(logs):
+    """
+    Set ``chain_hash`` on unsaved ``AuditLog`` instances, in order.
+
+    Must run inside the transaction that inserts them: each day's checkpoint
+    stays locked until it commits.
+    """
+    from .models import AuditChainCheckpoint
+
+    by_day = {}
+    for log in logs:
+        by_day.setdefault(day_of(log.timestamp), []).append(log)
+
+    # Lock days in order so concurrent writers cannot deadlock
+    for day in sorted(by_day):
+        AuditChainCheckpoint.objects.get_or_create(day=day)
+        checkpoint = AuditChainCheckpoint.objects.select_for_update().get(day=day)
+        previous = checkpoint.last_hash or seed(day)
+        for log in by_day[day]:
+            previous = log.chain_hash = link(previous, {name: getattr(log, name) for name in HASHED_FIELDS})
+        checkpoint.last_hash = previous
+        checkpoint.row_count += len(by_day[day])
+        checkpoint.save(update_fields=['last_hash', 'row_count', 'updated_at'])
+        if checkpoint.sealed_at is not None:
+            # A late write reopens the day; it and later days are sealed again
+            AuditChainCheckpoint.objects.filter(day__gte=day, sealed_at__isnull=False).update(
+                merkle_root='', chain_root='', sealed_at=None)
+
+
+def _chained_rows(day):
+    from .models import AuditLog
+
+    start, end = day_range(day)
+    return AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end).exclude(chain_hash='').order_by('pk')
+
+
+def _chain_entries(day, with_values=False):
+    """
+    ``(log id, chain hash, values)`` for the day's chain in order: live logs
+    (``values`` a dict of ``HASHED_FIELDS`` when ``with_values``) merged with
+    tombstones of deleted ones (``values`` ``None``).
+    """
+    from .models import AuditChainTombstone
+
+    if with_values:
+        rows = (
+            (pk, stored, dict(zip(HASHED_FIELDS, values)))
+            for pk, stored, *values in _chained_rows(day).values_list(
+                'pk', 'chain_hash', *HASHED_FIELDS).iterator(chunk_size=5000)
+        )
+    else:
+        rows = ((pk, stored, None) for pk, stored in _chained_rows(day).values_list(
+            'pk', 'chain_hash').iterator(chunk_size=10000))
+    tombstones = ((log_id, stored, None) for log_id, stored in AuditChainTombstone.objects.filter(
+        day=day).order_by('log_id').values_list('log_id', 'chain_hash').iterator(chunk_size=10000))
+    return heapq.merge(rows, tombstones, key=lambda entry: entry[0])
+
+
+def seal_days(now=None):
+    """Seal every finished day in order; returns the number of days sealed."""
+    from .models import AuditChainCheckpoint
+
+    now = now or timezone.now()
+    last_day = day_of(now - SEAL_GRACE) - datetime.timedelta(days=1)
+    previous = AuditChainCheckpoint.objects.filter(
+        sealed_at__isnull=False, day__lt=AuditChainCheckpoint.objects.filter(
+            sealed_at__isnull=True).order_by('day').values('day')[:1],
+    ).order_by('-day').first()
+    sealed = 0
+    for checkpoint in AuditChainCheckpoint.objects.filter(sealed_at__isnull=True, day__lte=last_day).order_by('day'):
+        hashes = [stored for _pk, stored, _values in _chain_entries(checkpoint.day)]
+        if len(hashes) != checkpoint.row_count or (hashes and hashes[-1] != checkpoint.last_hash):
+            if checkpoint.pruned_at is None:
+                logger.error('Audit chain for %s does not match its checkpoint (%s rows, expected %s); not sealed',
+                             checkpoint.day, len(hashes), checkpoint.row_count)
+                break
+        checkpoint.merkle_root = merkle_root(hashes)
+        checkpoint.chain_root = chain_root(previous.chain_root if previous else '', checkpoint.day,
+                                           checkpoint.row_count, checkpoint.merkle_root)
+        checkpoint.sealed_at = now
+        checkpoint.save(update_fields=['merkle_root', 'chain_root', 'sealed_at', 'updated_at'])
+        previous = checkpoint
+        sealed += 1
+    return sealed
+
+
+def bury(rows, whole_days_before=None):
+    """
+    Keep tombstones for chained logs about to be deleted, from ``(id,
+    timestamp, chain_hash)`` rows. Logs of days before ``whole_days_before``
+    get none: those days are being deleted entirely. Returns the days the
+    rows belong to.
+    """
+    from .models import AuditChainTombstone
+
+    days = set()
+    tombstones = []
+    for pk, timestamp, chain_hash in rows:
+        day = day_of(timestamp)
+        days.add(day)
+        if chain_hash and (whole_days_before is None or day >= whole_days_before):
+            tombstones.append(AuditChainTombstone(day=day, log_id=pk, chain_hash=chain_hash))
+    AuditChainTombstone.objects.bulk_create(tombstones, batch_size=1000)
+    return days
+
+
+def mark_pruned(days, now=None):
+    """
+    Mark the checkpoints of ``days`` that have no logs left as pruned and
+    drop their tombstones. Days that still have logs stay verifiable.
+    Returns the number of days marked.
+    """
+    from .models import AuditChainCheckpoint, AuditChainTombstone, AuditLog
+
+    now = now or timezone.now()
+    marked = 0
+    for day in sorted(days):
+        start, end = day_range(day)
+        if AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end).exists():
+            continue
+        marked += AuditChainCheckpoint.objects.filter(day=day, pruned_at__isnull=True).update(pruned_at=now)
+        AuditChainTombstone.objects.filter(day=day).delete()
+    return marked
+
+
+# Verification
+
+def verify_day(day):
+    """
+    Replay one day's chain against its rows and checkpoint.
+
+    Returns ``{'day', 'rows', 'unchained', 'errors', 'pruned'}``; ``errors``
+    is empty when the day is intact.
+    """
+    from .models import AuditChainCheckpoint, AuditLog
+
+    if isinstance(day, str):
+        day = datetime.date.fromisoformat(day)
+    checkpoint = AuditChainCheckpoint.objects.filter(day=day).first()
+    start, end = day_range(day)
+    result = {'day': day.isoformat(), 'rows': 0, 'errors': [],
+              'pruned': bool(checkpoint and checkpoint.pruned_at)}
+    result['unchained'] = AuditLog.objects.filter(timestamp__gte=start, timestamp__lt=end, chain_hash='').count()
+    if checkpoint is None:
+        if result['unchained']:
+            result['errors'].append('no checkpoint for this day')
+        return result
+    if result['pruned']:
+        return result
+
+    errors = result['errors']
+    previous = seed(day)
+    hashes = []
+    for pk, stored, values in _chain_entries(day, with_values=True):
+        # A tombstone's own content is gone; the logs after it still check its hash
+        if values is not None and stored != link(previous, values):
+            errors.append(f'log {pk}: hash mismatch')
+        hashes.append(stored)
+        previous = stored
+    result['rows'] = len(hashes)
+
+    if len(hashes) != checkpoint.row_count:
+        errors.append(f'{len(hashes)} chained logs and tombstones, checkpoint records {checkpoint.row_count}')
+    if hashes and hashes[-1] != checkpoint.last_hash:
+        errors.append('last hash does not match the checkpoint')
+    if checkpoint.sealed_at and merkle_root(hashes) != checkpoint.merkle_root:
+        errors.append('Merkle root does not match the sealed checkpoint')
+    return result
+
+
+def verify_checkpoints():
+    """Check the ``chain_root`` links between sealed checkpoints; returns error strings."""
+    from .models import AuditChainCheckpoint
+
+    errors = []
+    previous_root = ''
+    for checkpoint in AuditChainCheckpoint.objects.filter(sealed_at__isnull=False).order_by('day').iterator():
+        expected = chain_root(previous_root, checkpoint.day, checkpoint.row_count, checkpoint.merkle_root)
+        if checkpoint.chain_root != expected:
+            errors.append(f'{checkpoint.day}: chain root does not follow the previous checkpoint')
+        previous_root = checkpoint.chain_root
+    return errors
+
+
+def _verify_in_worker(day):
+    try:
+        return verify_day(day)
+    finally:
+        connections.close_all()
+
+
+def verify_days(days, workers=1):
+    """Verify ``days``, in a pool of ``workers`` processes when more than one."""
+    days = [day.isoformat() if isinstance(day, datetime.date) else day for day in days]
+    if workers <= 1 or len(days) <= 1:
+        return [verify_day(day) for day in days]
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    # Worker processes must open their own database connections
+    connections.close_all()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return list(pool.map(_verify_in_worker, days))
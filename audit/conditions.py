@@ -0,0 +1,79 @@
+"""
+Condition matching for audit policies.
+
+Policy ``conditions`` map a key to the value it must have::
+
+    {"event_type": "login", "tags__contains": "failed", "severity__in": ["high", "critical"]}
+
+A key is a field name, optionally followed by ``__<operator>``; dotted names
+(``details.username``) look inside JSON values. A condition on a key the
+checked values do not have fails. ``compile_conditions`` turns the mapping
+into one function so a policy checked against many events is parsed once.
+"""
+import operator
+
+_MISSING = object()
+
+
+def _contains(actual, expected):
+    try:
+        return expected in actual
+    except TypeError:
+        return False
+
+
+def _compare(op):
+    def check(actual, expected):
+        try:
+            return op(actual, expected)
+        except TypeError:
+            return False
+    return check
+
+
+OPERATORS = {
+    'exact': operator.eq,
+    'ne': operator.ne,
+    'in': lambda actual, expected: actual in expected,
+    'contains': _contains,
+    'gt': _compare(operator.gt),
+    'gte': _compare(operator.ge),
+    'lt': _compare(operator.lt),
+    'lte': _compare(operator.le),
+}
+
+
+def _getter(path):
+    first, *rest = path.split('.')
+
+    def get(values):
+        value = values.get(first, _MISSING)
+        for part in rest:
+            if not isinstance(value, dict):
+                return _MISSING
+            value = value.get(part, _MISSING)
+        return value
+    return get
+
+
+def compile_conditions(conditions):
+    """
+    Return ``match(values) -> bool`` for a conditions mapping.
+
+    Raises ``ValueError`` for an unknown operator.
+    """
+    checks = []
+    for key, expected in (conditions or {}).items():
+        path, _, op_name = key.partition('__')
+        op = OPERATORS.get(op_name or 'exact')
+        if op is None:
+            raise ValueError(f'Unknown condition operator in {key!r}')
+        checks.append((_getter(path), op, expected))
+
+    def match(values):
+        for get, op, expected in checks:
+            actual = get(values)
+            if actual is _MISSING or not op(actual, expected):
+                return False
+        return True
+    return match
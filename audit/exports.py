@@ -0,0 +1,289 @@
+"""
+Audit log exports for Inspora platform.
+
+``run_export`` streams the ``AuditLog`` rows an ``AuditExport`` selects
+(its date range and ``filters``) straight into the output file: rows are
+read with ``iterator(chunk_size=AUDIT_EXPORT_CHUNK_SIZE)`` - a server-side
+cursor on PostgreSQL - as plain tuples, and each format writer emits a row
+as soon as it gets it, so memory does not grow with the size of the export.
+
+Formats:
+
+* ``csv``: one header line, then a line per log.
+* ``json``: JSON lines (``.jsonl``), one object per log.
+* ``xml``: ``<auditLogs><log>...</log></auditLogs>`` written with an
+  incremental SAX generator.
+* ``excel``: ``.xlsx`` through openpyxl's write-only mode, starting a new
+  sheet every ``XLSX_MAX_ROWS`` rows.
+
+Files are written under ``AUDIT_EXPORT_ROOT`` and moved into place when
+complete. ``pdf`` is not supported.
+
+Creating a pending ``AuditExport`` (from the admin, the shell or code)
+queues ``run_audit_export`` for it once the row is committed.
+"""
+import csv
+import datetime
+import json
+import os
+import re
+import time
+from xml.sax.saxutils import XMLGenerator
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models.signals import post_save
+from django.utils import timezone
+
+from .models import AuditExport, AuditLog
+
+# Output name, read path; the header row uses the names
+COLUMNS = [
+    ('id', 'id'),
+    ('timestamp', 'timestamp'),
+    ('event_type', 'event_type'),
+    ('severity', 'severity'),
+    ('description', 'description'),
+    ('user_id', 'user_id'),
+    ('username', 'user__username'),
+    ('session_id', 'session_id'),
+    ('ip_address', 'ip_address'),
+    ('user_agent', 'user_agent'),
+    ('app_label', 'content_type__app_label'),
+    ('model', 'content_type__model'),
+    ('object_id', 'object_id'),
+    ('source', 'source'),
+    ('tags', 'tags'),
+    ('details', 'details'),
+]
+
+# Filters an export may use, mapped to lookups; list values match any item
+FILTERS = {
+    'event_type': 'event_type',
+    'severity': 'severity',
+    'user': 'user_id',
+    'source': 'source',
+    'app_label': 'content_type__app_label',
+    'model': 'content_type__model',
+    'object_id': 'object_id',
+    'ip_address': 'ip_address',
+}
+
+# Rows per worksheet (Excel's limit is 1,048,576 including the header)
+XLSX_MAX_ROWS = 1_000_000
+
+# Check for cancellation every this many rows
+CANCEL_CHECK_INTERVAL = 50_000
+
+EXTENSIONS = {'csv': 'csv', 'json': 'jsonl', 'xml': 'xml', 'excel': 'xlsx'}
+
+# Control characters that are not allowed in XML 1.0 (and so in XLSX)
+ILLEGAL_XML_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+class ExportError(Exception):
+    pass
+
+
+class ExportCancelled(Exception):
+    pass
+
+
+def _json(value):
+    return json.dumps(value, cls=DjangoJSONEncoder, separators=(',', ':'))
+
+
+def _text(value):
+    if value is None:
+        return ''
+    if isinstance(value, (dict, list)):
+        return _json(value)
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+# Writers: write(row) per tuple of COLUMNS values, close() once at the end
+
+class CSVExportWriter:
+    def __init__(self, path):
+        self.file = open(path, 'w', newline='', encoding='utf-8')
+        self.writer = csv.writer(self.file)
+        self.writer.writerow([name for name, _path in COLUMNS])
+
+    def write(self, row):
+        self.writer.writerow([_text(value) for value in row])
+
+    def close(self):
+        self.file.close()
+
+
+class JSONLinesExportWriter:
+    names = [name for name, _path in COLUMNS]
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+
+    def write(self, row):
+        self.file.write(_json(dict(zip(self.names, row))))
+        self.file.write('\n')
+
+    def close(self):
+        self.file.close()
+
+
+class XMLExportWriter:
+    names = [name for name, _path in COLUMNS]
+
+    def __init__(self, path):
+        self.file = open(path, 'w', encoding='utf-8')
+        self.xml = XMLGenerator(self.file, encoding='utf-8', short_empty_elements=True)
+        self.xml.startDocument()
+        self.xml.startElement('auditLogs', {})
+
+    def write(self, row):
+        self.xml.startElement('log', {})
+        for name, value in zip(self.names, row):
+            self.xml.startElement(name, {})
+            if value is not None:
+                self.xml.characters(ILLEGAL_XML_CHARS.sub('', _text(value)))
+            self.xml.endElement(name)
+        self.xml.endElement('log')
+        self.file.write('\n')
+
+    def close(self):
+        self.xml.endElement('auditLogs')
+        self.xml.endDocument()
+        self.file.close()
+
+
+class ExcelExportWriter:
+    def __init__(self, path):
+        try:
+            from openpyxl import Workbook
+        except ImportError:
+            raise ExportError('Excel exports require openpyxl')
+        self.path = path
+        self.workbook = Workbook(write_only=True)
+        self.sheet = None
+        self.rows = 0
+
+    def _add_sheet(self):
+        self.sheet = self.workbook.create_sheet(f'Audit log {len(self.workbook.worksheets) + 1}')
+        self.sheet.append([name for name, _path in COLUMNS])
+        self.rows = 0
+
+    def _cell(self, value):
+        if value is None or isinstance(value, (int, float)):
+            return value
+        if hasattr(value, 'tzinfo') and value.tzinfo is not None:
+            # Excel has no time zones; write UTC
+            return timezone.make_naive(value, datetime.timezone.utc)
+        return ILLEGAL_XML_CHARS.sub('', _text(value))
+
+    def write(self, row):
+        if self.sheet is None or self.rows >= XLSX_MAX_ROWS:
+            self._add_sheet()
+        self.sheet.append([self._cell(value) for value in row])
+        self.rows += 1
+
+    def close(self):
+        if self.sheet is None:
+            self._add_sheet()
+        self.workbook.save(self.path)
+
+
+WRITERS = {
+    'csv': CSVExportWriter,
+    'json': JSONLinesExportWriter,
+    'xml': XMLExportWriter,
+    'excel': ExcelExportWriter,
+}
+
+
+def export_queryset(export):
+    """The logs ``export`` selects, oldest first."""
+    logs = AuditLog.objects.all()
+    if export.date_range_start:
+        logs = logs.filter(timestamp__gte=export.date_range_start)
+    if export.date_range_end:
+        logs = logs.filter(timestamp__lt=export.date_range_end)
+    for key, value in (export.filters or {}).items():
+        if key not in FILTERS:
+            raise ExportError(f'Unknown export filter: {key}')
+        if isinstance(value, list):
+            logs = logs.filter(**{f'{FILTERS[key]}__in': value})
+        else:
+            logs = logs.filter(**{FILTERS[key]: value})
+    return logs.order_by('timestamp', 'id')
+
+
+def export_path(export):
+    return os.path.join(settings.AUDIT_EXPORT_ROOT, f'audit-export-{export.pk}.{EXTENSIONS.get(export.export_format, export.export_format)}')
+
+
+def write_export(export, path, chunk_size=None):
+    """Stream the rows of ``export`` into ``path``; return the number of rows."""
+    writer_class = WRITERS.get(export.export_format)
+    if writer_class is None:
+        raise ExportError(f'{export.get_export_format_display()} exports are not supported')
+    rows = export_queryset(export).values_list(*[lookup for _name, lookup in COLUMNS])
+    chunk_size = chunk_size or settings.AUDIT_EXPORT_CHUNK_SIZE
+
+    writer = writer_class(path)
+    count = 0
+    try:
+        for row in rows.iterator(chunk_size=chunk_size):
+            writer.write(row)
+            count += 1
+            if count % CANCEL_CHECK_INTERVAL == 0 and AuditExport.objects.filter(
+                    pk=export.pk, status='cancelled').exists():
+                raise ExportCancelled
+    finally:
+        writer.close()
+    return count
+
+
+def run_export(export, chunk_size=None):
+    """
+    Produce the file for a pending ``export`` and record the outcome on it.
+
+    Returns the export, marked completed, failed or left cancelled.
+    """
+    started = time.perf_counter()
+    claimed = AuditExport.objects.filter(pk=export.pk, status='pending').update(status='processing')
+    if not claimed:
+        export.refresh_from_db()
+        return export
+    export.status = 'processing'
+
+    path = export_path(export)
+    partial = f'{path}.part'
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        count = write_export(export, partial, chunk_size)
+        os.replace(partial, path)
+    except ExportCancelled:
+        os.remove(partial)
+        export.refresh_from_db()
+        return export
+    except Exception as e:
+        if os.path.exists(partial):
+            os.remove(partial)
+        export.mark_failed(str(e) or type(e).__name__)
+        return export
+
+    export.file_size = os.path.getsize(path)
+    if not export.mark_completed(path, count, time.perf_counter() - started):
+        # Cancelled after the last check
+        os.remove(path)
+    return export
+
+
+def export_created(sender, instance, created, raw=False, **kwargs):
+    if created and not raw and instance.status == 'pending':
+        instance.queue()
+
+
+def connect_export_signals():
+    post_save.connect(export_created, sender=AuditExport, dispatch_uid='audit_export_created')
@@ -0,0 +1,22 @@
+"""
+Management command to write spilled audit events from Redis continuously.
+"""
+from django.core.management.base import BaseCommand
+
+from audit.capture import drain_stream
+
+
+class Command(BaseCommand):
+    help = 'Consume the Redis audit stream and write its events to the database'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--once', action='store_true', help='Drain what is queued and exit')
+
+    def handle(self, *args, **options):
+        if options['once']:
+            written = drain_stream(batch_size=options['batch_size'])
+            self.stdout.write(self.style.SUCCESS(f'Wrote {written} audit record(s)'))
+            return
+        while True:
+            drain_stream(batch_size=options['batch_size'], block=5000)
@@ -0,0 +1,87 @@
+"""
+Management command to benchmark streaming audit exports on synthetic logs.
+"""
+import datetime
+import os
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from audit.exports import write_export
+from audit.models import AuditExport, AuditLog
+
+
+class Command(BaseCommand):
+    help = ('Export synthetic audit logs in each format and report throughput and peak memory; '
+            'the logs are rolled back afterwards')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=200000)
+        parser.add_argument('--formats', default='csv,json,xml,excel')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        with transaction.atomic():
+            start_at = self._populate(rows)
+            # Peak memory for a tenth of the rows and for all of them: flat means streaming
+            sizes = [(rows // 10, start_at + datetime.timedelta(seconds=rows // 10)), (rows, None)]
+            user = User.objects.order_by('pk').first() or User.objects.create_user('audit-benchmark')
+            with tempfile.TemporaryDirectory() as directory:
+                for export_format in options['formats'].split(','):
+                    for count, end in sizes:
+                        self._run(export_format, count, end, user, directory)
+            transaction.set_rollback(True)
+
+    def _populate(self, rows):
+        start_at = timezone.now() - datetime.timedelta(seconds=rows)
+        batch = []
+        started = time.perf_counter()
+        for i in range(rows):
+            batch.append(AuditLog(
+                event_type='update', severity='low', description=f'Updated tasks.task #{i}',
+                details={'changed': ['title', 'status'], 'n': i}, source='benchmark',
+                ip_address='10.0.0.1', user_agent='Mozilla/5.0', tags=['benchmark'],
+                timestamp=start_at + datetime.timedelta(seconds=i),
+            ))
+            if len(batch) == 5000:
+                AuditLog.objects.bulk_create(batch)
+                batch = []
+        AuditLog.objects.bulk_create(batch)
+        self.stdout.write(f'inserted {rows} logs in {time.perf_counter() - started:.1f}s')
+        return start_at
+
+    def _run(self, export_format, count, end, user, directory):
+        export = AuditExport(name='benchmark', export_format=export_format, requested_by=user,
+                             date_range_end=end, filters={'source': 'benchmark'})
+        path = os.path.join(directory, f'benchmark.{export_format}')
+        baseline = _rss()
+        peak = [baseline]
+        done = threading.Event()
+
+        def sample():
+            while not done.wait(0.05):
+                peak[0] = max(peak[0], _rss())
+
+        sampler = threading.Thread(target=sample, daemon=True)
+        sampler.start()
+        started = time.perf_counter()
+        written = write_export(export, path)
+        elapsed = time.perf_counter() - started
+        done.set()
+        sampler.join()
+        self.stdout.write(
+            f'{export_format:>5}: {written:>9} rows in {elapsed:6.2f}s ({written / elapsed:>8.0f}/s), '
+            f'{os.path.getsize(path) / 2**20:7.1f} MiB file, '
+            f'memory growth {(peak[0] - baseline) / 2**20:6.1f} MiB'
+        )
+
+
+def _rss():
+    """Resident set size of this process in bytes (Linux)."""
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
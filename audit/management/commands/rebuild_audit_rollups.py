@@ -0,0 +1,21 @@
+"""
+Management command to recompute audit dashboard rollups from the log table.
+"""
+import datetime
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from audit.rollups import rebuild
+
+
+class Command(BaseCommand):
+    help = 'Recompute audit rollups for the last N days from AuditLog'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7)
+
+    def handle(self, *args, **options):
+        since = timezone.now() - datetime.timedelta(days=options['days'])
+        written = rebuild(since)
+        self.stdout.write(self.style.SUCCESS(f'Wrote {written} rollup rows'))
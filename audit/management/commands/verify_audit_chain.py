@@ -0,0 +1,56 @@
+"""
+Management command to verify the audit log hash chain.
+"""
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from audit.chain import verify_checkpoints, verify_days
+from audit.models import AuditChainCheckpoint
+
+
+class Command(BaseCommand):
+    help = 'Verify the audit log hash chain and its checkpoints, one process per day segment'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--day', type=datetime.date.fromisoformat, action='append',
+                            help='Verify this day (YYYY-MM-DD); may be repeated')
+        parser.add_argument('--since', type=datetime.date.fromisoformat)
+        parser.add_argument('--until', type=datetime.date.fromisoformat)
+        parser.add_argument('--workers', type=int, default=4)
+
+    def handle(self, *args, **options):
+        if options['day']:
+            days = sorted(set(options['day']))
+        else:
+            checkpoints = AuditChainCheckpoint.objects.order_by('day')
+            if options['since']:
+                checkpoints = checkpoints.filter(day__gte=options['since'])
+            if options['until']:
+                checkpoints = checkpoints.filter(day__lte=options['until'])
+            days = list(checkpoints.values_list('day', flat=True))
+
+        failures = 0
+        for result in verify_days(days, workers=options['workers']):
+            notes = []
+            if result['pruned']:
+                notes.append('pruned by retention, not verified')
+            if result['unchained']:
+                notes.append(f"{result['unchained']} logs written outside the chain")
+            note = f" ({'; '.join(notes)})" if notes else ''
+            if result['errors']:
+                failures += 1
+                self.stdout.write(self.style.ERROR(f"{result['day']}: FAILED{note}"))
+                for error in result['errors']:
+                    self.stdout.write(f'  {error}')
+            else:
+                self.stdout.write(f"{result['day']}: {result['rows']} logs OK{note}")
+
+        checkpoint_errors = verify_checkpoints()
+        for error in checkpoint_errors:
+            self.stdout.write(self.style.ERROR(error))
+
+        if failures or checkpoint_errors:
+            raise CommandError(f'Audit chain verification failed for {failures} days '
+                               f'and {len(checkpoint_errors)} checkpoints')
+        self.stdout.write(self.style.SUCCESS(f'Verified {len(days)} days'))
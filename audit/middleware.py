@@ -0,0 +1,22 @@
+"""
+Middleware for audit app.
+"""
+from .capture import audit_buffer, current_request
+
+
+class AuditMiddleware:
+    """
+    Attribute audit events to the current request, and write the events
+    queued while handling it once the response is ready.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        token = current_request.set(request)
+        try:
+            return self.get_response(request)
+        finally:
+            current_request.reset(token)
+            audit_buffer.flush()
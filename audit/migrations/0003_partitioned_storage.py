@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+from audit.partitions import PARTITIONED_TABLES, is_supported, partition_table
+
+
+def partition_audit_tables(apps, schema_editor):
+    # Monthly range partitions are PostgreSQL only; elsewhere retention deletes rows in chunks
+    if not is_supported(schema_editor.connection):
+        return
+    with schema_editor.connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            partition_table(cursor, table)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_event_timestamps'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditalert',
+            name='related_audit_logs',
+            field=models.ManyToManyField(blank=True, db_constraint=False, to='audit.auditlog'),
+        ),
+        migrations.AlterField(
+            model_name='auditevent',
+            name='audit_log',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='events', to='audit.auditlog'),
+        ),
+        migrations.RunPython(partition_audit_tables, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:57
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_partitioned_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='auditexport',
+            name='file_size',
+            field=models.PositiveBigIntegerField(blank=True, null=True),
+        ),
+    ]
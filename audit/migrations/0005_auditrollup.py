@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:08
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0004_export_file_size'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('resolution', models.CharField(choices=[('minute', 'Minute'), ('hour', 'Hour'), ('day', 'Day')], max_length=10)),
+                ('bucket', models.DateTimeField()),
+                ('event_type', models.CharField(max_length=20)),
+                ('severity', models.CharField(max_length=20)),
+                ('user_id', models.PositiveIntegerField(default=0)),
+                ('content_type_id', models.PositiveIntegerField(default=0)),
+                ('count', models.PositiveBigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Audit Rollup',
+                'verbose_name_plural': 'Audit Rollups',
+                'ordering': ['resolution', 'bucket'],
+                'constraints': [models.UniqueConstraint(fields=('resolution', 'bucket', 'event_type', 'severity', 'user_id', 'content_type_id'), name='audit_rollup_unique_bucket')],
+            },
+        ),
+    ]
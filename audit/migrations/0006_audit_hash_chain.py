@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0005_auditrollup'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainCheckpoint',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField(unique=True)),
+                ('row_count', models.PositiveBigIntegerField(default=0)),
+                ('last_hash', models.CharField(blank=True, max_length=64)),
+                ('merkle_root', models.CharField(blank=True, max_length=64)),
+                ('chain_root', models.CharField(blank=True, max_length=64)),
+                ('sealed_at', models.DateTimeField(blank=True, null=True)),
+                ('pruned_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'verbose_name': 'Audit Chain Checkpoint',
+                'verbose_name_plural': 'Audit Chain Checkpoints',
+                'ordering': ['day'],
+            },
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='chain_hash',
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+    ]
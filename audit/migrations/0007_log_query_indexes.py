@@ -0,0 +1,71 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:13
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_tags_index(apps, schema_editor):
+    # Containment lookups on the tags list need a GIN index; other backends scan within the other filters
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        'CREATE INDEX IF NOT EXISTS audit_log_tags_idx ON audit_auditlog USING gin (tags jsonb_path_ops)'
+    )
+
+
+def drop_tags_index(apps, schema_editor):
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS audit_log_tags_idx')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0006_audit_hash_chain'),
+        ('contenttypes', '0002_remove_content_type_name'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_audit_timesta_19e18a_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_audit_event_t_4496ba_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_audit_user_id_292c79_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='auditlog',
+            name='audit_audit_content_4c2ead_idx',
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['-timestamp', '-id'], name='audit_log_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['event_type', '-timestamp', '-id'], name='audit_log_event_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['severity', '-timestamp', '-id'], name='audit_log_severity_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['user', '-timestamp', '-id'], name='audit_log_user_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['content_type', 'object_id', '-timestamp', '-id'], name='audit_log_object_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='auditlog',
+            index=models.Index(fields=['ip_address', '-timestamp', '-id'], name='audit_log_ip_recent_idx'),
+        ),
+        migrations.RunPython(create_tags_index, drop_tags_index),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 06:35
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0007_log_query_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditChainTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('log_id', models.BigIntegerField()),
+                ('chain_hash', models.CharField(max_length=64)),
+            ],
+            options={
+                'verbose_name': 'Audit Chain Tombstone',
+                'verbose_name_plural': 'Audit Chain Tombstones',
+                'ordering': ['day', 'log_id'],
+                'indexes': [models.Index(fields=['day', 'log_id'], name='audit_audit_day_89642a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,68 @@
+"""
+Model mixins for audit logging.
+"""
+import copy
+
+
+class FieldTrackingMixin:
+    """
+    Remember the field values an instance was loaded with, so a save can tell
+    what changed without reading the row again.
+
+    The snapshot is taken in ``from_db`` (keyed by attname, deferred fields
+    left out) and refreshed after each save; ``post_save`` receivers still
+    see the values from before the save. Audit events and automation
+    ``field_changes`` are both computed from it.
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = {
+            name: _snapshot(value) for name, value in zip(field_names, values)
+        }
+        return instance
+
+    def get_loaded_values(self):
+        """Values as last loaded or saved, by attname (``None`` for new instances)."""
+        loaded = getattr(self, '_loaded_values', None)
+        return dict(loaded) if loaded is not None else None
+
+    def get_field_diff(self):
+        """``{attname: (old, new)}`` for loaded fields that differ from the snapshot."""
+        loaded = getattr(self, '_loaded_values', None) or {}
+        diff = {}
+        for name, old in loaded.items():
+            new = getattr(self, name)
+            if old != new:
+                diff[name] = (old, new)
+        return diff
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._refresh_loaded_values(kwargs.get('update_fields'))
+
+    def refresh_from_db(self, using=None, fields=None, **kwargs):
+        super().refresh_from_db(using=using, fields=fields, **kwargs)
+        self._refresh_loaded_values(fields)
+
+    def _refresh_loaded_values(self, fields=None):
+        if fields is None:
+            # A full save stores every concrete field; deferred ones stay untracked
+            names = [field.attname for field in self._meta.concrete_fields
+                     if field.attname in self.__dict__]
+        else:
+            by_name = {field.name: field.attname for field in self._meta.concrete_fields}
+            names = [by_name.get(name, name) for name in fields]
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            loaded = self._loaded_values = {}
+        for name in names:
+            loaded[name] = _snapshot(getattr(self, name))
+
+
+def _snapshot(value):
+    # JSON fields are often changed in place; keep a copy so the change shows
+    if isinstance(value, (dict, list)):
+        return copy.deepcopy(value)
+    return value
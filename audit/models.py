@@ -2,6 +2,7 @@
 Audit logging models for Inspora platform.
 """
 from django.db import models
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.contrib.auth import get_user_model
@@ -9,6 +10,8 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from simple_history.models import HistoricalRecords
 
+from inspora.generic import GenericRelatedQuerySet, get_related_object
+
 User = get_user_model()
 
 
@@ -47,32 +50,41 @@ class AuditLog(models.Model):
     details = models.JSONField(default=dict, blank=True)  # Additional event details
     
     # User and session information
-    user = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='audit_logs', null=True, blank=True)
+    # Neither FK is enforced or cascaded: the chain hash covers both ids, so they never change (see audit.chain)
+    user = models.ForeignKey(User, on_delete=models.DO_NOTHING, db_constraint=False, related_name='audit_logs', null=True, blank=True)
     session_id = models.CharField(max_length=100, blank=True)
     ip_address = models.GenericIPAddressField(null=True, blank=True)
     user_agent = models.TextField(blank=True)
     
     # Object information (generic foreign key)
-    content_type = models.ForeignKey(ContentType, on_delete=models.CASCADE, null=True, blank=True)
+    content_type = models.ForeignKey(ContentType, on_delete=models.DO_NOTHING, db_constraint=False, null=True, blank=True)
     object_id = models.PositiveIntegerField(null=True, blank=True)
     content_object = GenericForeignKey('content_type', 'object_id')
     
     # Timestamps
-    timestamp = models.DateTimeField(auto_now_add=True)
+    timestamp = models.DateTimeField(default=timezone.now)  # when the event happened, not when it was written
     
     # Metadata
     source = models.CharField(max_length=100, blank=True)  # Source of the event
     tags = models.JSONField(default=list, blank=True)  # Tags for categorization
     
+    # Tamper evidence: hash of this row's content and the previous row of its day (see audit.chain)
+    chain_hash = models.CharField(max_length=64, blank=True, editable=False)
+    
+    objects = GenericRelatedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-timestamp']
         verbose_name = _('Audit Log')
         verbose_name_plural = _('Audit Logs')
+        # Each filter of the log API followed by its (timestamp, id) keyset order
         indexes = [
-            models.Index(fields=['timestamp']),
-            models.Index(fields=['event_type']),
-            models.Index(fields=['user']),
-            models.Index(fields=['content_type', 'object_id']),
+            models.Index(fields=['-timestamp', '-id'], name='audit_log_recent_idx'),
+            models.Index(fields=['event_type', '-timestamp', '-id'], name='audit_log_event_recent_idx'),
+            models.Index(fields=['severity', '-timestamp', '-id'], name='audit_log_severity_recent_idx'),
+            models.Index(fields=['user', '-timestamp', '-id'], name='audit_log_user_recent_idx'),
+            models.Index(fields=['content_type', 'object_id', '-timestamp', '-id'], name='audit_log_object_recent_idx'),
+            models.Index(fields=['ip_address', '-timestamp', '-id'], name='audit_log_ip_recent_idx'),
         ]
     
     def __str__(self):
@@ -82,13 +94,8 @@ class AuditLog(models.Model):
         return reverse('audit:log_detail', kwargs={'pk': self.pk})
     
     def get_related_object(self):
-        """Get the related object if content_type and object_id are set."""
-        if self.content_type and self.object_id:
-            try:
-                return self.content_type.get_object_for_this_type(id=self.object_id)
-            except:
-                return None
-        return None
+        """Get the related object, or None if it is unset or no longer exists."""
+        return get_related_object(self)
 
 
 class AuditEvent(models.Model):
@@ -109,10 +116,12 @@ class AuditEvent(models.Model):
     metadata = models.JSONField(default=dict, blank=True)  # Event metadata
     
     # Relationships
-    audit_log = models.ForeignKey(AuditLog, on_delete=models.CASCADE, related_name='events')
+    # No database constraint: on PostgreSQL audit logs are partitioned by month,
+    # and a partitioned table's id alone is not unique (see audit.retention)
+    audit_log = models.ForeignKey(AuditLog, on_delete=models.CASCADE, related_name='events', db_constraint=False)
     
     # Timestamps
-    created_at = models.DateTimeField(auto_now_add=True)
+    created_at = models.DateTimeField(default=timezone.now)
     
     class Meta:
         ordering = ['-created_at']
@@ -187,15 +196,12 @@ class AuditPolicy(models.Model):
         if not self.conditions:
             return True
         
-        # Simple condition evaluation (can be enhanced)
-        for key, value in self.conditions.items():
-            if key in context:
-                if context[key] != value:
-                    return False
-            else:
-                return False
+        from .conditions import compile_conditions
         
-        return True
+        try:
+            return compile_conditions(self.conditions)(context)
+        except ValueError:
+            return False
 
 
 class AuditExport(models.Model):
@@ -231,7 +237,7 @@ class AuditExport(models.Model):
     
     # Export results
     file_path = models.CharField(max_length=500, blank=True)
-    file_size = models.PositiveIntegerField(null=True, blank=True)
+    file_size = models.PositiveBigIntegerField(null=True, blank=True)  # bytes
     record_count = models.PositiveIntegerField(null=True, blank=True)
     
     # Export metadata
@@ -256,22 +262,41 @@ class AuditExport(models.Model):
     def get_absolute_url(self):
         return reverse('audit:export_detail', kwargs={'pk': self.pk})
     
+    def queue(self):
+        """
+        Produce the export file in the background once this row is committed.
+
+        Called for every new pending export (see ``audit.exports``).
+        """
+        from django.db import transaction
+        from .tasks import run_audit_export
+        
+        transaction.on_commit(lambda: run_audit_export.delay(self.pk))
+    
     def mark_completed(self, file_path, record_count, processing_time):
-        """Mark export as completed."""
+        """
+        Mark a processing export as completed. An export cancelled meanwhile
+        stays cancelled; returns whether it was marked.
+        """
         from django.utils import timezone
         
-        self.status = 'completed'
-        self.file_path = file_path
-        self.record_count = record_count
-        self.processing_time = processing_time
-        self.completed_at = timezone.now()
-        self.save()
+        return self._finish(
+            status='completed', file_path=file_path, file_size=self.file_size, record_count=record_count,
+            processing_time=processing_time, completed_at=timezone.now(),
+        )
     
     def mark_failed(self, error_message):
-        """Mark export as failed."""
-        self.status = 'failed'
-        self.error_message = error_message
-        self.save()
+        """Mark a processing export as failed; returns whether it was marked."""
+        return self._finish(status='failed', error_message=error_message)
+    
+    def _finish(self, **fields):
+        updated = AuditExport.objects.filter(pk=self.pk, status='processing').update(**fields)
+        if updated:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        else:
+            self.refresh_from_db()
+        return bool(updated)
 
 
 class AuditAlert(models.Model):
@@ -307,7 +332,7 @@ class AuditAlert(models.Model):
     
     # Alert data
     alert_data = models.JSONField(default=dict, blank=True)
-    related_audit_logs = models.ManyToManyField(AuditLog, blank=True)
+    related_audit_logs = models.ManyToManyField(AuditLog, blank=True, db_constraint=False)
     
     # Alert metadata
     acknowledged_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='acknowledged_alerts', null=True, blank=True)
@@ -386,3 +411,92 @@ class AuditDashboard(models.Model):
     def get_widgets_count(self):
         """Get count of widgets in dashboard."""
         return len(self.config.get('widgets', []))
+
+
+class AuditRollup(models.Model):
+    """
+    Audit log counts per time bucket, maintained as logs are written.
+
+    Dashboards read these instead of grouping the raw log table. ``user_id``
+    and ``content_type_id`` are 0 for logs without a user or object, so the
+    unique constraint covers every bucket.
+    """
+    RESOLUTIONS = [
+        ('minute', 'Minute'),
+        ('hour', 'Hour'),
+        ('day', 'Day'),
+    ]
+    
+    resolution = models.CharField(max_length=10, choices=RESOLUTIONS)
+    bucket = models.DateTimeField()  # start of the minute/hour/day
+    event_type = models.CharField(max_length=20)
+    severity = models.CharField(max_length=20)
+    user_id = models.PositiveIntegerField(default=0)
+    content_type_id = models.PositiveIntegerField(default=0)
+    count = models.PositiveBigIntegerField(default=0)
+    
+    class Meta:
+        ordering = ['resolution', 'bucket']
+        verbose_name = _('Audit Rollup')
+        verbose_name_plural = _('Audit Rollups')
+        constraints = [
+            models.UniqueConstraint(
+                fields=['resolution', 'bucket', 'event_type', 'severity', 'user_id', 'content_type_id'],
+                name='audit_rollup_unique_bucket',
+            ),
+        ]
+    
+    def __str__(self):
+        return f"{self.event_type}/{self.severity} {self.bucket:%Y-%m-%d %H:%M} ({self.resolution}): {self.count}"
+
+
+class AuditChainCheckpoint(models.Model):
+    """
+    Head and Merkle checkpoint of one day's audit log hash chain.
+
+    ``last_hash`` and ``row_count`` follow the chain as logs are written;
+    once the day is over it is sealed with the Merkle root of its row hashes
+    and a ``chain_root`` that also covers the previous checkpoint.
+    """
+    day = models.DateField(unique=True)
+    row_count = models.PositiveBigIntegerField(default=0)
+    last_hash = models.CharField(max_length=64, blank=True)
+    
+    # Set when the day is sealed
+    merkle_root = models.CharField(max_length=64, blank=True)
+    chain_root = models.CharField(max_length=64, blank=True)
+    sealed_at = models.DateTimeField(null=True, blank=True)
+    
+    # Set when retention removed all of the day's logs; there is nothing left to replay
+    pruned_at = models.DateTimeField(null=True, blank=True)
+    
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['day']
+        verbose_name = _('Audit Chain Checkpoint')
+        verbose_name_plural = _('Audit Chain Checkpoints')
+    
+    def __str__(self):
+        return f"{self.day} ({self.row_count} logs{', sealed' if self.sealed_at else ''})"
+
+
+class AuditChainTombstone(models.Model):
+    """
+    Hash of a chained audit log deleted by retention while other logs of its
+    day remain, so the day's chain can still be replayed and checked.
+    """
+    day = models.DateField()
+    log_id = models.BigIntegerField()
+    chain_hash = models.CharField(max_length=64)
+    
+    class Meta:
+        ordering = ['day', 'log_id']
+        verbose_name = _('Audit Chain Tombstone')
+        verbose_name_plural = _('Audit Chain Tombstones')
+        indexes = [
+            models.Index(fields=['day', 'log_id']),
+        ]
+    
+    def __str__(self):
+        return f"{self.day} #{self.log_id}"
@@ -0,0 +1,185 @@
+"""
+Monthly partitions of the audit tables on PostgreSQL.
+
+``audit_auditlog`` (by ``timestamp``) and ``audit_auditevent`` (by
+``created_at``, which the audit writer sets to its log's timestamp) are
+range-partitioned by calendar month, one ``<table>_pYYYYMM`` partition per
+month plus a ``<table>_default`` partition for anything outside them.
+Queries that filter on those columns only scan the matching partitions, and
+retention drops whole partitions instead of deleting rows.
+
+On other backends the tables are ordinary tables and nothing here applies.
+"""
+import datetime
+import logging
+import re
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# table: partition key column
+PARTITIONED_TABLES = {
+    'audit_auditlog': 'timestamp',
+    'audit_auditevent': 'created_at',
+}
+
+PARTITION_RE = re.compile(r'_p(\d{4})(\d{2})$')
+
+
+def is_supported(conn=None):
+    return (conn or connection).vendor == 'postgresql'
+
+
+def month_start(value):
+    return datetime.datetime(value.year, value.month, 1, tzinfo=datetime.timezone.utc)
+
+
+def add_months(month, count):
+    index = month.year * 12 + month.month - 1 + count
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table, month):
+    return f'{table}_p{month:%Y%m}'
+
+
+def is_partitioned(cursor, table):
+    cursor.execute(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid "
+        "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+        [table],
+    )
+    return cursor.fetchone() is not None
+
+
+def list_partitions(cursor, table):
+    """``{month: partition name}`` for the monthly partitions of ``table``."""
+    cursor.execute(
+        "SELECT child.relname FROM pg_inherits i "
+        "JOIN pg_class parent ON parent.oid = i.inhparent "
+        "JOIN pg_class child ON child.oid = i.inhrelid "
+        "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+        [table],
+    )
+    partitions = {}
+    for (name,) in cursor.fetchall():
+        match = PARTITION_RE.search(name)
+        if match:
+            month = datetime.datetime(int(match[1]), int(match[2]), 1, tzinfo=datetime.timezone.utc)
+            partitions[month] = name
+    return partitions
+
+
+def create_partition(cursor, table, month):
+    qn = connection.ops.quote_name
+    cursor.execute(
+        f'CREATE TABLE IF NOT EXISTS {qn(partition_name(table, month))} '
+        f'PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)',
+        [month, add_months(month, 1)],
+    )
+    logger.info('Created partition %s', partition_name(table, month))
+
+
+def ensure_partitions(months_ahead=3, now=None):
+    """
+    Create the partitions for this month and the next ``months_ahead``.
+
+    They are created ahead of time because a partition cannot be added for a
+    range that already has rows in the default partition.
+    """
+    if not is_supported():
+        return 0
+    first = month_start(now or datetime.datetime.now(datetime.timezone.utc))
+    created = 0
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            existing = list_partitions(cursor, table)
+            for offset in range(months_ahead + 1):
+                month = add_months(first, offset)
+                if month not in existing:
+                    with transaction.atomic():
+                        create_partition(cursor, table, month)
+                    created += 1
+    return created
+
+
+def drop_partitions_before(cutoff):
+    """
+    Drop every monthly partition that ends at or before ``cutoff``.
+
+    Alert links to the dropped logs are removed first. Returns the names of
+    the dropped partitions.
+    """
+    if not is_supported():
+        return []
+    from .models import AuditAlert
+
+    through = AuditAlert.related_audit_logs.through._meta.db_table
+    qn = connection.ops.quote_name
+    dropped = []
+    with connection.cursor() as cursor:
+        for table in PARTITIONED_TABLES:
+            if not is_partitioned(cursor, table):
+                continue
+            for month, name in sorted(list_partitions(cursor, table).items()):
+                if add_months(month, 1) > cutoff:
+                    continue
+                with transaction.atomic():
+                    if table == 'audit_auditlog':
+                        cursor.execute(
+                            f'DELETE FROM {qn(through)} WHERE auditlog_id IN (SELECT id FROM {qn(name)})'
+                        )
+                    cursor.execute(f'ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}')
+                    cursor.execute(f'DROP TABLE {qn(name)}')
+                dropped.append(name)
+    if dropped:
+        logger.info('Dropped audit partitions %s', ', '.join(dropped))
+    return dropped
+
+
+def partition_table(cursor, table, months_ahead=3):
+    """
+    Convert ``table`` into a partitioned table with the same columns and indexes.
+
+    Existing rows are copied into monthly partitions. The primary key
+    becomes ``(id, <partition column>)``, because a unique constraint on a
+    partitioned table must include the partition key; ``id`` stays unique
+    since it comes from the table's identity sequence.
+    """
+    if is_partitioned(cursor, table):
+        return
+    column = PARTITIONED_TABLES[table]
+    qn = connection.ops.quote_name
+    old = f'{table}_unpartitioned'
+
+    cursor.execute('SELECT indexdef FROM pg_indexes WHERE tablename = %s AND indexname <> %s',
+                   [table, f'{table}_pkey'])
+    index_defs = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f'SELECT MIN({qn(column)}) FROM {qn(table)}')
+    earliest = cursor.fetchone()[0]
+
+    cursor.execute(f'ALTER TABLE {qn(table)} RENAME TO {qn(old)}')
+    cursor.execute(
+        f'CREATE TABLE {qn(table)} (LIKE {qn(old)} INCLUDING DEFAULTS INCLUDING IDENTITY) '
+        f'PARTITION BY RANGE ({qn(column)})'
+    )
+    cursor.execute(f'CREATE TABLE {qn(table + "_default")} PARTITION OF {qn(table)} DEFAULT')
+    now = month_start(datetime.datetime.now(datetime.timezone.utc))
+    month = month_start(earliest) if earliest else now
+    while month <= add_months(now, months_ahead):
+        create_partition(cursor, table, month)
+        month = add_months(month, 1)
+
+    cursor.execute(f'INSERT INTO {qn(table)} OVERRIDING SYSTEM VALUE SELECT * FROM {qn(old)}')
+    cursor.execute(
+        f"SELECT setval(pg_get_serial_sequence(%s, 'id'), COALESCE((SELECT MAX(id) FROM {qn(table)}), 0) + 1, false)",
+        [table],
+    )
+    cursor.execute(f'DROP TABLE {qn(old)}')
+    cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(table + "_pkey")} PRIMARY KEY (id, {qn(column)})')
+    # The index names were kept by the renamed table; recreate them on the new one
+    for definition in index_defs:
+        cursor.execute(re.sub(rf' ON (ONLY )?(\S+\.)?{re.escape(table)} ', f' ON {qn(table)} ', definition, count=1))
@@ -0,0 +1,138 @@
+"""
+Audit log retention for Inspora platform.
+
+Active ``AuditPolicy`` rows of type ``retention`` set how long audit logs
+are kept::
+
+    config = {"retention_days": 365}
+
+A policy without ``applies_to`` or ``conditions`` covers every log; the
+longest such policy wins. On PostgreSQL its cutoff is applied by dropping
+whole monthly partitions, so logs are kept until the end of the month in
+which they expire. Elsewhere, and for scoped policies (``applies_to`` an
+app label or ``app_label.model``, ``conditions`` on ``AuditLog`` fields such
+as ``event_type`` or ``severity``), logs are deleted in chunks by primary
+key so no statement holds locks for long. Deleted logs of days that keep
+other logs leave tombstones in the audit hash chain, so those days still
+verify; only days left without any logs are marked pruned.
+"""
+import datetime
+import logging
+
+from django.conf import settings
+from django.db import transaction
+from django.utils import timezone
+
+from . import chain, partitions, rollups
+from .models import AuditAlert, AuditChainCheckpoint, AuditEvent, AuditLog, AuditPolicy
+
+logger = logging.getLogger(__name__)
+
+# Condition operators (see audit.conditions) that translate to ORM lookups
+ORM_OPERATORS = {'', 'exact', 'ne', 'in', 'gt', 'gte', 'lt', 'lte'}
+
+
+def _retention_days(policy):
+    try:
+        days = int(policy.config.get('retention_days'))
+    except (TypeError, ValueError):
+        return None
+    return days if days > 0 else None
+
+
+def _policy_queryset(policy):
+    """Logs ``policy`` covers, or ``None`` when its scope cannot be expressed as a filter."""
+    logs = AuditLog.objects.all()
+    if policy.applies_to:
+        app_label, _, model = policy.applies_to.lower().partition('.')
+        logs = logs.filter(content_type__app_label=app_label)
+        if model:
+            logs = logs.filter(content_type__model=model)
+    fields = {field.name for field in AuditLog._meta.concrete_fields}
+    for key, value in (policy.conditions or {}).items():
+        name, _, op = key.partition('__')
+        if name not in fields or op not in ORM_OPERATORS:
+            # Deleting more than the policy asks for is worse than keeping logs
+            return None
+        if op == 'ne':
+            logs = logs.exclude(**{name: value})
+        else:
+            logs = logs.filter(**{f'{name}__{op or "exact"}': value})
+    return logs
+
+
+def delete_before(logs, cutoff, chunk_size=None, whole_days=False):
+    """
+    Delete ``logs`` older than ``cutoff`` with their events, ``chunk_size``
+    at a time, leaving chain tombstones for them. With ``whole_days`` every
+    log of the days before ``cutoff``'s is being deleted, so those get none.
+    Returns the number of logs deleted and the days they belonged to.
+    """
+    chunk_size = chunk_size or settings.AUDIT_RETENTION_CHUNK_SIZE
+    logs = logs.filter(timestamp__lt=cutoff)
+    links = AuditAlert.related_audit_logs.through.objects
+    whole_days_before = chain.day_of(cutoff) if whole_days else None
+    deleted = 0
+    days = set()
+    while True:
+        rows = list(logs.order_by('pk').values_list('pk', 'timestamp', 'chain_hash')[:chunk_size])
+        if not rows:
+            return deleted, days
+        pks = [row[0] for row in rows]
+        with transaction.atomic():
+            days |= chain.bury(rows, whole_days_before)
+            # Raw deletes: the collector would load every row to send delete signals
+            AuditEvent.objects.filter(audit_log_id__in=pks)._raw_delete(AuditEvent.objects.db)
+            links.filter(auditlog_id__in=pks)._raw_delete(AuditLog.objects.db)
+            deleted += AuditLog.objects.filter(pk__in=pks)._raw_delete(AuditLog.objects.db)
+
+
+def apply_retention(now=None):
+    """
+    Apply every active retention policy.
+
+    Returns ``{'partitions_dropped': [...], 'logs_deleted': n, 'rollups_deleted': n}``.
+    """
+    now = now or timezone.now()
+    result = {'partitions_dropped': [], 'logs_deleted': 0}
+    partitions.ensure_partitions(settings.AUDIT_PARTITION_MONTHS_AHEAD, now)
+
+    global_days = None
+    scoped = []
+    for policy in AuditPolicy.objects.filter(policy_type='retention', is_active=True):
+        days = _retention_days(policy)
+        if days is None:
+            continue
+        if policy.applies_to or policy.conditions:
+            scoped.append((policy, days))
+        else:
+            global_days = max(global_days or 0, days)
+
+    if global_days is not None:
+        cutoff = now - datetime.timedelta(days=global_days)
+        if partitions.is_supported():
+            result['partitions_dropped'] = partitions.drop_partitions_before(cutoff)
+            # Only days that ended up without logs are marked
+            days = AuditChainCheckpoint.objects.filter(
+                day__lt=chain.day_of(cutoff), pruned_at__isnull=True).values_list('day', flat=True)
+        else:
+            deleted, days = delete_before(AuditLog.objects.all(), cutoff, whole_days=True)
+            result['logs_deleted'] += deleted
+        chain.mark_pruned(days, now)
+
+    for policy, days in scoped:
+        logs = _policy_queryset(policy)
+        if logs is None:
+            logger.warning('Retention policy %s has conditions that are not AuditLog fields; skipped', policy.pk)
+            continue
+        cutoff = now - datetime.timedelta(days=days)
+        deleted, days = delete_before(logs, cutoff)
+        chain.mark_pruned(days, now)
+        result['logs_deleted'] += deleted
+
+    result['rollups_deleted'] = rollups.prune(now)
+
+    if result['partitions_dropped'] or result['logs_deleted']:
+        logger.info('Audit retention dropped %s partitions and deleted %s logs',
+                    len(result['partitions_dropped']), result['logs_deleted'])
+    return result
@@ -0,0 +1,281 @@
+"""
+Audit rollups for Inspora platform.
+
+Each batch the audit writer saves is counted into ``AuditRollup`` rows per
+minute, hour and day x event type x severity x user x content type with one
+upsert (``count = count + excluded.count``), so dashboards never group the
+raw ``AuditLog`` table. ``rebuild`` recomputes a range from the logs, e.g.
+after a backfill.
+
+Dashboard widgets (``AuditDashboard.config['widgets']``) only read
+rollups. Time series use the finest retained resolution that covers the
+range in at most ``max_data_points`` buckets, merging adjacent buckets when
+even days are too many; totals and breakdowns add up day buckets with hour
+and minute buckets at the edges of the range::
+
+    {"type": "timeseries", "title": "Failed logins", "range": 86400,
+     "filters": {"event_type": "login"}, "group_by": "severity"}
+
+``type`` is ``timeseries`` (counts per bucket, optionally one series per
+``group_by`` value), ``breakdown`` (totals per ``group_by`` value) or
+``total``; ``group_by`` is ``event_type``, ``severity``, ``user`` or
+``content_type``.
+"""
+import datetime
+import math
+from collections import Counter, defaultdict
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Q, Sum
+from django.db.models.functions import Coalesce, Trunc
+from django.utils import timezone
+
+from .models import AuditLog, AuditRollup
+
+RESOLUTION_SECONDS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+DIMENSIONS = ('event_type', 'severity', 'user_id', 'content_type_id')
+
+GROUP_BY = {
+    'event_type': 'event_type',
+    'severity': 'severity',
+    'user': 'user_id',
+    'content_type': 'content_type_id',
+}
+
+DEFAULT_WIDGET_RANGE = 24 * 60 * 60
+
+
+def truncate(when, resolution):
+    when = when.astimezone(datetime.timezone.utc)
+    if resolution == 'minute':
+        return when.replace(second=0, microsecond=0)
+    if resolution == 'hour':
+        return when.replace(minute=0, second=0, microsecond=0)
+    return when.replace(hour=0, minute=0, second=0, microsecond=0)
+
+
+# Maintenance
+
+def _upsert(counts):
+    """Add ``{(resolution, bucket, *DIMENSIONS): n}`` to the rollup table."""
+    table = AuditRollup._meta.db_table
+    columns = ['resolution', 'bucket', *DIMENSIONS, 'count']
+    qn = connection.ops.quote_name
+    rows = list(counts.items())
+    # Keep each statement under SQLite's default 999 parameters
+    step = 999 // len(columns)
+    with connection.cursor() as cursor:
+        for start in range(0, len(rows), step):
+            chunk = rows[start:start + step]
+            placeholders = ', '.join(['(' + ', '.join(['%s'] * len(columns)) + ')'] * len(chunk))
+            params = []
+            for (resolution, bucket, *dimensions), count in chunk:
+                params.extend([resolution, connection.ops.adapt_datetimefield_value(bucket), *dimensions, count])
+            if connection.vendor == 'mysql':
+                conflict = f'ON DUPLICATE KEY UPDATE {qn("count")} = {qn("count")} + VALUES({qn("count")})'
+            else:
+                conflict = (
+                    f'ON CONFLICT ({", ".join(qn(column) for column in columns[:-1])}) '
+                    f'DO UPDATE SET {qn("count")} = {qn(table)}.{qn("count")} + EXCLUDED.{qn("count")}'
+                )
+            cursor.execute(
+                f'INSERT INTO {qn(table)} ({", ".join(qn(column) for column in columns)}) '
+                f'VALUES {placeholders} {conflict}',
+                params,
+            )
+
+
+def add_logs(logs):
+    """Count saved ``AuditLog`` instances into the rollups."""
+    counts = Counter()
+    for log in logs:
+        dimensions = (log.event_type, log.severity, log.user_id or 0, log.content_type_id or 0)
+        for resolution in RESOLUTION_SECONDS:
+            counts[(resolution, truncate(log.timestamp, resolution), *dimensions)] += 1
+    if counts:
+        _upsert(counts)
+
+
+def rebuild(since, until=None):
+    """
+    Recompute the rollups of whole days from ``since`` to ``until`` from the
+    log table. Returns the number of rollup rows written.
+    """
+    since = truncate(since, 'day')
+    until = truncate(until or timezone.now(), 'day') + datetime.timedelta(days=1)
+    logs = AuditLog.objects.filter(timestamp__gte=since, timestamp__lt=until)
+    written = 0
+    with transaction.atomic():
+        AuditRollup.objects.filter(bucket__gte=since, bucket__lt=until).delete()
+        for resolution in RESOLUTION_SECONDS:
+            rows = (
+                logs.annotate(
+                    period=Trunc('timestamp', resolution, tzinfo=datetime.timezone.utc),
+                    user_key=Coalesce('user_id', 0),
+                    content_type_key=Coalesce('content_type_id', 0),
+                )
+                .values('period', 'event_type', 'severity', 'user_key', 'content_type_key')
+                .annotate(total=Count('id'))
+                .order_by()
+            )
+            batch = [
+                AuditRollup(
+                    resolution=resolution, bucket=row['period'], event_type=row['event_type'],
+                    severity=row['severity'], user_id=row['user_key'],
+                    content_type_id=row['content_type_key'], count=row['total'],
+                )
+                for row in rows.iterator()
+            ]
+            AuditRollup.objects.bulk_create(batch, batch_size=1000)
+            written += len(batch)
+    return written
+
+
+def prune(now=None):
+    """Delete fine-grained rollups older than ``AUDIT_ROLLUP_RETENTION_DAYS``."""
+    now = now or timezone.now()
+    deleted = 0
+    for resolution, days in settings.AUDIT_ROLLUP_RETENTION_DAYS.items():
+        cutoff = now - datetime.timedelta(days=days)
+        deleted += AuditRollup.objects.filter(resolution=resolution, bucket__lt=cutoff).delete()[0]
+    return deleted
+
+
+# Queries
+
+def choose_resolution(since, until, max_points, now=None):
+    """The finest retained resolution covering ``[since, until)`` in ``max_points`` buckets."""
+    now = now or timezone.now()
+    span = (until - since).total_seconds()
+    retention = settings.AUDIT_ROLLUP_RETENTION_DAYS
+    for resolution, seconds in RESOLUTION_SECONDS.items():
+        retained = resolution not in retention or since >= now - datetime.timedelta(days=retention[resolution])
+        if retained and span / seconds <= max_points:
+            return resolution
+    return 'day'
+
+
+def _downsample(points, since, until, resolution, max_points):
+    """Merge ``(bucket, count)`` points into at most ``max_points`` equal steps."""
+    seconds = RESOLUTION_SECONDS[resolution]
+    buckets = math.ceil((until - since).total_seconds() / seconds)
+    if buckets <= max_points:
+        return points
+    step = datetime.timedelta(seconds=math.ceil(buckets / max_points) * seconds)
+    merged = {}
+    for bucket, count in points:
+        start = since + (bucket - since) // step * step
+        merged[start] = merged.get(start, 0) + count
+    return sorted(merged.items())
+
+
+def _filtered(filters):
+    rollups = AuditRollup.objects.all()
+    for key, value in (filters or {}).items():
+        if key not in GROUP_BY:
+            raise ValueError(f'Unknown widget filter: {key}')
+        lookup = GROUP_BY[key]
+        if isinstance(value, list):
+            rollups = rollups.filter(**{f'{lookup}__in': value})
+        else:
+            rollups = rollups.filter(**{lookup: value})
+    return rollups
+
+
+def timeseries(since, until, max_points, filters=None, group_by=None, now=None):
+    """
+    ``{'resolution': ..., 'series': {name: [[bucket, count], ...]}}``; one
+    series named ``'total'`` unless ``group_by`` is given.
+    """
+    resolution = choose_resolution(since, until, max_points, now)
+    start = truncate(since, resolution)
+    rollups = _filtered(filters).filter(resolution=resolution, bucket__gte=start, bucket__lt=until)
+    dimension = GROUP_BY[group_by] if group_by else None
+    fields = ['bucket', dimension] if dimension else ['bucket']
+    series = defaultdict(list)
+    for row in rollups.values(*fields).annotate(total=Sum('count')).order_by(*fields):
+        name = str(row[dimension]) if dimension else 'total'
+        series[name].append((row['bucket'], row['total']))
+    return {
+        'resolution': resolution,
+        'series': {
+            name: [[bucket.isoformat(), count]
+                   for bucket, count in _downsample(points, start, until, resolution, max_points)]
+            for name, points in series.items()
+        },
+    }
+
+
+def _spans(since, until, resolutions=('day', 'hour', 'minute')):
+    """
+    Split ``[since, until)`` into ``(resolution, start, end)`` runs of whole
+    buckets, using days in the middle and finer buckets only at the edges.
+    """
+    resolution, *finer = resolutions
+    if not finer:
+        return [(resolution, truncate(since, resolution), until)] if since < until else []
+    start = truncate(since, resolution)
+    if start < since:
+        start += datetime.timedelta(seconds=RESOLUTION_SECONDS[resolution])
+    end = truncate(until, resolution)
+    if start >= end:
+        return _spans(since, until, finer)
+    return _spans(since, start, finer) + [(resolution, start, end)] + _spans(end, until, finer)
+
+
+def _in_range(rollups, since, until):
+    spans = Q()
+    for resolution, start, end in _spans(since, until):
+        spans |= Q(resolution=resolution, bucket__gte=start, bucket__lt=end)
+    return rollups.filter(spans)
+
+
+def breakdown(since, until, group_by, filters=None, limit=None):
+    """Totals per ``group_by`` value over the range, largest first."""
+    dimension = GROUP_BY[group_by]
+    rollups = _in_range(_filtered(filters), since, until)
+    rows = rollups.values(dimension).annotate(total=Sum('count')).order_by('-total')
+    if limit:
+        rows = rows[:limit]
+    return [[str(row[dimension]), row['total']] for row in rows]
+
+
+def total(since, until, filters=None):
+    rollups = _in_range(_filtered(filters), since, until)
+    return rollups.aggregate(total=Sum('count'))['total'] or 0
+
+
+def widget_data(widget, max_points, now=None):
+    now = now or timezone.now()
+    until = truncate(now, 'minute') + datetime.timedelta(minutes=1)
+    since = until - datetime.timedelta(seconds=int(widget.get('range', DEFAULT_WIDGET_RANGE)))
+    filters = widget.get('filters')
+    kind = widget.get('type', 'timeseries')
+    group_by = widget.get('group_by')
+    if group_by is not None and group_by not in GROUP_BY:
+        raise ValueError(f'Unknown widget group_by: {group_by}')
+
+    data = {'title': widget.get('title', ''), 'type': kind,
+            'since': since.isoformat(), 'until': until.isoformat()}
+    if kind == 'timeseries':
+        data.update(timeseries(since, until, max_points, filters, group_by, now))
+    elif kind == 'breakdown':
+        data['rows'] = breakdown(since, until, group_by or 'event_type', filters, limit=max_points)
+    elif kind == 'total':
+        data['total'] = total(since, until, filters)
+    else:
+        raise ValueError(f'Unknown widget type: {kind}')
+    return data
+
+
+def dashboard_data(dashboard, now=None):
+    """Data for every widget of ``dashboard``; a widget that cannot be answered reports its error."""
+    widgets = []
+    for widget in dashboard.config.get('widgets', []):
+        try:
+            widgets.append(widget_data(widget, dashboard.max_data_points, now))
+        except ValueError as e:
+            widgets.append({'title': widget.get('title', ''), 'error': str(e)})
+    return {'dashboard': dashboard.pk, 'refresh_interval': dashboard.refresh_interval, 'widgets': widgets}
@@ -0,0 +1,51 @@
+"""
+Serializers for audit app.
+"""
+from django.contrib.contenttypes.models import ContentType
+from rest_framework import serializers
+from inspora.generic import related_object_data
+from .models import AuditLog, AuditEvent
+
+
+class AuditEventSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AuditEvent
+        fields = [
+            'id', 'name', 'category', 'before_data', 'after_data', 'changed_fields',
+            'context', 'metadata', 'created_at',
+        ]
+        read_only_fields = fields
+
+
+class AuditLogSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True, default=None)
+    ip_address = serializers.CharField(read_only=True)
+    content_type = serializers.SerializerMethodField()
+    related_object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = AuditLog
+        fields = [
+            'id', 'timestamp', 'event_type', 'severity', 'description', 'details',
+            'user', 'username', 'session_id', 'ip_address', 'user_agent',
+            'content_type', 'object_id', 'related_object', 'source', 'tags',
+        ]
+        read_only_fields = fields
+
+    def get_content_type(self, log):
+        """``app_label.model``, from the content type cache."""
+        if not log.content_type_id:
+            return None
+        content_type = ContentType.objects.get_for_id(log.content_type_id)
+        return f'{content_type.app_label}.{content_type.model}'
+
+    def get_related_object(self, log):
+        return related_object_data(log)
+
+
+class AuditLogDetailSerializer(AuditLogSerializer):
+    events = AuditEventSerializer(many=True, read_only=True)
+
+    class Meta(AuditLogSerializer.Meta):
+        fields = AuditLogSerializer.Meta.fields + ['chain_hash', 'events']
+        read_only_fields = fields
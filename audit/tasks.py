@@ -0,0 +1,53 @@
+"""
+Celery tasks for audit logging.
+"""
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from .capture import drain_stream
+from .chain import seal_days
+from .exports import run_export
+from .models import AuditExport
+from .retention import apply_retention
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def drain_audit_stream(max_batches=20):
+    """
+    Write audit events spilled to Redis to the database: everything with
+    ``AUDIT_SPILL = 'redis'``, otherwise batches a direct write failed on.
+    """
+    try:
+        return drain_stream(max_batches=max_batches)
+    except RedisError as e:
+        if settings.AUDIT_SPILL == 'redis':
+            raise
+        logger.warning('Audit stream unavailable: %s', e)
+        return 0
+
+
+@shared_task
+def apply_audit_retention():
+    """Create upcoming audit partitions and remove logs past their retention."""
+    result = apply_retention()
+    return {**result, 'partitions_dropped': len(result['partitions_dropped'])}
+
+
+@shared_task
+def run_audit_export(export_id):
+    """Write the file for a pending audit export."""
+    export = AuditExport.objects.filter(pk=export_id).first()
+    if export is None:
+        return None
+    return run_export(export).status
+
+
+@shared_task
+def seal_audit_chain():
+    """Seal the hash chain of finished days with their Merkle checkpoints."""
+    return seal_days()
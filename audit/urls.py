@@ -5,4 +5,5 @@ app_name = 'audit'
 
 urlpatterns = [
     path('', views.audit_list, name='audit_list'),
+    path('dashboards/<int:pk>/widgets/', views.dashboard_widgets, name='dashboard_widgets'),
 ]
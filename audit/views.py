@@ -1,9 +1,29 @@
-from django.shortcuts import render
+from django.core.cache import cache
+from django.db.models import Q
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404, render
 from django.contrib.auth.decorators import login_required
 
+from .models import AuditDashboard
+from .rollups import dashboard_data
+
 @login_required
 def audit_list(request):
     """Display list of audit records"""
     return render(request, 'audit/audit_list.html', {
         'title': 'Audit Log'
     })
+
+
+@login_required
+def dashboard_widgets(request, pk):
+    """Widget data for a dashboard, computed from rollups and cached for its refresh interval"""
+    dashboard = get_object_or_404(
+        AuditDashboard.objects.filter(Q(is_public=True) | Q(created_by=request.user)), pk=pk
+    )
+    key = f'audit:dashboard:{dashboard.pk}:{dashboard.updated_at.timestamp()}'
+    data = cache.get(key)
+    if data is None:
+        data = dashboard_data(dashboard)
+        cache.set(key, data, dashboard.refresh_interval)
+    return JsonResponse(data)
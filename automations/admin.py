@@ -0,0 +1,106 @@
+"""
+Admin configuration for automations app.
+"""
+import copy
+
+from django.contrib import admin
+from . import counters
+from .models import (
+    Automation, AutomationRule, AutomationTrigger, AutomationAction,
+    AutomationExecution, AutomationExecutionLog,
+)
+
+
+class LiveCountersMixin:
+    """
+    Show execution counters including increments not yet flushed from Redis.
+
+    Pending increments are merged into list rows and into read-only display
+    fields only; the object the change form saves keeps its loaded values.
+    """
+    counter_kind = None
+
+    def get_changelist_instance(self, request):
+        changelist = super().get_changelist_instance(request)
+        changelist.result_list = counters.merge_pending(self.counter_kind, changelist.result_list)
+        return changelist
+
+    def _live(self, obj):
+        """A copy of ``obj`` with pending increments merged, for display."""
+        live = copy.copy(obj)
+        counters.merge_pending(self.counter_kind, [live])
+        return live
+
+    @admin.display(description='Count')
+    def live_count(self, obj):
+        return getattr(self._live(obj), counters.COUNTERS[self.counter_kind][1])
+
+    @admin.display(description='Last run')
+    def live_last(self, obj):
+        return getattr(self._live(obj), counters.COUNTERS[self.counter_kind][2]) or '-'
+
+
+class AutomationTriggerInline(admin.TabularInline):
+    model = AutomationTrigger
+    extra = 0
+    fields = ['name', 'trigger_type', 'model_name', 'field_name', 'field_value', 'schedule_cron', 'is_active']
+
+
+class AutomationActionInline(admin.TabularInline):
+    model = AutomationAction
+    extra = 0
+    fields = ['name', 'action_type', 'order', 'delay_seconds', 'retry_count', 'is_active']
+
+
+@admin.register(Automation)
+class AutomationAdmin(LiveCountersMixin, admin.ModelAdmin):
+    counter_kind = 'automation'
+    list_display = ['name', 'status', 'priority', 'is_active', 'created_by', 'team', 'execution_count', 'last_executed']
+    list_filter = ['status', 'priority', 'is_active', 'team']
+    search_fields = ['name', 'description', 'created_by__username']
+    readonly_fields = ['live_count', 'live_last', 'created_at', 'updated_at']
+    exclude = ['execution_count', 'last_executed']
+    inlines = [AutomationTriggerInline, AutomationActionInline]
+
+
+@admin.register(AutomationTrigger)
+class AutomationTriggerAdmin(LiveCountersMixin, admin.ModelAdmin):
+    counter_kind = 'trigger'
+    list_display = ['name', 'automation', 'trigger_type', 'model_name', 'is_active', 'trigger_count', 'last_triggered']
+    list_filter = ['trigger_type', 'is_active']
+    search_fields = ['name', 'automation__name', 'model_name']
+    readonly_fields = ['live_count', 'live_last', 'created_at', 'updated_at']
+    exclude = ['trigger_count', 'last_triggered']
+
+
+@admin.register(AutomationRule)
+class AutomationRuleAdmin(admin.ModelAdmin):
+    list_display = ['name', 'automation', 'rule_type', 'operator', 'is_active']
+    list_filter = ['rule_type', 'is_active']
+    search_fields = ['name', 'automation__name']
+
+
+@admin.register(AutomationAction)
+class AutomationActionAdmin(admin.ModelAdmin):
+    list_display = ['name', 'automation', 'action_type', 'order', 'is_active']
+    list_filter = ['action_type', 'is_active']
+    search_fields = ['name', 'automation__name']
+
+
+class AutomationExecutionLogInline(admin.TabularInline):
+    model = AutomationExecutionLog
+    extra = 0
+    can_delete = False
+    fields = ['sequence', 'timestamp', 'level', 'message', 'action']
+    readonly_fields = fields
+
+
+@admin.register(AutomationExecution)
+class AutomationExecutionAdmin(admin.ModelAdmin):
+    list_display = ['id', 'automation', 'status', 'started_at', 'execution_time', 'log_count']
+    list_filter = ['status', 'started_at']
+    search_fields = ['automation__name', 'error_message']
+    date_hierarchy = 'started_at'
+    readonly_fields = ['automation', 'triggered_by', 'status', 'started_at', 'completed_at', 'deadline', 'execution_time',
+                       'error_message', 'log_count', 'execution_log', 'trigger_context']
+    inlines = [AutomationExecutionLogInline]
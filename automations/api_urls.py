@@ -0,0 +1,30 @@
+"""
+API URLs for automations app.
+"""
+from django.urls import path, include
+from django.http import JsonResponse
+from rest_framework.routers import SimpleRouter
+from . import api_views
+
+router = SimpleRouter()
+router.register('automations', api_views.AutomationViewSet, basename='automation')
+router.register('executions', api_views.AutomationExecutionViewSet, basename='automation-execution')
+
+def api_status(request):
+    """Simple API status endpoint for testing."""
+    return JsonResponse({
+        'status': 'success',
+        'message': 'Automations API is working!',
+        'app': 'automations',
+        'endpoints': {
+            'automations': '/api/automations/automations/',
+            'executions': '/api/automations/executions/',
+            'execution_logs': '/api/automations/executions/<id>/logs/'
+        }
+    })
+
+urlpatterns = [
+    path('', api_status, name='api_status'),
+    path('status/', api_status, name='api_status_detail'),
+    path('', include(router.urls)),
+]
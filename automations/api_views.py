@@ -0,0 +1,106 @@
+"""
+API views for automations app.
+"""
+from datetime import timedelta
+
+from django.db.models import Q
+from django.utils import timezone
+from rest_framework import status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from accounts.permissions import get_permissions
+from . import counters
+from .models import Automation, AutomationExecution
+from .simulator import simulate
+from .serializers import AutomationSerializer, AutomationExecutionSerializer, AutomationExecutionLogSerializer
+
+
+LOG_PAGE_SIZE = 100
+LOG_MAX_PAGE_SIZE = 1000
+SIMULATION_MAX_DAYS = 90
+
+
+def _visible(request):
+    """Automations the requester created or whose team they belong to."""
+    teams = get_permissions(request).teams
+    return Q(created_by=request.user) | Q(team_id__in=list(teams))
+
+
+class AutomationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Automations with live execution counters (including unflushed increments).
+    """
+    serializer_class = AutomationSerializer
+    filterset_fields = ['status', 'priority', 'is_active', 'team']
+    search_fields = ['name', 'description']
+    ordering_fields = ['name', 'created_at', 'last_executed', 'execution_count']
+
+    def get_queryset(self):
+        return Automation.objects.filter(_visible(self.request))
+
+    def paginate_queryset(self, queryset):
+        page = super().paginate_queryset(queryset)
+        return None if page is None else counters.merge_pending('automation', page)
+
+    def get_object(self):
+        automation = super().get_object()
+        counters.merge_pending('automation', [automation])
+        return automation
+
+    @action(detail=True, methods=['get'])
+    def simulate(self, request, pk=None):
+        """Dry-run the automation over the last ``?days=`` (default 30) of changes."""
+        automation = self.get_object()
+        try:
+            days = int(request.query_params.get('days', 30))
+        except ValueError:
+            raise ValidationError({'days': 'Must be an integer.'})
+        if not 1 <= days <= SIMULATION_MAX_DAYS:
+            raise ValidationError({'days': f'Must be between 1 and {SIMULATION_MAX_DAYS}.'})
+        report = simulate(automation, timezone.now() - timedelta(days=days))
+        return Response(report.to_dict())
+
+
+class AutomationExecutionViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Executions of automations the requester created or whose team they belong to.
+    """
+    serializer_class = AutomationExecutionSerializer
+    filterset_fields = ['status', 'automation']
+    ordering_fields = ['started_at', 'execution_time']
+
+    def get_queryset(self):
+        visible = Automation.objects.filter(_visible(self.request))
+        return AutomationExecution.objects.filter(automation__in=visible).select_related('automation')
+
+    @action(detail=True, methods=['post'])
+    def cancel(self, request, pk=None):
+        """Stop a pending or running execution before its next action."""
+        execution = self.get_object()
+        if not execution.cancel(reason=f'Cancelled by {request.user.username}'):
+            return Response({'detail': f'Execution is already {execution.status}.'}, status=status.HTTP_409_CONFLICT)
+        return Response(self.get_serializer(execution).data)
+
+    @action(detail=True, methods=['get'])
+    def logs(self, request, pk=None):
+        """
+        Page through the execution's log in order.
+
+        ``?after=<sequence>`` continues from the ``next_after`` cursor of the
+        previous page; ``?limit=`` caps the page size.
+        """
+        execution = self.get_object()
+        try:
+            limit = min(int(request.query_params.get('limit', LOG_PAGE_SIZE)), LOG_MAX_PAGE_SIZE)
+            after = int(request.query_params.get('after', 0))
+        except ValueError:
+            raise ValidationError({'detail': 'limit and after must be integers.'})
+        if limit < 1:
+            raise ValidationError({'limit': 'Must be a positive number.'})
+
+        entries = list(execution.logs.filter(sequence__gt=after).order_by('sequence')[:limit])
+        return Response({
+            'results': AutomationExecutionLogSerializer(entries, many=True).data,
+            'next_after': entries[-1].sequence if len(entries) == limit else None,
+        })
@@ -5,3 +5,7 @@ class AutomationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'automations'
     verbose_name = 'Workflow Automation'
+    
+    def ready(self):
+        from .engine import connect_automation_signals
+        connect_automation_signals()
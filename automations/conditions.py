@@ -0,0 +1,305 @@
+"""
+Compiled condition evaluation for automation rules.
+
+A rule's ``conditions`` JSON is compiled once into a tree of closures and
+cached per rule until its ``updated_at`` changes. Conditions are either
+leaves::
+
+    {"field": "due_date", "operator": "less_than", "value": "2024-06-01", "type": "date"}
+
+or nested groups::
+
+    {"operator": "OR", "conditions": [...]}
+
+``field`` may be a dotted path into the context (``field_changes.status.new``).
+``type`` is optional; without it the comparison type is inferred from the
+literal ``value`` (ISO dates and datetimes, numbers and numeric strings,
+booleans, otherwise plain values).
+Groups short-circuit, and a condition on a field missing from the context
+is false.
+"""
+import datetime
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.utils.dateparse import parse_date, parse_datetime
+
+_MISSING = object()
+
+NUMERIC = re.compile(r'[-+]?(\d+\.?\d*|\.\d+)')
+
+
+class ConditionError(ValueError):
+    """Raised for conditions that cannot be compiled."""
+
+
+# Type coercion
+
+def _to_date(value):
+    if isinstance(value, datetime.datetime):
+        return value.date()
+    if isinstance(value, datetime.date):
+        return value
+    parsed = parse_date(str(value)) if value is not None else None
+    if parsed is None and value is not None:
+        parsed_datetime = parse_datetime(str(value))
+        parsed = parsed_datetime.date() if parsed_datetime else None
+    if parsed is None:
+        raise ValueError(f'Not a date: {value!r}')
+    return parsed
+
+
+def _to_datetime(value):
+    if isinstance(value, datetime.datetime):
+        return value
+    parsed = parse_datetime(str(value)) if value is not None else None
+    if parsed is None:
+        raise ValueError(f'Not a datetime: {value!r}')
+    return parsed
+
+
+def _to_decimal(value):
+    if isinstance(value, bool) or value is None:
+        raise ValueError(f'Not a number: {value!r}')
+    try:
+        return Decimal(str(value))
+    except InvalidOperation:
+        raise ValueError(f'Not a number: {value!r}')
+
+
+def _to_bool(value):
+    if isinstance(value, str):
+        return value.strip().lower() in ('1', 'true', 'yes', 'on')
+    return bool(value)
+
+
+COERCERS = {
+    'date': _to_date,
+    'datetime': _to_datetime,
+    'decimal': _to_decimal,
+    'number': _to_decimal,
+    'string': str,
+    'bool': _to_bool,
+}
+
+
+def _infer_type(value):
+    if isinstance(value, bool):
+        return 'bool'
+    if isinstance(value, (int, float, Decimal)):
+        return 'decimal'
+    if isinstance(value, str):
+        if NUMERIC.fullmatch(value.strip()):
+            return 'decimal'
+        try:
+            if parse_date(value):
+                return 'date'
+            if parse_datetime(value):
+                return 'datetime'
+        except ValueError:
+            pass
+    return None
+
+
+# Field access
+
+def _getter(field):
+    if not field:
+        raise ConditionError('Condition is missing "field".')
+    parts = field.split('.')
+    if len(parts) == 1:
+        return lambda context: context.get(field, _MISSING)
+
+    def get(context):
+        value = context
+        for part in parts:
+            if not isinstance(value, dict) or part not in value:
+                return _MISSING
+            value = value[part]
+        return value
+    return get
+
+
+# Operators: (context_value, literal) -> bool, literal already coerced
+
+def _contains(actual, expected):
+    if isinstance(actual, (list, tuple, dict)):
+        return expected in actual
+    return str(expected) in str(actual)
+
+
+OPERATORS = {
+    'equals': lambda actual, expected: actual == expected,
+    'not_equals': lambda actual, expected: actual != expected,
+    'greater_than': lambda actual, expected: actual > expected,
+    'less_than': lambda actual, expected: actual < expected,
+    'greater_or_equal': lambda actual, expected: actual >= expected,
+    'less_or_equal': lambda actual, expected: actual <= expected,
+    'contains': _contains,
+    'not_contains': lambda actual, expected: not _contains(actual, expected),
+    'in': lambda actual, expected: actual in expected,
+    'not_in': lambda actual, expected: actual not in expected,
+}
+
+UNARY_OPERATORS = {
+    'is_empty': lambda actual: not actual,
+    'is_not_empty': bool,
+}
+
+# Operators that compare the raw value as text rather than a typed value
+TEXT_OPERATORS = {'contains', 'not_contains'}
+
+
+def _compile_leaf(condition):
+    get = _getter(condition.get('field'))
+    operator = condition.get('operator')
+
+    if operator in UNARY_OPERATORS:
+        test = UNARY_OPERATORS[operator]
+
+        def unary(context):
+            actual = get(context)
+            return actual is not _MISSING and test(actual)
+        return unary
+
+    if operator not in OPERATORS:
+        # Unknown operators never match
+        return lambda context: False
+
+    compare = OPERATORS[operator]
+    expected = condition.get('value')
+    value_type = condition.get('type') or (None if operator in TEXT_OPERATORS else _infer_type(
+        expected[0] if operator in ('in', 'not_in') and isinstance(expected, list) and expected else expected
+    ))
+    coerce = COERCERS.get(value_type)
+    if value_type and coerce is None:
+        raise ConditionError(f'Unknown condition type {value_type!r}.')
+
+    if coerce is not None:
+        try:
+            if operator in ('in', 'not_in'):
+                expected = [coerce(item) for item in expected]
+            else:
+                expected = coerce(expected)
+        except (TypeError, ValueError) as e:
+            raise ConditionError(str(e))
+
+    def leaf(context):
+        actual = get(context)
+        if actual is _MISSING:
+            return False
+        try:
+            if coerce is not None:
+                actual = coerce(actual)
+            return compare(actual, expected)
+        except (TypeError, ValueError):
+            # Values of the wrong type simply do not match
+            return False
+    return leaf
+
+
+def _compile_group(conditions, operator):
+    predicates = [_compile_node(condition) for condition in conditions]
+    operator = (operator or 'AND').upper()
+    if operator not in ('AND', 'OR'):
+        raise ConditionError(f'Unknown group operator {operator!r}.')
+    if not predicates:
+        return lambda context: True
+    if len(predicates) == 1:
+        return predicates[0]
+    if operator == 'AND':
+        return lambda context: all(predicate(context) for predicate in predicates)
+    return lambda context: any(predicate(context) for predicate in predicates)
+
+
+def _compile_node(condition):
+    if 'conditions' in condition:
+        return _compile_group(condition['conditions'], condition.get('operator'))
+    return _compile_leaf(condition)
+
+
+def compile_conditions(conditions, operator='AND'):
+    """Compile a conditions list into ``predicate(context) -> bool``."""
+    return _compile_group(conditions or [], operator)
+
+
+# Batch evaluation
+
+def filter_batch(predicate, contexts, indices=None):
+    """Indices of ``contexts`` (restricted to ``indices``) that satisfy ``predicate``."""
+    indices = range(len(contexts)) if indices is None else indices
+    return [index for index in indices if predicate(contexts[index])]
+
+
+def _compile_batch_node(condition):
+    if 'conditions' not in condition:
+        predicate = _compile_leaf(condition)
+        return lambda contexts, indices: filter_batch(predicate, contexts, indices)
+    return _compile_batch_group(condition['conditions'], condition.get('operator'))
+
+
+def _compile_batch_group(conditions, operator):
+    """
+    Batch form of a group: each child narrows the surviving indices.
+
+    AND passes only the survivors of one child to the next; OR only
+    evaluates a child on the contexts no earlier child has matched.
+    """
+    children = [_compile_batch_node(condition) for condition in conditions]
+    operator = (operator or 'AND').upper()
+
+    def and_group(contexts, indices):
+        for child in children:
+            if not indices:
+                break
+            indices = child(contexts, indices)
+        return indices
+
+    def or_group(contexts, indices):
+        if not children:
+            return indices
+        matched = set()
+        remaining = indices
+        for child in children:
+            if not remaining:
+                break
+            hits = set(child(contexts, remaining))
+            matched |= hits
+            remaining = [index for index in remaining if index not in hits]
+        return [index for index in indices if index in matched]
+
+    return and_group if operator == 'AND' else or_group
+
+
+class CompiledRule:
+    """A rule's conditions compiled for single and batch evaluation."""
+
+    def __init__(self, conditions, operator='AND'):
+        self.predicate = compile_conditions(conditions, operator)
+        self._batch = _compile_batch_group(conditions or [], operator)
+
+    def __call__(self, context):
+        return self.predicate(context)
+
+    def matching_indices(self, contexts):
+        return self._batch(contexts, list(range(len(contexts))))
+
+    def evaluate_batch(self, contexts):
+        matched = set(self.matching_indices(contexts))
+        return [index in matched for index in range(len(contexts))]
+
+
+# Compiled rules by rule id: {rule_id: (updated_at, CompiledRule)}
+_compiled_rules = {}
+
+
+def get_compiled_rule(rule):
+    """Return ``rule`` compiled, recompiling only when its ``updated_at`` changed."""
+    if rule.pk is None:
+        return CompiledRule(rule.conditions, rule.operator)
+    cached = _compiled_rules.get(rule.pk)
+    if cached is not None and cached[0] == rule.updated_at:
+        return cached[1]
+    compiled = CompiledRule(rule.conditions, rule.operator)
+    _compiled_rules[rule.pk] = (rule.updated_at, compiled)
+    return compiled
@@ -0,0 +1,171 @@
+"""
+Buffered execution counters for automations.
+
+Every run increments ``Automation.execution_count`` and its trigger's
+``trigger_count``. Instead of updating those rows on each run (which
+serialises concurrent runs on the row lock), increments are added to Redis
+hashes and ``flush_counters`` periodically applies them to the database in
+one ``UPDATE`` per model. Until then, ``merge_pending`` adds the buffered
+values to loaded instances for display. Saving a loaded automation or
+trigger never writes the counter fields, so stale in-memory counts cannot
+overwrite flushed ones.
+
+While Redis is unavailable, increments are applied directly with ``F()``.
+"""
+import datetime
+import logging
+
+from django.db import transaction
+from django.db.models import Case, DateTimeField, F, PositiveIntegerField, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# kind: (model name, count field, timestamp field)
+COUNTERS = {
+    'automation': ('Automation', 'execution_count', 'last_executed'),
+    'trigger': ('AutomationTrigger', 'trigger_count', 'last_triggered'),
+}
+
+COUNT_KEY = 'automations:counters:{kind}'
+LAST_KEY = 'automations:counters:{kind}:last'
+
+
+def _model(kind):
+    from django.apps import apps
+
+    return apps.get_model('automations', COUNTERS[kind][0])
+
+
+def _increment_row(kind, pk, now, amount=1):
+    _name, count_field, time_field = COUNTERS[kind]
+    _model(kind).objects.filter(pk=pk).update(
+        **{count_field: F(count_field) + amount, time_field: now}
+    )
+
+
+def savable_fields(instance, kind):
+    """Fields a full save of an existing row may write: everything but the flushed counters."""
+    _name, count_field, time_field = COUNTERS[kind]
+    return [
+        field.name for field in instance._meta.concrete_fields
+        if not field.primary_key and field.name not in (count_field, time_field)
+    ]
+
+
+def increment(kind, pk, now=None):
+    """Count one run of automation or trigger ``pk``."""
+    now = now or timezone.now()
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hincrby(COUNT_KEY.format(kind=kind), pk, 1)
+        pipe.hset(LAST_KEY.format(kind=kind), pk, now.timestamp())
+        pipe.execute()
+    except RedisError:
+        _increment_row(kind, pk, now)
+
+
+def _take(kind):
+    """Atomically read and clear the buffer of ``kind``."""
+    count_key, last_key = COUNT_KEY.format(kind=kind), LAST_KEY.format(kind=kind)
+    pipe = get_redis().pipeline(transaction=True)
+    pipe.hgetall(count_key)
+    pipe.hgetall(last_key)
+    pipe.delete(count_key, last_key)
+    counts, last, _deleted = pipe.execute()
+    counts = {int(pk): int(count) for pk, count in counts.items()}
+    last = {int(pk): _from_timestamp(ts) for pk, ts in last.items()}
+    return counts, last
+
+
+def _restore(kind, counts, last):
+    """Put taken increments back after a failed flush."""
+    pipe = get_redis().pipeline(transaction=False)
+    for pk, count in counts.items():
+        pipe.hincrby(COUNT_KEY.format(kind=kind), pk, count)
+    for pk, when in last.items():
+        pipe.hset(LAST_KEY.format(kind=kind), pk, when.timestamp())
+    pipe.execute()
+
+
+def _from_timestamp(value):
+    return datetime.datetime.fromtimestamp(float(value), tz=datetime.timezone.utc)
+
+
+def _apply(kind, counts, last):
+    """Apply increments for many rows with one ``UPDATE ... CASE``."""
+    _name, count_field, time_field = COUNTERS[kind]
+    increments = Case(
+        *[When(pk=pk, then=Value(count)) for pk, count in counts.items()],
+        default=Value(0),
+        output_field=PositiveIntegerField(),
+    )
+    latest = Case(
+        *[When(pk=pk, then=Value(when)) for pk, when in last.items()],
+        default=F(time_field),
+        output_field=DateTimeField(),
+    )
+    # Never move the timestamp backwards (rows may also be updated directly)
+    latest = Greatest(Coalesce(F(time_field), latest), latest)
+    return _model(kind).objects.filter(pk__in=set(counts) | set(last)).update(
+        **{count_field: F(count_field) + increments, time_field: latest}
+    )
+
+
+def flush_counters():
+    """Write buffered increments to the database; return the number of rows updated."""
+    updated = 0
+    for kind in COUNTERS:
+        try:
+            counts, last = _take(kind)
+        except RedisError as e:
+            logger.warning('Could not read %s counters: %s', kind, e)
+            continue
+        if not counts and not last:
+            continue
+        try:
+            with transaction.atomic():
+                updated += _apply(kind, counts, last)
+        except Exception:
+            _restore(kind, counts, last)
+            raise
+    return updated
+
+
+def pending(kind, pks):
+    """Buffered ``{pk: (count, last timestamp)}`` for ``pks`` not yet flushed."""
+    pks = list(pks)
+    if not pks:
+        return {}
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        pipe.hmget(COUNT_KEY.format(kind=kind), pks)
+        pipe.hmget(LAST_KEY.format(kind=kind), pks)
+        counts, last = pipe.execute()
+    except RedisError:
+        return {}
+    return {
+        pk: (int(count or 0), _from_timestamp(ts) if ts else None)
+        for pk, count, ts in zip(pks, counts, last)
+        if count or ts
+    }
+
+
+def merge_pending(kind, instances):
+    """Add buffered increments to loaded automations or triggers, in place."""
+    instances = list(instances)
+    _name, count_field, time_field = COUNTERS[kind]
+    buffered = pending(kind, [instance.pk for instance in instances])
+    for instance in instances:
+        if instance.pk not in buffered:
+            continue
+        count, when = buffered[instance.pk]
+        setattr(instance, count_field, getattr(instance, count_field) + count)
+        current = getattr(instance, time_field)
+        if when and (current is None or when > current):
+            setattr(instance, time_field, when)
+    return instances
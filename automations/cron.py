@@ -0,0 +1,185 @@
+"""
+Cron expressions for scheduled automation triggers.
+
+Supports the five standard fields (minute, hour, day of month, month, day of
+week) with ``*``, lists, ranges, steps and month/day names, plus the
+``@hourly``, ``@daily``, ``@weekly``, ``@monthly`` and ``@yearly`` macros.
+As in Vixie cron, when both day fields are restricted a day matches if
+either does.
+
+Schedules are evaluated in the trigger's own time zone:
+
+* wall-clock times skipped by a DST jump fire at the end of the gap;
+* wall-clock times repeated when clocks go back fire once, on the first pass.
+"""
+import datetime
+from functools import lru_cache
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+MACROS = {
+    '@yearly': '0 0 1 1 *',
+    '@annually': '0 0 1 1 *',
+    '@monthly': '0 0 1 * *',
+    '@weekly': '0 0 * * 0',
+    '@daily': '0 0 * * *',
+    '@midnight': '0 0 * * *',
+    '@hourly': '0 * * * *',
+}
+
+MONTH_NAMES = {name: index for index, name in enumerate(
+    ['jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'], start=1
+)}
+DAY_NAMES = {name: index for index, name in enumerate(['sun', 'mon', 'tue', 'wed', 'thu', 'fri', 'sat'])}
+
+# Give up looking for a match after this many years (e.g. "0 0 30 2 *")
+MAX_YEARS_AHEAD = 5
+
+ONE_MINUTE = datetime.timedelta(minutes=1)
+
+
+class CronError(ValueError):
+    """Raised for invalid cron expressions or time zones."""
+
+
+def _parse_value(token, names):
+    token = token.lower()
+    if token in names:
+        return names[token]
+    if not token.isdigit():
+        raise CronError(f'Invalid cron value {token!r}')
+    return int(token)
+
+
+def _parse_field(field, low, high, names=None):
+    names = names or {}
+    values = set()
+    for part in field.split(','):
+        step = 1
+        if '/' in part:
+            part, step_text = part.split('/', 1)
+            if not step_text.isdigit() or int(step_text) == 0:
+                raise CronError(f'Invalid cron step {step_text!r}')
+            step = int(step_text)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start_text, end_text = part.split('-', 1)
+            start, end = _parse_value(start_text, names), _parse_value(end_text, names)
+        else:
+            start = _parse_value(part, names)
+            end = high if step > 1 else start
+        if not low <= start <= end <= high:
+            raise CronError(f'Cron field {field!r} out of range {low}-{high}')
+        values.update(range(start, end + 1, step))
+    return frozenset(values)
+
+
+class CronExpression:
+    """A parsed cron expression; use ``parse_cron`` to share parsed instances."""
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = MACROS.get(expression.strip().lower(), expression).split()
+        if len(fields) != 5:
+            raise CronError(f'Cron expression {expression!r} must have 5 fields')
+        minute, hour, day, month, weekday = fields
+        self.minutes = _parse_field(minute, 0, 59)
+        self.hours = _parse_field(hour, 0, 23)
+        self.days = _parse_field(day, 1, 31)
+        self.months = _parse_field(month, 1, 12, MONTH_NAMES)
+        # 7 is an alias for Sunday
+        self.weekdays = frozenset(day % 7 for day in _parse_field(weekday, 0, 7, DAY_NAMES))
+        self.day_restricted = day != '*'
+        self.weekday_restricted = weekday != '*'
+        self._sorted_minutes = sorted(self.minutes)
+        self._sorted_hours = sorted(self.hours)
+
+    def __repr__(self):
+        return f'<CronExpression {self.expression!r}>'
+
+    def _day_matches(self, date):
+        day_ok = date.day in self.days
+        # Python weekday(): Monday is 0; cron: Sunday is 0
+        weekday_ok = (date.weekday() + 1) % 7 in self.weekdays
+        if self.day_restricted and self.weekday_restricted:
+            return day_ok or weekday_ok
+        return day_ok and weekday_ok
+
+    def _next_wall_time(self, naive):
+        """First naive wall-clock minute strictly after ``naive`` matching the expression."""
+        candidate = naive.replace(second=0, microsecond=0) + ONE_MINUTE
+        limit = candidate.year + MAX_YEARS_AHEAD
+        while candidate.year <= limit:
+            if candidate.month not in self.months:
+                year, month = divmod(candidate.month, 12)
+                candidate = datetime.datetime(candidate.year + year, month + 1, 1)
+                continue
+            if not self._day_matches(candidate):
+                candidate = datetime.datetime.combine(candidate.date() + datetime.timedelta(days=1),
+                                                      datetime.time())
+                continue
+            if candidate.hour not in self.hours:
+                later = [hour for hour in self._sorted_hours if hour > candidate.hour]
+                if later:
+                    candidate = candidate.replace(hour=later[0], minute=0)
+                else:
+                    candidate = datetime.datetime.combine(candidate.date() + datetime.timedelta(days=1),
+                                                          datetime.time())
+                continue
+            if candidate.minute not in self.minutes:
+                later = [minute for minute in self._sorted_minutes if minute > candidate.minute]
+                if later:
+                    candidate = candidate.replace(minute=later[0])
+                else:
+                    candidate = candidate.replace(minute=0) + datetime.timedelta(hours=1)
+                continue
+            return candidate
+        raise CronError(f'Cron expression {self.expression!r} never fires')
+
+    def next_after(self, after, tz):
+        """
+        Next fire time strictly after the aware datetime ``after``, in UTC.
+
+        ``tz`` is the ``ZoneInfo`` the expression is evaluated in.
+        """
+        naive = after.astimezone(tz).replace(tzinfo=None)
+        while True:
+            naive = self._next_wall_time(naive)
+            # fold=0 is the first pass through a repeated hour; the second pass never fires
+            local = naive.replace(tzinfo=tz)
+            if not _exists(naive, tz):
+                # Skipped by a DST jump: fire when the gap ends
+                local = _end_of_gap(naive, tz)
+            fire_at = local.astimezone(datetime.timezone.utc)
+            if fire_at > after:
+                return fire_at
+
+
+def _exists(naive, tz):
+    """Whether the wall-clock time ``naive`` occurs in ``tz``."""
+    local = naive.replace(tzinfo=tz)
+    return local.astimezone(datetime.timezone.utc).astimezone(tz).replace(tzinfo=None) == naive
+
+
+def _end_of_gap(naive, tz):
+    """First existing wall-clock minute after a DST gap containing ``naive``."""
+    candidate = naive
+    for _ in range(24 * 60):
+        candidate += ONE_MINUTE
+        if _exists(candidate, tz):
+            return candidate.replace(tzinfo=tz)
+    raise CronError(f'No valid local time after {naive} in {tz}')
+
+
+@lru_cache(maxsize=4096)
+def parse_cron(expression):
+    """Parse ``expression`` once; parsed expressions are shared and immutable."""
+    return CronExpression(expression)
+
+
+@lru_cache(maxsize=512)
+def get_timezone(name):
+    try:
+        return ZoneInfo(name or 'UTC')
+    except (ZoneInfoNotFoundError, ValueError):
+        raise CronError(f'Unknown time zone {name!r}')
@@ -0,0 +1,154 @@
+"""
+Automation engine for Inspora platform.
+
+Model signals are matched against the in-memory trigger index in the
+request thread; everything else - rule evaluation, actions, logging - runs
+in Celery once the triggering transaction commits.
+"""
+import json
+import logging
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+
+from audit.mixins import FieldTrackingMixin
+
+from .index import automation_changed, trigger_index
+from .models import Automation, AutomationTrigger
+
+logger = logging.getLogger(__name__)
+
+# How deep in a chain of automations the current code runs: 0 outside
+# automations, n while the actions of a depth-n run execute
+chain_depth = ContextVar('automation_chain_depth', default=0)
+
+# Models in these apps never trigger automations (they are written by the engine itself)
+IGNORED_APPS = {'automations', 'audit', 'admin', 'sessions', 'contenttypes', 'auth', 'migrations'}
+
+OLD_VALUES_ATTR = '_automation_old_values'
+
+
+def _is_ignored(model):
+    return model._meta.app_label in IGNORED_APPS or model.__name__.startswith('Historical')
+
+
+def _field_values(instance):
+    return {field.attname: getattr(instance, field.attname) for field in instance._meta.concrete_fields}
+
+
+def _jsonable(data):
+    return json.loads(json.dumps(data, cls=DjangoJSONEncoder))
+
+
+def build_context(instance, action, old_values=None):
+    """
+    Describe a change for trigger matching and rule evaluation.
+
+    The object's fields are included at the top level so rule conditions can
+    refer to them directly.
+    """
+    return context_from_values(instance._meta.label_lower, instance.pk, action,
+                               _field_values(instance), old_values)
+
+
+def context_from_values(model_label, object_id, action, new_values, old_values=None):
+    """``build_context`` for a change known only by its field values (attnames)."""
+    field_changes = {}
+    if old_values is not None:
+        field_changes = {
+            name: {'old': old_values[name], 'new': value}
+            for name, value in new_values.items()
+            if name in old_values and old_values[name] != value
+        }
+
+    context = {
+        **new_values,
+        'action': action,
+        'model': model_label,
+        'object_id': object_id,
+        'field_changes': field_changes,
+    }
+    if 'status' in new_values:
+        context['new_status'] = new_values['status']
+        context['old_status'] = (old_values or {}).get('status', new_values['status'])
+    return _jsonable(context)
+
+
+def dispatch(instance, action, old_values=None):
+    """Enqueue every automation whose trigger matches this change, after commit."""
+    model = type(instance)
+    if not trigger_index.has_triggers(model, action):
+        return
+
+    context = build_context(instance, action, old_values)
+    triggers = trigger_index.candidates(model, action, context['field_changes'])
+    matched = {}
+    for trigger in triggers:
+        if trigger.should_trigger(context):
+            matched.setdefault(trigger.automation_id, trigger.pk)
+    if not matched:
+        return
+
+    depth = chain_depth.get() + 1
+    if depth > settings.AUTOMATION_MAX_CHAIN_DEPTH:
+        # An automation's actions keep re-triggering automations (e.g. update -> on_update -> update)
+        logger.warning('Automation chain deeper than %s stopped at %s %s (automations %s)',
+                       settings.AUTOMATION_MAX_CHAIN_DEPTH, context['model'], context['object_id'],
+                       sorted(matched))
+        return
+
+    from .tasks import run_automation
+
+    for automation_id, trigger_id in matched.items():
+        transaction.on_commit(
+            lambda automation_id=automation_id, trigger_id=trigger_id:
+                run_automation.delay(automation_id, trigger_id, context, depth=depth)
+        )
+
+
+# Signal handlers
+
+def remember_old_values(sender, instance, raw=False, **kwargs):
+    """Snapshot the stored row before an update, when an update trigger could need it."""
+    if raw or instance._state.adding or instance.pk is None or _is_ignored(sender):
+        return
+    if not trigger_index.has_triggers(sender, 'update'):
+        return
+    if isinstance(instance, FieldTrackingMixin) and instance.get_loaded_values() is not None:
+        # The loaded values are still available after the save
+        return
+    old = sender._base_manager.filter(pk=instance.pk).values(
+        *[field.attname for field in sender._meta.concrete_fields]
+    ).first()
+    setattr(instance, OLD_VALUES_ATTR, old)
+
+
+def model_saved(sender, instance, created, raw=False, **kwargs):
+    if raw or _is_ignored(sender):
+        return
+    if created:
+        dispatch(instance, 'create')
+    else:
+        old_values = instance.__dict__.pop(OLD_VALUES_ATTR, None)
+        if old_values is None and isinstance(instance, FieldTrackingMixin):
+            old_values = instance.get_loaded_values()
+        dispatch(instance, 'update', old_values)
+
+
+def model_deleted(sender, instance, **kwargs):
+    if not _is_ignored(sender):
+        dispatch(instance, 'delete')
+
+
+def connect_automation_signals():
+    for model in (Automation, AutomationTrigger):
+        post_save.connect(automation_changed, sender=model,
+                          dispatch_uid=f'trigger_index_{model._meta.model_name}_save')
+        post_delete.connect(automation_changed, sender=model,
+                            dispatch_uid=f'trigger_index_{model._meta.model_name}_delete')
+    pre_save.connect(remember_old_values, dispatch_uid='automation_remember_old_values')
+    post_save.connect(model_saved, dispatch_uid='automation_model_saved')
+    post_delete.connect(model_deleted, dispatch_uid='automation_model_deleted')
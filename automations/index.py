@@ -0,0 +1,187 @@
+"""
+In-memory trigger index for workflow automations.
+
+Every process keeps the active ``AutomationTrigger`` rows in a dict keyed by
+``(model, trigger_type, field_name)``, so a model save looks up its handful
+of candidate triggers in O(1) instead of querying automations.
+
+Changes to automations or triggers bump a version counter in Redis and
+publish it on ``TRIGGER_INDEX_CHANNEL``. A listener thread per process
+records the latest published version; the index is rebuilt lazily on the
+next lookup. The version is also polled every ``TRIGGER_INDEX_CHECK_INTERVAL``
+seconds in case a message was missed, and without Redis the index simply
+expires after that interval.
+"""
+import logging
+import os
+import threading
+import time
+
+from django.db import transaction
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TRIGGER_INDEX_VERSION_KEY = 'automations:trigger_index:version'
+TRIGGER_INDEX_CHANNEL = 'automations:trigger_index'
+TRIGGER_INDEX_CHECK_INTERVAL = 30
+
+SIGNAL_TRIGGER_TYPES = {
+    'create': ('on_create',),
+    'update': ('on_update', 'on_status_change', 'on_field_change'),
+    'delete': ('on_delete',),
+}
+
+
+def _model_keys(model):
+    """Index keys a trigger's ``model_name`` may have been normalised to."""
+    return (model._meta.label_lower, model._meta.model_name)
+
+
+def _normalise_model_name(model_name):
+    """Lower-case a trigger's model name, e.g. "tasks.Task" -> "tasks.task"."""
+    return model_name.strip().lower()
+
+
+class TriggerIndex:
+    """
+    Active signal triggers grouped by ``(model, trigger_type, field_name)``.
+
+    ``field_name`` is only part of the key for ``on_field_change`` triggers;
+    all other trigger types are stored under an empty field name.
+    """
+
+    def __init__(self):
+        self.version = None
+        self._entries = {}
+        self._models = {}
+        self._built_at = 0.0
+        self._published_version = None
+        self._lock = threading.Lock()
+        self._listener_pid = None
+
+    # Building
+
+    def build(self):
+        from .models import AutomationTrigger
+
+        triggers = AutomationTrigger.objects.filter(
+            is_active=True,
+            automation__is_active=True,
+            automation__status='active',
+            trigger_type__in=[name for names in SIGNAL_TRIGGER_TYPES.values() for name in names],
+        ).exclude(model_name='')
+
+        entries = {}
+        models = {}
+        for trigger in triggers.iterator(chunk_size=2000):
+            model_key = _normalise_model_name(trigger.model_name)
+            field_key = trigger.field_name.strip() if trigger.trigger_type == 'on_field_change' else ''
+            entries.setdefault((model_key, trigger.trigger_type, field_key), []).append(trigger)
+            models.setdefault(model_key, set()).add(trigger.trigger_type)
+        return entries, models
+
+    def refresh(self, version=None):
+        version = self._remote_version() if version is None else version
+        entries, models = self.build()
+        with self._lock:
+            self._entries, self._models = entries, models
+            self.version = version
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        self._built_at = 0.0
+
+    def _remote_version(self):
+        try:
+            return int(get_redis().get(TRIGGER_INDEX_VERSION_KEY) or 0)
+        except RedisError:
+            return None
+
+    def _ensure_fresh(self):
+        self._ensure_listener()
+        if not self._built_at:
+            self.refresh()
+        elif self._published_version is not None and self._published_version > (self.version or 0):
+            self.refresh(self._published_version)
+        elif time.monotonic() - self._built_at > TRIGGER_INDEX_CHECK_INTERVAL:
+            version = self._remote_version()
+            if version is None or version != self.version:
+                self.refresh(version)
+            else:
+                self._built_at = time.monotonic()
+
+    # Pub/sub
+
+    def _ensure_listener(self):
+        # Threads do not survive fork, so (re)start the listener per process
+        if self._listener_pid == os.getpid():
+            return
+        self._listener_pid = os.getpid()
+        thread = threading.Thread(target=self._listen, name='trigger-index-listener', daemon=True)
+        thread.start()
+
+    def _listen(self):
+        while True:
+            try:
+                pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(TRIGGER_INDEX_CHANNEL)
+                for message in pubsub.listen():
+                    self._published_version = int(message['data'])
+            except (RedisError, ValueError):
+                logger.debug('Trigger index listener disconnected; retrying')
+            time.sleep(TRIGGER_INDEX_CHECK_INTERVAL)
+
+    # Lookups
+
+    def has_triggers(self, model, action):
+        """Whether any trigger could fire for ``action`` on ``model``."""
+        self._ensure_fresh()
+        types = SIGNAL_TRIGGER_TYPES[action]
+        return any(
+            trigger_type in self._models.get(key, ())
+            for key in _model_keys(model) for trigger_type in types
+        )
+
+    def candidates(self, model, action, changed_fields=()):
+        """
+        Triggers that may fire for ``action`` on ``model``.
+
+        ``changed_fields`` (attnames) selects the ``on_field_change`` triggers;
+        triggers may name either the field or its attname ("assignee" or
+        "assignee_id").
+        """
+        self._ensure_fresh()
+        entries = self._entries
+        found = []
+        for model_key in _model_keys(model):
+            for trigger_type in SIGNAL_TRIGGER_TYPES[action]:
+                if trigger_type != 'on_field_change':
+                    found.extend(entries.get((model_key, trigger_type, ''), ()))
+                    continue
+                for attname in changed_fields:
+                    found.extend(entries.get((model_key, trigger_type, attname), ()))
+                    if attname.endswith('_id'):
+                        found.extend(entries.get((model_key, trigger_type, attname[:-3]), ()))
+        return found
+
+
+trigger_index = TriggerIndex()
+
+
+def publish_trigger_index_change():
+    """Tell every process to rebuild its trigger index."""
+    trigger_index.invalidate()
+    try:
+        client = get_redis()
+        version = client.incr(TRIGGER_INDEX_VERSION_KEY)
+        client.publish(TRIGGER_INDEX_CHANNEL, version)
+    except RedisError:
+        logger.warning('Could not publish trigger index change; other processes refresh within %ss',
+                       TRIGGER_INDEX_CHECK_INTERVAL)
+
+
+def automation_changed(sender, **kwargs):
+    transaction.on_commit(publish_trigger_index_change)
@@ -0,0 +1,104 @@
+"""
+Management command to benchmark trigger lookups on model saves.
+"""
+import random
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from accounts.models import Team
+from automations.index import SIGNAL_TRIGGER_TYPES, TriggerIndex
+from automations.models import Automation, AutomationTrigger
+from tasks.models import Task
+
+User = get_user_model()
+
+MODEL_NAMES = ['Task', 'tasks.Task', 'Project', 'Goal', 'Portfolio', 'TaskComment', 'Form']
+TRIGGER_TYPES = ['on_create', 'on_update', 'on_delete', 'on_status_change', 'on_field_change']
+FIELD_NAMES = ['status', 'priority', 'assignee', 'due_date', 'section', 'title', 'progress']
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark the in-memory trigger index against querying triggers per save (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--automations', type=int, default=10000)
+        parser.add_argument('--teams', type=int, default=500)
+        parser.add_argument('--lookups', type=int, default=10000, help='Simulated Task saves')
+        parser.add_argument('--naive-lookups', type=int, default=20,
+                            help='Simulated Task saves without the index')
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        rng = random.Random(options['seed'])
+        owner = User.objects.create_user(username=f'bench-{int(time.time())}')
+        teams = Team.objects.bulk_create(
+            Team(name=f'Bench team {i}', created_by=owner) for i in range(options['teams'])
+        )
+        automations = Automation.objects.bulk_create(
+            Automation(name=f'Automation {i}', status='active', created_by=owner, team=teams[i % len(teams)])
+            for i in range(options['automations'])
+        )
+        AutomationTrigger.objects.bulk_create(
+            AutomationTrigger(
+                name=f'Trigger {automation.pk}', automation=automation, created_by=owner,
+                model_name=rng.choice(MODEL_NAMES), trigger_type=rng.choice(TRIGGER_TYPES),
+                field_name=rng.choice(FIELD_NAMES),
+            )
+            for automation in automations
+        )
+        self.stdout.write(f'{len(automations)} automations across {len(teams)} teams')
+
+        index = TriggerIndex()
+        started = time.perf_counter()
+        index.refresh(version=0)
+        self.stdout.write(f'Index build: {(time.perf_counter() - started) * 1000:.1f} ms')
+
+        saves = [
+            ('update', rng.sample(FIELD_NAMES, 2)) if rng.random() < 0.8 else ('create', [])
+            for _ in range(options['lookups'])
+        ]
+
+        started = time.perf_counter()
+        candidates = 0
+        for action, changed in saves:
+            if index.has_triggers(Task, action):
+                candidates += len(index.candidates(Task, action, [f'{name}_id' for name in changed] + changed))
+        elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Index: {len(saves)} saves in {elapsed * 1000:.1f} ms '
+            f'({elapsed / len(saves) * 1e6:.1f} us/save, {candidates / len(saves):.1f} candidates/save)'
+        )
+
+        # What the engine would do without the index: load every active automation with its triggers
+        naive_saves = saves[:options['naive_lookups']]
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            for action, changed in naive_saves:
+                automations = Automation.objects.filter(is_active=True, status='active').prefetch_related('triggers')
+                [
+                    trigger for automation in automations for trigger in automation.triggers.all()
+                    if trigger.is_active and trigger.trigger_type in SIGNAL_TRIGGER_TYPES[action]
+                    and trigger.model_name.lower() in ('task', 'tasks.task')
+                    and (trigger.trigger_type != 'on_field_change' or trigger.field_name in changed)
+                ]
+            elapsed = time.perf_counter() - started
+        self.stdout.write(
+            f'Load all per save: {len(naive_saves)} saves in {elapsed * 1000:.1f} ms '
+            f'({elapsed / len(naive_saves) * 1e6:.1f} us/save, {len(queries)} queries)'
+        )
@@ -0,0 +1,19 @@
+"""
+Management command to run the cron scheduler for scheduled automations.
+"""
+from django.core.management.base import BaseCommand
+
+from automations.scheduler import CronScheduler
+
+
+class Command(BaseCommand):
+    help = 'Fire on_schedule automation triggers as they come due (safe to run on several hosts)'
+
+    def handle(self, *args, **options):
+        scheduler = CronScheduler()
+        scheduler.maybe_reload()
+        self.stdout.write(f'Scheduling {len(scheduler.triggers)} trigger(s)')
+        try:
+            scheduler.run_forever()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:39
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automations', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automationexecution',
+            name='log_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name='AutomationExecutionLog',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sequence', models.PositiveIntegerField()),
+                ('timestamp', models.DateTimeField()),
+                ('level', models.CharField(choices=[('debug', 'Debug'), ('info', 'Info'), ('warning', 'Warning'), ('error', 'Error')], default='info', max_length=10)),
+                ('message', models.TextField()),
+                ('action', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='log_entries', to='automations.automationaction')),
+                ('execution', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='logs', to='automations.automationexecution')),
+            ],
+            options={
+                'verbose_name': 'Automation Execution Log',
+                'verbose_name_plural': 'Automation Execution Logs',
+                'ordering': ['execution', 'sequence'],
+                'constraints': [models.UniqueConstraint(fields=('execution', 'sequence'), name='unique_execution_log_sequence')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:47
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('automations', '0002_automationexecutionlog'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='automationexecution',
+            name='deadline',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='automationexecution',
+            index=models.Index(fields=['status', 'deadline'], name='automations_status_e5d840_idx'),
+        ),
+    ]
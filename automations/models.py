@@ -1,15 +1,55 @@
 """
 Workflow automation models for Inspora platform.
 """
+import datetime
+import logging
+import re
+
+from django.apps import apps
+from django.conf import settings
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
+from django.utils.module_loading import import_string
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from django.contrib.auth import get_user_model
 from simple_history.models import HistoricalRecords
 from accounts.models import Team
+from . import counters
+from .conditions import ConditionError, get_compiled_rule
+from .cron import CronError, get_timezone, parse_cron
+
+logger = logging.getLogger(__name__)
 
 User = get_user_model()
 
+PLACEHOLDER = re.compile(r'\{(\w+)\}')
+
+
+def render_placeholders(value, context):
+    """
+    Fill ``{field}`` placeholders in an action config from the trigger context.
+    
+    A string that is exactly one placeholder keeps the context value's type.
+    """
+    if isinstance(value, dict):
+        return {key: render_placeholders(item, context) for key, item in value.items()}
+    if isinstance(value, list):
+        return [render_placeholders(item, context) for item in value]
+    if not isinstance(value, str):
+        return value
+    match = PLACEHOLDER.fullmatch(value)
+    if match and match[1] in context:
+        return context[match[1]]
+    return PLACEHOLDER.sub(lambda m: str(context.get(m[1], m[0])), value)
+
+
+def get_context_object(context):
+    """Load the object that triggered an automation."""
+    model = apps.get_model(context['model'])
+    return model._default_manager.get(pk=context['object_id'])
+
 
 class Automation(models.Model):
     """
@@ -68,6 +108,12 @@ class Automation(models.Model):
     def get_absolute_url(self):
         return reverse('automations:automation_detail', kwargs={'pk': self.pk})
     
+    def save(self, *args, **kwargs):
+        # Counters are only written by automations.counters
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = counters.savable_fields(self, 'automation')
+        super().save(*args, **kwargs)
+    
     def get_rules_count(self):
         """Get count of automation rules."""
         return self.rules.count()
@@ -77,10 +123,10 @@ class Automation(models.Model):
         return self.actions.count()
     
     def increment_execution_count(self):
-        """Increment the execution count."""
+        """Count an execution; the row is updated by the next counter flush."""
+        self.last_executed = timezone.now()
         self.execution_count += 1
-        self.last_executed = models.DateTimeField(auto_now=True)
-        self.save(update_fields=['execution_count', 'last_executed'])
+        counters.increment('automation', self.pk, self.last_executed)
 
 
 class AutomationRule(models.Model):
@@ -130,44 +176,19 @@ class AutomationRule(models.Model):
         """Evaluate rule conditions against context."""
         if not self.conditions:
             return True
-        
-        results = []
-        for condition in self.conditions:
-            field = condition.get('field')
-            operator = condition.get('operator')
-            value = condition.get('value')
-            
-            if field in context:
-                context_value = context[field]
-                result = self._evaluate_condition(context_value, operator, value)
-                results.append(result)
-            else:
-                results.append(False)
-        
-        if self.operator == 'AND':
-            return all(results)
-        else:  # OR
-            return any(results)
-    
-    def _evaluate_condition(self, context_value, operator, value):
-        """Evaluate a single condition."""
-        if operator == 'equals':
-            return context_value == value
-        elif operator == 'not_equals':
-            return context_value != value
-        elif operator == 'contains':
-            return str(value) in str(context_value)
-        elif operator == 'not_contains':
-            return str(value) not in str(context_value)
-        elif operator == 'greater_than':
-            return context_value > value
-        elif operator == 'less_than':
-            return context_value < value
-        elif operator == 'is_empty':
-            return not context_value
-        elif operator == 'is_not_empty':
-            return bool(context_value)
-        return False
+        try:
+            return get_compiled_rule(self)(context)
+        except ConditionError as e:
+            logger.warning('Automation rule %s has invalid conditions: %s', self.pk, e)
+            return False
+    
+    def evaluate_batch(self, contexts):
+        """Evaluate rule conditions against many contexts; one bool per context."""
+        try:
+            return get_compiled_rule(self).evaluate_batch(contexts)
+        except ConditionError as e:
+            logger.warning('Automation rule %s has invalid conditions: %s', self.pk, e)
+            return [False] * len(contexts)
 
 
 class AutomationAction(models.Model):
@@ -216,53 +237,113 @@ class AutomationAction(models.Model):
         return f"{self.automation.name} - {self.name}"
     
     def execute(self, context):
-        """Execute the automation action."""
-        try:
-            if self.action_type == 'create':
-                return self._execute_create(context)
-            elif self.action_type == 'update':
-                return self._execute_update(context)
-            elif self.action_type == 'notify':
-                return self._execute_notify(context)
-            elif self.action_type == 'assign':
-                return self._execute_assign(context)
-            elif self.action_type == 'webhook':
-                return self._execute_webhook(context)
-            else:
-                return self._execute_custom(context)
-        except Exception as e:
-            # Log error and return False
-            return False
+        """
+        Execute the automation action.
+        
+        Errors propagate so the engine can retry the action.
+        """
+        handler = getattr(self, f'_execute_{self.action_type}', self._execute_custom)
+        return handler(context)
+    
+    def _config(self, context):
+        """Action config with ``{field}`` placeholders filled from the context."""
+        return render_placeholders(self.action_config, context)
     
     def _execute_create(self, context):
         """Execute create action."""
-        # Implementation for creating new objects
-        pass
+        config = self._config(context)
+        model = apps.get_model(config['model'])
+        obj = model._default_manager.create(**config.get('fields', {}))
+        return {'created': model._meta.label_lower, 'id': obj.pk}
     
     def _execute_update(self, context):
         """Execute update action."""
-        # Implementation for updating existing objects
-        pass
+        fields = self._config(context).get('fields', {})
+        obj = get_context_object(context)
+        for name, value in fields.items():
+            setattr(obj, name, value)
+        obj.save(update_fields=[obj._meta.get_field(name).name for name in fields])
+        return {'updated': sorted(fields)}
+    
+    def _execute_delete(self, context):
+        """Execute delete action."""
+        obj = get_context_object(context)
+        obj.delete()
+        return {'deleted': context['object_id']}
     
     def _execute_notify(self, context):
         """Execute notification action."""
-        # Implementation for sending notifications
-        pass
+        from notifications_app.models import Notification
+        
+        config = self._config(context)
+        recipient_ids = set()
+        for recipient in config.get('recipients', []):
+            if isinstance(recipient, int) or str(recipient).isdigit():
+                recipient_ids.add(int(recipient))
+            elif context.get(f'{recipient}_id'):
+                # A user field of the triggering object, e.g. "assignee"
+                recipient_ids.add(context[f'{recipient}_id'])
+        
+        Notification.objects.bulk_create([
+            Notification(
+                recipient_id=user_id,
+                title=config.get('title', self.automation.name)[:200],
+                message=config.get('message', ''),
+                notification_type=config.get('notification_type', 'custom'),
+                priority=config.get('priority', 'normal'),
+                data={'automation_id': self.automation_id, 'object_id': context.get('object_id')},
+            )
+            for user_id in recipient_ids
+        ])
+        return {'notified': sorted(recipient_ids)}
     
     def _execute_assign(self, context):
         """Execute assignment action."""
-        # Implementation for assigning tasks/users
-        pass
+        config = self._config(context)
+        field = config.get('field', 'assignee')
+        user_id = config.get('user_id')
+        if user_id is None and config.get('user'):
+            # Copy another user field of the object, e.g. "created_by"
+            user_id = context.get(f"{config['user']}_id")
+        obj = get_context_object(context)
+        setattr(obj, f'{field}_id', user_id)
+        obj.save(update_fields=[field])
+        return {'assigned': user_id}
+    
+    def _execute_move(self, context):
+        """Execute move action (e.g. to another section, project or status)."""
+        fields = {
+            name: value for name, value in self._config(context).items()
+            if name in ('section_id', 'project_id', 'status', 'parent_task_id')
+        }
+        obj = get_context_object(context)
+        for name, value in fields.items():
+            setattr(obj, name, value)
+        obj.save(update_fields=[obj._meta.get_field(name).name for name in fields])
+        return {'moved': fields}
     
     def _execute_webhook(self, context):
-        """Execute webhook action."""
-        # Implementation for webhook calls
-        pass
+        """Execute webhook action; raises ``WebhookError`` so the run retries it."""
+        from notifications_app.webhooks import WebhookRequest, send
+        
+        config = self._config(context)
+        request = WebhookRequest.build(
+            config['url'],
+            {'automation': self.automation_id, 'action': self.pk, 'context': context},
+            headers=config.get('headers'),
+            event=config.get('event', 'automation'),
+            source=f'automation_action:{self.pk}',
+        )
+        status_code = send(request, timeout=config.get('timeout'))
+        return {'status_code': status_code, 'delivery': request.delivery_id}
     
     def _execute_custom(self, context):
         """Execute custom action."""
-        # Implementation for custom actions
-        pass
+        # Only handlers registered in settings can be referenced by name
+        handler_path = settings.AUTOMATION_CUSTOM_ACTIONS.get(self.action_config.get('handler'))
+        if handler_path is None:
+            raise ValueError(f"Unknown custom action {self.action_config.get('handler')!r}")
+        return import_string(handler_path)(self, context)
 
 
 class AutomationTrigger(models.Model):
@@ -315,6 +396,12 @@ class AutomationTrigger(models.Model):
     def __str__(self):
         return f"{self.automation.name} - {self.name}"
     
+    def save(self, *args, **kwargs):
+        # Counters are only written by automations.counters
+        if not self._state.adding and kwargs.get('update_fields') is None:
+            kwargs['update_fields'] = counters.savable_fields(self, 'trigger')
+        super().save(*args, **kwargs)
+    
     def should_trigger(self, context):
         """Determine if trigger should fire based on context."""
         if not self.is_active:
@@ -324,37 +411,57 @@ class AutomationTrigger(models.Model):
             return context.get('action') == 'create'
         elif self.trigger_type == 'on_update':
             return context.get('action') == 'update'
+        elif self.trigger_type == 'on_delete':
+            return context.get('action') == 'delete'
         elif self.trigger_type == 'on_status_change':
             return self._check_status_change(context)
         elif self.trigger_type == 'on_field_change':
             return self._check_field_change(context)
         elif self.trigger_type == 'on_schedule':
-            return self._check_schedule()
+            return self._check_schedule(context)
         
         return False
     
     def _check_status_change(self, context):
         """Check if status has changed."""
         if 'old_status' in context and 'new_status' in context:
-            return context['old_status'] != context['new_status']
+            if context['old_status'] == context['new_status']:
+                return False
+            return not self.field_value or str(context['new_status']) == self.field_value
         return False
     
     def _check_field_change(self, context):
         """Check if specific field has changed."""
-        if 'field_changes' in context:
-            return self.field_name in context['field_changes']
+        if self.field_name in context.get('field_changes', {}):
+            new_value = context['field_changes'][self.field_name]['new']
+            return not self.field_value or str(new_value) == self.field_value
         return False
     
-    def _check_schedule(self):
+    def _check_schedule(self, context):
         """Check if scheduled trigger should fire."""
-        # Implementation for cron-based scheduling
-        pass
+        # Scheduled runs are started by automations.scheduler for this trigger
+        return context.get('action') == 'schedule' and context.get('trigger_id') == self.pk
+    
+    def next_fire_time(self, after=None):
+        """Next time this schedule trigger fires (UTC), or None."""
+        if self.trigger_type != 'on_schedule' or not self.schedule_cron:
+            return None
+        return parse_cron(self.schedule_cron).next_after(after or timezone.now(), get_timezone(self.timezone))
+    
+    def clean(self):
+        if self.trigger_type == 'on_schedule':
+            if not self.schedule_cron:
+                raise ValidationError({'schedule_cron': _('Scheduled triggers need a cron expression.')})
+            try:
+                self.next_fire_time()
+            except CronError as e:
+                raise ValidationError({'schedule_cron': str(e)})
     
     def increment_trigger_count(self):
-        """Increment the trigger count."""
+        """Count a trigger firing; the row is updated by the next counter flush."""
+        self.last_triggered = timezone.now()
         self.trigger_count += 1
-        self.last_triggered = models.DateTimeField(auto_now=True)
-        self.save(update_fields=['trigger_count', 'last_triggered'])
+        counters.increment('trigger', self.pk, self.last_triggered)
 
 
 class AutomationExecution(models.Model):
@@ -377,7 +484,9 @@ class AutomationExecution(models.Model):
     # Execution details
     execution_time = models.FloatField(null=True, blank=True)  # seconds
     error_message = models.TextField(blank=True)
-    execution_log = models.JSONField(default=list, blank=True)
+    execution_log = models.JSONField(default=list, blank=True)  # latest entries only, see AutomationExecutionLog
+    log_count = models.PositiveIntegerField(default=0)
+    deadline = models.DateTimeField(null=True, blank=True)  # see automations.supervisor
     
     # Relationships
     automation = models.ForeignKey(Automation, on_delete=models.CASCADE, related_name='executions')
@@ -390,32 +499,137 @@ class AutomationExecution(models.Model):
         ordering = ['-started_at']
         verbose_name = _('Automation Execution')
         verbose_name_plural = _('Automation Executions')
+        indexes = [
+            models.Index(fields=['status', 'deadline']),
+        ]
     
     def __str__(self):
         return f"Execution {self.id} of {self.automation.name}"
     
     def complete(self, success=True, error_message=''):
-        """Mark execution as completed."""
+        """
+        Mark execution as completed, flushing any buffered log entries.
+
+        An execution that was cancelled or reaped in the meantime keeps its
+        status. Returns whether this call finished it.
+        """
         from django.utils import timezone
         
-        self.status = 'completed' if success else 'failed'
-        self.completed_at = timezone.now()
-        self.error_message = error_message
-        
-        if self.started_at and self.completed_at:
-            self.execution_time = (self.completed_at - self.started_at).total_seconds()
+        self.flush_log()
+        completed_at = timezone.now()
+        fields = {
+            'status': 'completed' if success else 'failed',
+            'completed_at': completed_at,
+            'error_message': error_message,
+            'execution_time': (completed_at - self.started_at).total_seconds() if self.started_at else None,
+        }
+        updated = AutomationExecution.objects.filter(pk=self.pk, status__in=['pending', 'running']).update(**fields)
+        if updated:
+            for name, value in fields.items():
+                setattr(self, name, value)
+        else:
+            self.refresh_from_db(fields=list(fields))
+        return bool(updated)
+    
+    def cancel(self, reason='Cancelled'):
+        """
+        Cancel a pending or running execution.
+
+        The runner notices before its next action; the action in progress,
+        if any, is not interrupted. Returns whether the execution was still
+        active.
+        """
+        from django.utils import timezone
         
-        self.save()
-    
-    def add_log_entry(self, message, level='info'):
-        """Add a log entry to the execution log."""
+        cancelled = AutomationExecution.objects.filter(pk=self.pk, status__in=['pending', 'running']).update(
+            status='cancelled', completed_at=timezone.now(), error_message=reason,
+        )
+        if cancelled:
+            self.refresh_from_db(fields=['status', 'completed_at', 'error_message'])
+        return bool(cancelled)
+    
+    def is_cancelled(self):
+        """Whether the execution was cancelled since it was loaded."""
+        return AutomationExecution.objects.filter(pk=self.pk, status='cancelled').exists()
+    
+    def extend_deadline(self, seconds):
+        """Push the deadline back, e.g. while waiting for a delayed action."""
+        if self.deadline is not None:
+            self.deadline += datetime.timedelta(seconds=seconds)
+    
+    def add_log_entry(self, message, level='info', action=None):
+        """
+        Buffer a log entry; it is written by the next ``flush_log()`` or ``complete()``.
+        """
         from django.utils import timezone
         
-        log_entry = {
-            'timestamp': timezone.now().isoformat(),
-            'level': level,
-            'message': message
+        if not hasattr(self, '_log_buffer'):
+            self._log_buffer = []
+        self._log_buffer.append(AutomationExecutionLog(
+            execution=self,
+            action=action,
+            level=level,
+            message=message,
+            timestamp=timezone.now(),
+        ))
+    
+    def _write_log_buffer(self):
+        """Insert buffered entries and refresh the capped ``execution_log`` summary."""
+        buffer = getattr(self, '_log_buffer', None)
+        if not buffer:
+            return False
+        for sequence, entry in enumerate(buffer, start=self.log_count + 1):
+            entry.sequence = sequence
+        AutomationExecutionLog.objects.bulk_create(buffer)
+        self.log_count += len(buffer)
+        summary = self.execution_log + [entry.as_summary() for entry in buffer]
+        self.execution_log = summary[-EXECUTION_LOG_SUMMARY_SIZE:]
+        self._log_buffer = []
+        return True
+    
+    def flush_log(self):
+        """Write buffered log entries in one batch."""
+        if self._write_log_buffer():
+            self.save(update_fields=['execution_log', 'log_count'])
+
+
+# Entries kept inline in AutomationExecution.execution_log; the full log is AutomationExecutionLog
+EXECUTION_LOG_SUMMARY_SIZE = 20
+
+
+class AutomationExecutionLog(models.Model):
+    """
+    One line of an automation execution's log.
+    """
+    LEVEL_CHOICES = [
+        ('debug', 'Debug'),
+        ('info', 'Info'),
+        ('warning', 'Warning'),
+        ('error', 'Error'),
+    ]
+    
+    execution = models.ForeignKey(AutomationExecution, on_delete=models.CASCADE, related_name='logs')
+    sequence = models.PositiveIntegerField()
+    timestamp = models.DateTimeField()
+    level = models.CharField(max_length=10, choices=LEVEL_CHOICES, default='info')
+    message = models.TextField()
+    action = models.ForeignKey(AutomationAction, on_delete=models.SET_NULL, null=True, blank=True, related_name='log_entries')
+    
+    class Meta:
+        ordering = ['execution', 'sequence']
+        verbose_name = _('Automation Execution Log')
+        verbose_name_plural = _('Automation Execution Logs')
+        constraints = [
+            models.UniqueConstraint(fields=['execution', 'sequence'], name='unique_execution_log_sequence'),
+        ]
+    
+    def __str__(self):
+        return f"[{self.level}] {self.message[:50]}"
+    
+    def as_summary(self):
+        return {
+            'sequence': self.sequence,
+            'timestamp': self.timestamp.isoformat(),
+            'level': self.level,
+            'message': self.message,
         }
-        
-        self.execution_log.append(log_entry)
-        self.save(update_fields=['execution_log'])
@@ -0,0 +1,182 @@
+"""
+Cron scheduler for ``on_schedule`` automation triggers.
+
+The scheduler keeps one min-heap entry ``(fire_at, trigger_id)`` per active
+schedule trigger and sleeps until the earliest one is due, so the cost of a
+tick depends on the triggers that fire, not on how many exist. Cron
+expressions are parsed once and shared between triggers.
+
+Several scheduler replicas may run at once: each fire is claimed with a
+Redis ``SET NX`` on ``(trigger, fire time)`` before the automation is
+enqueued, so exactly one replica enqueues it. Fires missed while no
+scheduler was running are not caught up.
+"""
+import heapq
+import logging
+import time
+
+from django.db.models import Q
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+from .cron import CronError, get_timezone, parse_cron
+from .index import TRIGGER_INDEX_CHANNEL, TRIGGER_INDEX_VERSION_KEY
+from .models import AutomationTrigger
+
+logger = logging.getLogger(__name__)
+
+CLAIM_KEY = 'automations:cron:{trigger_id}:{fire_at}'
+CLAIM_TTL = 7 * 24 * 60 * 60
+
+# Upper bound between reloads, in case a change notification was missed (seconds)
+RELOAD_INTERVAL = 300
+
+
+class ScheduledTrigger:
+    __slots__ = ('trigger_id', 'automation_id', 'cron', 'tz', 'updated_at')
+
+    def __init__(self, trigger):
+        self.trigger_id = trigger.pk
+        self.automation_id = trigger.automation_id
+        self.cron = parse_cron(trigger.schedule_cron)
+        self.tz = get_timezone(trigger.timezone)
+        self.updated_at = trigger.updated_at
+
+    def next_after(self, after):
+        return self.cron.next_after(after, self.tz)
+
+
+class CronScheduler:
+    def __init__(self, enqueue=None, reload_interval=RELOAD_INTERVAL):
+        self.enqueue = enqueue or self._enqueue
+        self.reload_interval = reload_interval
+        self.triggers = {}
+        self.heap = []
+        self.version = None
+        self._next_reload = 0.0
+
+    # Loading
+
+    def load(self, now=None):
+        """(Re)load schedule triggers, keeping heap entries of unchanged ones."""
+        now = now or timezone.now()
+        rows = AutomationTrigger.objects.filter(
+            is_active=True,
+            trigger_type='on_schedule',
+            automation__is_active=True,
+            automation__status='active',
+        ).exclude(Q(schedule_cron='') | Q(schedule_cron__isnull=True))
+
+        triggers = {}
+        for row in rows:
+            current = self.triggers.get(row.pk)
+            if current is not None and current.updated_at == row.updated_at:
+                triggers[row.pk] = current
+                continue
+            try:
+                triggers[row.pk] = ScheduledTrigger(row)
+            except CronError as e:
+                logger.warning('Skipping schedule trigger %s: %s', row.pk, e)
+
+        changed = {pk for pk, trigger in triggers.items() if self.triggers.get(pk) is not trigger}
+        self.triggers = triggers
+        # Drop entries of removed or changed triggers, then schedule the changed ones
+        self.heap = [entry for entry in self.heap if entry[1] in triggers and entry[1] not in changed]
+        for pk in changed:
+            self._push(triggers[pk], now)
+        heapq.heapify(self.heap)
+
+    def _push(self, trigger, after):
+        try:
+            heapq.heappush(self.heap, (trigger.next_after(after), trigger.trigger_id))
+        except CronError as e:
+            logger.warning('Schedule trigger %s will not fire again: %s', trigger.trigger_id, e)
+
+    def _remote_version(self):
+        try:
+            return get_redis().get(TRIGGER_INDEX_VERSION_KEY)
+        except RedisError:
+            return None
+
+    def maybe_reload(self, now=None):
+        """Reload when automations changed, and at least every ``reload_interval`` seconds."""
+        version = self._remote_version()
+        if version != self.version or time.monotonic() >= self._next_reload:
+            self.version = version
+            self._next_reload = time.monotonic() + self.reload_interval
+            self.load(now)
+
+    # Firing
+
+    def claim(self, trigger_id, fire_at):
+        """Claim one fire across replicas; True for exactly one caller."""
+        key = CLAIM_KEY.format(trigger_id=trigger_id, fire_at=int(fire_at.timestamp()))
+        try:
+            return bool(get_redis().set(key, 1, nx=True, ex=CLAIM_TTL))
+        except RedisError:
+            # Fall back to a compare-and-set on the trigger row
+            return AutomationTrigger.objects.filter(pk=trigger_id).filter(
+                Q(last_triggered__isnull=True) | Q(last_triggered__lt=fire_at)
+            ).update(last_triggered=fire_at) == 1
+
+    def _enqueue(self, trigger, fire_at):
+        from .tasks import run_automation
+
+        context = {
+            'action': 'schedule',
+            'trigger_id': trigger.trigger_id,
+            'scheduled_for': fire_at.isoformat(),
+        }
+        run_automation.delay(trigger.automation_id, trigger.trigger_id, context)
+
+    def run_due(self, now=None):
+        """Fire every trigger due at ``now``; return the number enqueued."""
+        now = now or timezone.now()
+        fired = 0
+        while self.heap and self.heap[0][0] <= now:
+            fire_at, trigger_id = heapq.heappop(self.heap)
+            trigger = self.triggers.get(trigger_id)
+            if trigger is None:
+                continue
+            if self.claim(trigger_id, fire_at):
+                self.enqueue(trigger, fire_at)
+                fired += 1
+            self._push(trigger, max(fire_at, now))
+        return fired
+
+    def seconds_until_next(self, now=None):
+        if not self.heap:
+            return None
+        now = now or timezone.now()
+        return max((self.heap[0][0] - now).total_seconds(), 0.0)
+
+    def _subscribe(self):
+        try:
+            pubsub = get_redis().pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(TRIGGER_INDEX_CHANNEL)
+            return pubsub
+        except RedisError:
+            return None
+
+    def run_forever(self):
+        """
+        Fire triggers as they come due.
+
+        Between fires the scheduler blocks on the automation change channel,
+        so it wakes early only when triggers were edited.
+        """
+        pubsub = self._subscribe()
+        while True:
+            self.maybe_reload()
+            self.run_due()
+            wait = self.seconds_until_next()
+            wait = self.reload_interval if wait is None else min(wait, self.reload_interval)
+            if pubsub is None:
+                time.sleep(wait)
+                pubsub = self._subscribe()
+                continue
+            try:
+                pubsub.get_message(timeout=wait)
+            except RedisError:
+                pubsub = None
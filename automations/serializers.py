@@ -0,0 +1,35 @@
+"""
+Serializers for automations app.
+"""
+from rest_framework import serializers
+from .models import Automation, AutomationExecution, AutomationExecutionLog
+
+
+class AutomationSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = Automation
+        fields = [
+            'id', 'name', 'description', 'status', 'priority', 'is_active', 'team', 'created_by',
+            'max_executions_per_hour', 'execution_count', 'last_executed', 'created_at', 'updated_at',
+        ]
+        read_only_fields = fields
+
+
+class AutomationExecutionSerializer(serializers.ModelSerializer):
+    automation_name = serializers.CharField(source='automation.name', read_only=True)
+
+    class Meta:
+        model = AutomationExecution
+        fields = [
+            'id', 'automation', 'automation_name', 'status', 'started_at', 'completed_at',
+            'execution_time', 'deadline', 'error_message', 'log_count', 'execution_log',
+            'triggered_by', 'trigger_context',
+        ]
+        read_only_fields = fields
+
+
+class AutomationExecutionLogSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = AutomationExecutionLog
+        fields = ['sequence', 'timestamp', 'level', 'message', 'action']
+        read_only_fields = fields
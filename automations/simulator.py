@@ -0,0 +1,343 @@
+"""
+Dry-run simulator for workflow automations.
+
+Replays recorded changes against one automation's triggers and rules to
+estimate how often it would have fired, without running any action. Two
+sources of changes are read:
+
+* the simple-history tables of models with ``history = HistoricalRecords()``
+  (each historical row is diffed against the object's previous row);
+* ``AuditEvent`` rows, using their ``before_data``/``after_data``, for
+  models without history (so no change is counted twice). Update events
+  only hold the changed fields, so each object's field values are kept
+  while replaying: seeded from its create event, or from its current row
+  when it was created before the window, and updated with every diff.
+
+Both are streamed in chunks of ``chunk_size`` rows ordered by time. Each
+chunk is turned into trigger contexts exactly as the engine builds them, and
+rules are evaluated with the compiled batch evaluator, so the cost per
+change is a dict build and a few closure calls. ``on_schedule`` triggers are
+simulated from their cron expression.
+"""
+import datetime
+import time
+from collections import Counter
+
+from django.apps import apps
+from django.db.models import Max
+from django.utils import timezone
+
+from .cron import CronError, get_timezone, parse_cron
+from .engine import _is_ignored, _jsonable, context_from_values
+from .index import SIGNAL_TRIGGER_TYPES, _model_keys, _normalise_model_name
+
+DEFAULT_CHUNK_SIZE = 2000
+
+HISTORY_ACTIONS = {'+': 'create', '~': 'update', '-': 'delete'}
+AUDIT_ACTIONS = {'create': 'create', 'update': 'update', 'delete': 'delete'}
+
+
+class SimulationReport:
+    """Would-have-fired counts for one automation over ``[since, until)``."""
+
+    def __init__(self, automation, since, until):
+        self.automation = automation
+        self.since = since
+        self.until = until
+        self.events_scanned = 0
+        self.trigger_matches = 0
+        self.fired = 0
+        self.by_trigger = Counter()
+        self.by_day = Counter()
+        self.by_hour = Counter()
+        self.first_fire = None
+        self.last_fire = None
+        self.elapsed = 0.0
+
+    def record(self, trigger_id, when):
+        self.fired += 1
+        self.by_trigger[trigger_id] += 1
+        self.by_day[when.date().isoformat()] += 1
+        self.by_hour[when.replace(minute=0, second=0, microsecond=0).isoformat()] += 1
+        if self.first_fire is None or when < self.first_fire:
+            self.first_fire = when
+        if self.last_fire is None or when > self.last_fire:
+            self.last_fire = when
+
+    @property
+    def throttled(self):
+        """Fires over ``max_executions_per_hour`` in any clock hour (approximate)."""
+        limit = self.automation.max_executions_per_hour
+        if not limit:
+            return 0
+        return sum(max(count - limit, 0) for count in self.by_hour.values())
+
+    def to_dict(self):
+        peak_hour = max(self.by_hour.items(), key=lambda item: item[1], default=(None, 0))
+        return {
+            'automation': self.automation.pk,
+            'since': self.since.isoformat(),
+            'until': self.until.isoformat(),
+            'events_scanned': self.events_scanned,
+            'trigger_matches': self.trigger_matches,
+            'fired': self.fired,
+            'throttled': self.throttled,
+            'by_trigger': dict(self.by_trigger),
+            'by_day': dict(sorted(self.by_day.items())),
+            'peak_hour': {'hour': peak_hour[0], 'count': peak_hour[1]},
+            'first_fire': self.first_fire.isoformat() if self.first_fire else None,
+            'last_fire': self.last_fire.isoformat() if self.last_fire else None,
+            'elapsed_seconds': round(self.elapsed, 3),
+        }
+
+
+def _trigger_models(triggers):
+    """Map each model with signal triggers to those triggers."""
+    wanted = {}
+    for trigger in triggers:
+        if trigger.trigger_type == 'on_schedule' or not trigger.model_name:
+            continue
+        wanted.setdefault(_normalise_model_name(trigger.model_name), []).append(trigger)
+
+    found = {}
+    for model in apps.get_models():
+        if _is_ignored(model):
+            continue
+        for key in _model_keys(model):
+            if key in wanted:
+                found.setdefault(model, []).extend(wanted[key])
+    return found
+
+
+def _condition_fields(conditions):
+    for condition in conditions or []:
+        if 'conditions' in condition:
+            yield from _condition_fields(condition['conditions'])
+        elif condition.get('field'):
+            yield condition['field']
+
+
+def _referenced_attnames(model, triggers, rules):
+    """
+    Columns of ``model`` that ``triggers`` and ``rules`` can look at.
+
+    Only these are loaded from history, which skips decoding large text and
+    JSON columns the automation never reads.
+    """
+    names = set()
+    for trigger in triggers:
+        if trigger.trigger_type == 'on_status_change':
+            names.add('status')
+        elif trigger.trigger_type == 'on_field_change':
+            names.add(trigger.field_name.strip())
+    for rule in rules:
+        for path in _condition_fields(rule.conditions):
+            parts = path.split('.')
+            if parts[0] == 'field_changes' and len(parts) > 1:
+                names.add(parts[1])
+            elif parts[0] in ('new_status', 'old_status'):
+                names.add('status')
+            else:
+                names.add(parts[0])
+
+    attnames = {model._meta.pk.attname}
+    for field in model._meta.concrete_fields:
+        if field.name in names or field.attname in names:
+            attnames.add(field.attname)
+    return [field.attname for field in model._meta.concrete_fields if field.attname in attnames]
+
+
+# Change sources: each yields chunks of (when, context)
+
+def _history_changes(model, since, until, chunk_size, attnames=None):
+    """Changes recorded in ``model``'s simple-history table, oldest first."""
+    history = getattr(model, 'history', None)
+    if history is None:
+        return
+    history_model = history.model
+    attnames = attnames or [field.attname for field in model._meta.concrete_fields]
+    pk_name = model._meta.pk.attname
+    label = model._meta.label_lower
+    columns = attnames + ['history_id', 'history_date', 'history_type']
+    previous = {}
+
+    rows = history_model.objects.filter(history_date__gte=since, history_date__lt=until)
+    cursor = None
+    while True:
+        page = rows.order_by('history_date', 'history_id')
+        if cursor is not None:
+            page = page.filter(history_date__gte=cursor[0]).exclude(
+                history_date=cursor[0], history_id__lte=cursor[1])
+        chunk = list(page.values(*columns)[:chunk_size])
+        if not chunk:
+            return
+
+        # Seed the previous version of objects first seen in this chunk
+        missing = {row[pk_name] for row in chunk} - previous.keys()
+        if missing:
+            latest = history_model.objects.filter(
+                **{f'{pk_name}__in': missing, 'history_date__lt': since}
+            ).values(pk_name).annotate(latest=Max('history_id')).values_list('latest', flat=True)
+            for row in history_model.objects.filter(history_id__in=list(latest)).values(*attnames):
+                previous[row[pk_name]] = row
+
+        changes = []
+        for row in chunk:
+            object_id = row[pk_name]
+            values = {name: row[name] for name in attnames}
+            action = HISTORY_ACTIONS.get(row['history_type'], 'update')
+            old_values = previous.get(object_id) if action == 'update' else None
+            changes.append((row['history_date'], context_from_values(label, object_id, action, values, old_values)))
+            if action == 'delete':
+                previous.pop(object_id, None)
+            else:
+                previous[object_id] = values
+        yield changes
+
+        last = chunk[-1]
+        cursor = (last['history_date'], last['history_id'])
+
+
+def _current_values(model, object_ids):
+    """Field values (attnames) of ``model``'s existing rows, as audit data stores them."""
+    attnames = [field.attname for field in model._meta.concrete_fields]
+    rows = model._base_manager.filter(pk__in=object_ids).values(*attnames)
+    return {row[model._meta.pk.attname]: _jsonable(row) for row in rows}
+
+
+def _audit_changes(models, since, until, chunk_size):
+    """Changes recorded as ``AuditEvent`` before/after data for ``models``."""
+    from django.contrib.contenttypes.models import ContentType
+    from audit.models import AuditEvent
+
+    content_types = ContentType.objects.get_for_models(*models)
+    labels = {content_type.pk: model._meta.label_lower for model, content_type in content_types.items()}
+    models_by_type = {content_type.pk: model for model, content_type in content_types.items()}
+    events = AuditEvent.objects.filter(
+        created_at__gte=since, created_at__lt=until,
+        audit_log__content_type_id__in=list(labels),
+        audit_log__event_type__in=list(AUDIT_ACTIONS),
+    )
+    # (content type id, object id) -> field values as of the last replayed change
+    state = {}
+    last_pk = 0
+    while True:
+        chunk = list(events.filter(pk__gt=last_pk).order_by('pk').values(
+            'pk', 'created_at', 'before_data', 'after_data',
+            'audit_log__content_type_id', 'audit_log__object_id', 'audit_log__event_type',
+        )[:chunk_size])
+        if not chunk:
+            return
+
+        # Seed objects updated before anything about them was replayed
+        missing = {}
+        for row in chunk:
+            key = (row['audit_log__content_type_id'], row['audit_log__object_id'])
+            if row['audit_log__event_type'] == 'update' and key not in state and key[1] is not None:
+                missing.setdefault(key[0], set()).add(key[1])
+        for content_type_id, object_ids in missing.items():
+            for object_id, values in _current_values(models_by_type[content_type_id], object_ids).items():
+                state[(content_type_id, object_id)] = values
+
+        changes = []
+        for row in chunk:
+            action = AUDIT_ACTIONS[row['audit_log__event_type']]
+            key = (row['audit_log__content_type_id'], row['audit_log__object_id'])
+            before, after = row['before_data'] or {}, row['after_data'] or {}
+            old_values = None
+            if action == 'create':
+                new_values = state[key] = dict(after)
+            elif action == 'update':
+                known = state.get(key, {})
+                old_values = {**known, **before}
+                new_values = state[key] = {**known, **after}
+            else:
+                new_values = {**state.pop(key, {}), **before}
+            context = context_from_values(
+                labels[row['audit_log__content_type_id']], row['audit_log__object_id'],
+                action, new_values, old_values,
+            )
+            changes.append((row['created_at'], context))
+        yield changes
+        last_pk = chunk[-1]['pk']
+
+
+def _schedule_fires(trigger, since, until):
+    try:
+        cron, tz = parse_cron(trigger.schedule_cron), get_timezone(trigger.timezone)
+    except CronError:
+        return
+    when = cron.next_after(since - datetime.timedelta(microseconds=1), tz)
+    while when < until:
+        yield when
+        when = cron.next_after(when, tz)
+
+
+# Simulation
+
+def _evaluate(rules, contexts):
+    """Indices of ``contexts`` that pass every rule, narrowing rule by rule."""
+    indices = list(range(len(contexts)))
+    for rule in rules:
+        if not indices:
+            break
+        survivors = [contexts[index] for index in indices]
+        indices = [index for index, passed in zip(indices, rule.evaluate_batch(survivors)) if passed]
+    return indices
+
+
+def simulate(automation, since, until=None, chunk_size=DEFAULT_CHUNK_SIZE, sources=('history', 'audit')):
+    """
+    Replay changes in ``[since, until)`` against ``automation`` without
+    executing it, and return a ``SimulationReport``.
+
+    The automation's active triggers and rules are used as they are, so a
+    draft automation can be checked before it is activated.
+    """
+    started = time.perf_counter()
+    until = until or timezone.now()
+    report = SimulationReport(automation, since, until)
+    triggers = [trigger for trigger in automation.triggers.all() if trigger.is_active]
+    rules = [rule for rule in automation.rules.all() if rule.is_active and rule.conditions]
+    signal_types = {name for names in SIGNAL_TRIGGER_TYPES.values() for name in names}
+
+    def replay(chunks, model_triggers):
+        for changes in chunks:
+            report.events_scanned += len(changes)
+            matched = []
+            for when, context in changes:
+                trigger_id = None
+                for trigger in model_triggers[context['model']]:
+                    if trigger.trigger_type in signal_types and trigger.should_trigger(context):
+                        trigger_id = trigger.pk
+                        break
+                if trigger_id is not None:
+                    matched.append((when, trigger_id, context))
+            report.trigger_matches += len(matched)
+            for index in _evaluate(rules, [context for _when, _trigger_id, context in matched]):
+                when, trigger_id, _context = matched[index]
+                report.record(trigger_id, when)
+
+    models = _trigger_models(triggers)
+    by_label = {model._meta.label_lower: model_triggers for model, model_triggers in models.items()}
+    if 'history' in sources:
+        for model, model_triggers in models.items():
+            attnames = _referenced_attnames(model, model_triggers, rules)
+            replay(_history_changes(model, since, until, chunk_size, attnames), by_label)
+    audited = [model for model in models if getattr(model, 'history', None) is None or 'history' not in sources]
+    if 'audit' in sources and audited:
+        replay(_audit_changes(audited, since, until, chunk_size), by_label)
+
+    for trigger in triggers:
+        if trigger.trigger_type != 'on_schedule' or not trigger.schedule_cron:
+            continue
+        fires = list(_schedule_fires(trigger, since, until))
+        report.events_scanned += len(fires)
+        report.trigger_matches += len(fires)
+        contexts = [{'action': 'schedule', 'trigger_id': trigger.pk, 'scheduled_for': when.isoformat()}
+                    for when in fires]
+        for index in _evaluate(rules, contexts):
+            report.record(trigger.pk, fires[index])
+
+    report.elapsed = time.perf_counter() - started
+    return report
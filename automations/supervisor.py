@@ -0,0 +1,121 @@
+"""
+Supervision of running automation executions.
+
+* Deadlines: an execution must finish within its automation's
+  ``execution_timeout`` seconds of active time (waits for delayed actions
+  and retries extend the deadline). The runner checks the deadline and
+  cancellation between actions; ``reap_stuck_executions`` fails executions
+  whose worker died or never picked them up.
+* Concurrency: each team (or, for automations without a team, each owner)
+  may have at most ``AUTOMATION_TEAM_CONCURRENCY`` executions running
+  actions at once. Slots are members of a Redis sorted set scored by their
+  expiry, so a slot leaked by a crashed worker frees itself. Executions
+  that find no free slot are re-queued with a short countdown rather than
+  blocking a worker.
+"""
+import datetime
+import logging
+import random
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+SLOT_KEY = 'automations:running:{group}'
+
+# Seconds before an execution without a free slot tries again (plus jitter)
+SLOT_RETRY_DELAY = 5
+
+# Reap executions this many seconds past their deadline
+REAPER_GRACE = 60
+
+# Executions recorded without a deadline are reaped after this long
+UNTRACKED_TIMEOUT = 24 * 60 * 60
+
+# KEYS[1] slots; ARGV: member, limit, now, expires at. Returns 1 when acquired.
+ACQUIRE_SLOT_LUA = """
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', ARGV[3])
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+    return 1
+end
+if redis.call('ZCARD', KEYS[1]) < tonumber(ARGV[2]) then
+    redis.call('ZADD', KEYS[1], ARGV[4], ARGV[1])
+    redis.call('EXPIRE', KEYS[1], math.ceil(tonumber(ARGV[4]) - tonumber(ARGV[3])) + 60)
+    return 1
+end
+return 0
+"""
+
+_acquire_script = None
+
+
+def concurrency_group(automation):
+    if automation.team_id:
+        return f'team:{automation.team_id}'
+    return f'user:{automation.created_by_id}'
+
+
+def acquire_slot(execution):
+    """Take a running slot for ``execution``'s team; False when all are busy."""
+    global _acquire_script
+    limit = settings.AUTOMATION_TEAM_CONCURRENCY
+    if not limit:
+        return True
+    now = timezone.now()
+    expires = execution.deadline or now + datetime.timedelta(seconds=execution.automation.execution_timeout)
+    try:
+        if _acquire_script is None:
+            _acquire_script = get_redis().register_script(ACQUIRE_SLOT_LUA)
+        return bool(_acquire_script(
+            keys=[SLOT_KEY.format(group=concurrency_group(execution.automation))],
+            args=[execution.pk, limit, now.timestamp(), expires.timestamp()],
+        ))
+    except RedisError:
+        logger.warning('Automation concurrency limiter unavailable; running execution %s', execution.pk)
+        return True
+
+
+def release_slot(execution):
+    try:
+        get_redis().zrem(SLOT_KEY.format(group=concurrency_group(execution.automation)), execution.pk)
+    except RedisError:
+        pass
+
+
+def slot_retry_delay():
+    return SLOT_RETRY_DELAY + random.uniform(0, SLOT_RETRY_DELAY)
+
+
+def reap_stuck_executions(now=None):
+    """
+    Fail pending/running executions past their deadline (plus a grace period).
+
+    Returns the number of executions reaped.
+    """
+    from .models import AutomationExecution
+
+    now = now or timezone.now()
+    cutoff = now - datetime.timedelta(seconds=REAPER_GRACE)
+    stuck = AutomationExecution.objects.filter(status__in=['pending', 'running']).filter(
+        Q(deadline__lt=cutoff)
+        | Q(deadline__isnull=True, started_at__lt=cutoff - datetime.timedelta(seconds=UNTRACKED_TIMEOUT))
+    )
+    reaped = 0
+    for execution in stuck.select_related('automation').iterator():
+        updated = AutomationExecution.objects.filter(pk=execution.pk, status__in=['pending', 'running']).update(
+            status='failed',
+            completed_at=now,
+            error_message='Timed out: no progress before the execution deadline',
+        )
+        if updated:
+            release_slot(execution)
+            reaped += 1
+    if reaped:
+        logger.warning('Reaped %s stuck automation executions', reaped)
+    return reaped
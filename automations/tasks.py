@@ -0,0 +1,177 @@
+"""
+Celery tasks for workflow automations.
+"""
+import logging
+from datetime import timedelta
+
+from celery import shared_task
+from celery.exceptions import SoftTimeLimitExceeded
+from django.conf import settings
+from django.utils import timezone
+
+from inspora.ratelimit import consume
+from notifications_app.webhooks import WebhookError, backoff, dead_letter
+from . import counters, supervisor
+from .engine import chain_depth
+from .models import Automation, AutomationExecution
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task(soft_time_limit=settings.AUTOMATION_TASK_TIME_LIMIT)
+def run_automation(automation_id, trigger_id, context, triggered_by_id=None, depth=1):
+    """
+    Evaluate an automation's rules for ``context`` and run its actions.
+
+    ``depth`` is the position of this run in a chain of automations
+    triggering each other.
+    """
+    automation = Automation.objects.filter(pk=automation_id, is_active=True, status='active').first()
+    if automation is None:
+        return None
+
+    rules = automation.rules.filter(is_active=True)
+    if not all(rule.evaluate_conditions(context) for rule in rules):
+        return None
+
+    if not consume(f'automation:{automation_id}', automation.max_executions_per_hour, 60 * 60):
+        logger.warning('Automation %s exceeded %s executions per hour; skipped',
+                       automation_id, automation.max_executions_per_hour)
+        return None
+
+    now = timezone.now()
+    execution = AutomationExecution.objects.create(
+        automation=automation,
+        triggered_by_id=triggered_by_id,
+        trigger_context=context,
+        status='pending',
+        deadline=now + timedelta(seconds=automation.execution_timeout),
+    )
+    counters.increment('automation', automation_id, now)
+    if trigger_id is not None:
+        counters.increment('trigger', trigger_id, now)
+
+    run_actions(execution, context, depth=depth)
+    return execution.pk
+
+
+@shared_task
+def flush_automation_counters():
+    """Apply buffered execution and trigger counts to the database."""
+    return counters.flush_counters()
+
+
+@shared_task
+def reap_automation_executions():
+    """Fail executions stuck past their deadline."""
+    return supervisor.reap_stuck_executions()
+
+
+@shared_task(soft_time_limit=settings.AUTOMATION_TASK_TIME_LIMIT)
+def resume_automation(execution_id, context, position, attempt=0, depth=1, waited=True):
+    """Continue an execution after a wait for a delay, a retry or a free slot."""
+    execution = AutomationExecution.objects.select_related('automation').filter(pk=execution_id).first()
+    if execution is None or execution.status not in ('pending', 'running'):
+        return None
+    run_actions(execution, context, position, attempt, waited=waited, depth=depth)
+    return execution.pk
+
+
+def run_actions(execution, context, position=0, attempt=0, waited=False, depth=1):
+    """
+    Run the automation's active actions in ``order``, starting at ``position``.
+
+    An action with ``delay_seconds`` (or a failed action with retries left)
+    hands the rest of the run to ``resume_automation`` with a countdown
+    instead of sleeping in the worker. Retries back off exponentially from
+    the action's ``retry_delay``.
+
+    Actions only run while the execution holds one of its team's running
+    slots; without a free slot the run is re-queued. Between actions the
+    run stops if the execution was cancelled or its deadline passed.
+    """
+    if not supervisor.acquire_slot(execution):
+        # Time spent queued for a slot counts against the deadline
+        resume_automation.apply_async((execution.pk, context, position, attempt, depth, waited),
+                                      countdown=supervisor.slot_retry_delay())
+        return
+    token = chain_depth.set(depth)
+    try:
+        if execution.status == 'pending':
+            if AutomationExecution.objects.filter(pk=execution.pk, status='pending').update(status='running'):
+                execution.status = 'running'
+            else:
+                execution.refresh_from_db(fields=['status'])
+            if execution.status != 'running':
+                # Cancelled or reaped while queued
+                return
+        _run_actions(execution, context, position, attempt, waited, depth)
+    finally:
+        chain_depth.reset(token)
+        supervisor.release_slot(execution)
+
+
+def _wait(execution, context, position, attempt, depth, countdown):
+    """Hand the rest of the run to ``resume_automation`` after ``countdown`` seconds."""
+    execution.extend_deadline(countdown)
+    execution.flush_log()
+    AutomationExecution.objects.filter(pk=execution.pk).update(deadline=execution.deadline)
+    resume_automation.apply_async((execution.pk, context, position, attempt, depth), countdown=countdown)
+
+
+def _should_stop(execution):
+    """Stop between actions when cancelled or past the deadline."""
+    if execution.is_cancelled():
+        execution.add_log_entry('Cancelled', level='warning')
+        execution.flush_log()
+        return True
+    if execution.deadline and timezone.now() > execution.deadline:
+        execution.add_log_entry(
+            f'Timed out after {execution.automation.execution_timeout}s', level='error'
+        )
+        execution.complete(success=False, error_message='Timed out')
+        return True
+    return False
+
+
+def _run_actions(execution, context, position, attempt, waited, depth):
+    actions = list(execution.automation.actions.filter(is_active=True))
+    while position < len(actions):
+        if _should_stop(execution):
+            return
+        action = actions[position]
+        if action.delay_seconds and not waited:
+            execution.add_log_entry(f'Waiting {action.delay_seconds}s before "{action.name}"', action=action)
+            _wait(execution, context, position, 0, depth, action.delay_seconds)
+            return
+        waited = False
+
+        try:
+            result = action.execute(context)
+        except SoftTimeLimitExceeded:
+            execution.add_log_entry(f'"{action.name}" exceeded the task time limit', level='error', action=action)
+            execution.complete(success=False, error_message='Timed out')
+            return
+        except Exception as e:
+            logger.warning('Automation action %s failed (attempt %s): %s', action.pk, attempt + 1, e)
+            if attempt < action.retry_count:
+                delay = backoff(attempt, action.retry_delay)
+                execution.add_log_entry(
+                    f'"{action.name}" failed: {e}; retrying in {delay:.0f}s', level='warning', action=action
+                )
+                _wait(execution, context, position, attempt + 1, depth, delay)
+                return
+            execution.add_log_entry(f'"{action.name}" failed: {e}', level='error', action=action)
+            if isinstance(e, WebhookError):
+                letter = dead_letter(e, attempts=attempt + 1)
+                execution.add_log_entry(f'Webhook kept as dead letter {letter.pk}', level='warning', action=action)
+            execution.complete(success=False, error_message=str(e))
+            return
+
+        execution.add_log_entry(f'"{action.name}" completed: {result}', action=action)
+        execution.flush_log()
+        position += 1
+        attempt = 0
+
+    if not _should_stop(execution):
+        execution.complete(success=True)
@@ -8,11 +8,12 @@ from django.contrib.auth import get_user_model
 from django.core.validators import MinValueValidator, MaxValueValidator
 from simple_history.models import HistoricalRecords
 from accounts.models import Team
+from audit.mixins import FieldTrackingMixin
 
 User = get_user_model()
 
 
-class Goal(models.Model):
+class Goal(FieldTrackingMixin, models.Model):
     """
     Goal model for setting and tracking objectives.
     """
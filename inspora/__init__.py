@@ -1 +1,5 @@
 # Inspora - Asana-Inspired Work Management Platform
+
+from .celery import app as celery_app
+
+__all__ = ('celery_app',)
@@ -24,7 +24,10 @@ def api_root(request):
             'apps': {
                 'accounts': '/api/accounts/',
                 'projects': '/api/projects/',
-                'tasks': '/api/tasks/'
+                'tasks': '/api/tasks/',
+                'automations': '/api/automations/',
+                'audit': '/api/audit/',
+                'notifications': '/api/notifications/'
             }
         }
     })
@@ -42,4 +45,7 @@ urlpatterns = [
     path('accounts/', include('accounts.api_urls')),
     path('projects/', include('projects.api_urls')),
     path('tasks/', include('tasks.api_urls')),
+    path('automations/', include('automations.api_urls')),
+    path('audit/', include('audit.api_urls')),
+    path('notifications/', include('notifications_app.api_urls')),
 ]
@@ -0,0 +1,12 @@
+"""
+Celery application for Inspora platform.
+"""
+import os
+
+from celery import Celery
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'inspora.settings')
+
+app = Celery('inspora')
+app.config_from_object('django.conf:settings', namespace='CELERY')
+app.autodiscover_tasks()
@@ -0,0 +1,57 @@
+"""
+Client IP address of a request for Inspora platform.
+
+``X-Forwarded-For`` can be set by any client, so it is only used when the
+request comes from one of ``TRUSTED_PROXIES`` (addresses or networks).
+Then the header is read from the right, skipping trusted proxies, and the
+first other address is the client. Values that are not IP addresses are
+dropped.
+"""
+import ipaddress
+
+from django.conf import settings
+
+
+def _parse(value):
+    try:
+        return ipaddress.ip_address((value or '').strip())
+    except ValueError:
+        return None
+
+
+def _trusted_networks():
+    networks = []
+    for proxy in settings.TRUSTED_PROXIES:
+        try:
+            networks.append(ipaddress.ip_network(proxy, strict=False))
+        except ValueError:
+            continue
+    return networks
+
+
+def _is_trusted(address, networks):
+    return any(address.version == network.version and address in network for network in networks)
+
+
+def clean_ip(value):
+    """``value`` as a normalised IP address string, or ``None`` when it is not one."""
+    address = _parse(value) if isinstance(value, str) else None
+    return str(address) if address is not None else None
+
+
+def get_client_ip(request):
+    """The client's IP address as a string, or ``None`` when it is unknown or invalid."""
+    address = _parse(request.META.get('REMOTE_ADDR'))
+    if address is None:
+        return None
+    networks = _trusted_networks()
+    if networks and _is_trusted(address, networks):
+        forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '').strip()
+        for value in (reversed(forwarded.split(',')) if forwarded else ()):
+            hop = _parse(value)
+            if hop is None:
+                return None
+            address = hop
+            if not _is_trusted(hop, networks):
+                break
+    return str(address)
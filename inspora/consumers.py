@@ -6,6 +6,7 @@ from channels.generic.websocket import AsyncWebsocketConsumer
 from channels.db import database_sync_to_async
 from django.contrib.auth.models import AnonymousUser
 from django.contrib.auth import get_user_model
+from accounts.permissions import resolve_permissions
 
 User = get_user_model()
 
@@ -49,6 +50,12 @@ class ProjectConsumer(AsyncWebsocketConsumer):
         self.project_id = self.scope['url_route']['kwargs']['project_id']
         self.room_group_name = f'project_{self.project_id}'
 
+        # Only project members may follow the project's activity
+        permissions = await database_sync_to_async(resolve_permissions)(self.scope['user'])
+        if not permissions.is_project_member(self.project_id):
+            await self.close()
+            return
+
         # Join room group
         await self.channel_layer.group_add(
             self.room_group_name,
@@ -85,6 +92,13 @@ class ProjectConsumer(AsyncWebsocketConsumer):
             'user': event['user']
         }))
 
+    async def project_activity(self, event):
+        """Send a new activity feed entry to WebSocket."""
+        await self.send(text_data=json.dumps({
+            'type': 'project_activity',
+            'activity': event['activity']
+        }))
+
 class TaskConsumer(AsyncWebsocketConsumer):
     async def connect(self):
         self.task_id = self.scope['url_route']['kwargs']['task_id']
@@ -0,0 +1,31 @@
+"""
+Database helpers shared across Inspora apps.
+"""
+from django.db import connections
+
+BULK_BATCH_SIZE = 1000
+
+
+def bulk_create_with_pks(model, objs, readback, batch_size=BULK_BATCH_SIZE, using='default'):
+    """
+    ``bulk_create`` ``objs`` and guarantee every object has its pk set.
+
+    PostgreSQL and SQLite return primary keys from the bulk INSERT. On
+    backends that cannot (MySQL), ``readback`` - a queryset matching exactly
+    the rows just inserted - is read back ordered by pk; auto-increment keys
+    are assigned in insertion order within a transaction, so they zip back
+    onto ``objs``. Call this inside ``transaction.atomic()``.
+    """
+    created = model.objects.using(using).bulk_create(objs, batch_size=batch_size)
+    if not created or connections[using].features.can_return_rows_from_bulk_insert:
+        return created
+
+    pks = list(readback.using(using).order_by('pk').values_list('pk', flat=True))
+    if len(pks) != len(created):
+        raise RuntimeError(
+            f'Expected {len(created)} new {model._meta.label} rows, read back {len(pks)}'
+        )
+    for obj, pk in zip(created, pks):
+        obj.pk = pk
+        obj._state.adding = False
+    return created
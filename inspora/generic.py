@@ -0,0 +1,98 @@
+"""
+Bulk resolution of generic foreign keys for Inspora project.
+
+Audit logs and notifications point at tasks, projects, goals, etc. through
+``content_type``/``object_id``. Reading ``content_object`` row by row costs
+one query per row; ``resolve_related_objects`` groups rows by content type
+and loads each type with one ``in_bulk`` query, then caches the result on
+the generic foreign key so ``content_object`` and ``get_related_object()``
+read it without further queries. Rows whose object was deleted, or whose
+model no longer exists, resolve to ``None``.
+
+Querysets get the same as a prefetch-style method::
+
+    Notification.objects.filter(recipient=user).with_related_objects()[:100]
+"""
+from collections import defaultdict
+
+from django.contrib.contenttypes.fields import GenericForeignKey
+from django.contrib.contenttypes.models import ContentType
+from django.db import models
+from django.db.models.query import ModelIterable
+
+
+def _generic_field(model, name):
+    for field in model._meta.private_fields:
+        if isinstance(field, GenericForeignKey) and field.name == name:
+            return field
+    raise ValueError(f'{model.__name__} has no generic foreign key {name!r}')
+
+
+def resolve_related_objects(instances, field='content_object'):
+    """Load the ``field`` targets of ``instances`` with one query per content type."""
+    instances = list(instances)
+    if not instances:
+        return instances
+    gfk = _generic_field(type(instances[0]), field)
+    ct_attname = gfk.model._meta.get_field(gfk.ct_field).attname
+
+    ids_by_type = defaultdict(set)
+    for instance in instances:
+        ct_id = getattr(instance, ct_attname)
+        object_id = getattr(instance, gfk.fk_field)
+        if ct_id is not None and object_id is not None:
+            ids_by_type[ct_id].add(object_id)
+
+    found = {}
+    for ct_id, ids in ids_by_type.items():
+        model = ContentType.objects.get_for_id(ct_id).model_class()
+        if model is None:
+            # Stale content type of a removed model
+            continue
+        for pk, obj in model._base_manager.using(instances[0]._state.db).in_bulk(ids).items():
+            found[(ct_id, pk)] = obj
+
+    for instance in instances:
+        gfk.set_cached_value(instance, found.get((getattr(instance, ct_attname), getattr(instance, gfk.fk_field))))
+    return instances
+
+
+def get_related_object(instance, field='content_object'):
+    """The target of ``instance``'s generic foreign key, or ``None`` when unset or gone."""
+    gfk = _generic_field(type(instance), field)
+    if not gfk.is_cached(instance):
+        resolve_related_objects([instance], field)
+    return gfk.get_cached_value(instance)
+
+
+def related_object_data(instance, field='content_object'):
+    """``{'type': 'app_label.model', 'id': ..., 'name': ...}`` for API payloads, or ``None``."""
+    obj = get_related_object(instance, field)
+    if obj is None:
+        return None
+    return {'type': obj._meta.label_lower, 'id': obj.pk, 'name': str(obj)}
+
+
+class GenericRelatedQuerySet(models.QuerySet):
+    """QuerySet whose ``with_related_objects()`` resolves the generic foreign key in bulk."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._related_object_fields = ()
+
+    def with_related_objects(self, field='content_object'):
+        clone = self._chain()
+        clone._related_object_fields = (*self._related_object_fields, field)
+        return clone
+
+    def _clone(self):
+        clone = super()._clone()
+        clone._related_object_fields = self._related_object_fields
+        return clone
+
+    def _fetch_all(self):
+        fetched = self._result_cache is None
+        super()._fetch_all()
+        if fetched and self._related_object_fields and issubclass(self._iterable_class, ModelIterable):
+            for field in self._related_object_fields:
+                resolve_related_objects(self._result_cache, field)
@@ -0,0 +1,39 @@
+"""
+Shared API view mixins for Inspora project.
+"""
+import hashlib
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils.http import parse_etags, quote_etag
+from rest_framework import status
+from rest_framework.response import Response
+
+
+class ETagRetrieveMixin:
+    """
+    Add ETag / If-None-Match support to detail endpoints.
+
+    The ETag is a digest of the serialized representation, so it changes
+    whenever anything the client can see changes (including annotated
+    counts and nested rows). A matching If-None-Match returns 304 with no
+    body.
+    """
+
+    def get_etag(self, data):
+        """Return the (unquoted) entity tag for serialized ``data``."""
+        payload = json.dumps(data, sort_keys=True, cls=DjangoJSONEncoder)
+        return hashlib.md5(payload.encode('utf-8')).hexdigest()
+
+    def retrieve(self, request, *args, **kwargs):
+        instance = self.get_object()
+        data = self.get_serializer(instance).data
+        etag = quote_etag(self.get_etag(data))
+
+        if_none_match = request.META.get('HTTP_IF_NONE_MATCH')
+        if if_none_match:
+            client_etags = parse_etags(if_none_match)
+            if etag in client_etags or '*' in client_etags:
+                return Response(status=status.HTTP_304_NOT_MODIFIED, headers={'ETag': etag})
+
+        return Response(data, headers={'ETag': etag})
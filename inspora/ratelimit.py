@@ -0,0 +1,125 @@
+"""
+Shared rate limiting for Inspora platform.
+
+Limits are token buckets: ``capacity`` tokens refilled evenly over
+``period`` seconds, so ``consume('automation:7', 100, 3600)`` allows bursts
+of up to 100 and a sustained 100 per hour. Buckets live in Redis and are
+updated by a Lua script, which makes check-and-consume atomic across
+processes. With ``RATE_LIMIT_BACKEND = 'memory'`` (tests), or while Redis
+is unreachable, buckets are kept per process instead.
+"""
+import logging
+import threading
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from inspora.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = 'ratelimit:'
+
+# KEYS[1] bucket; ARGV: capacity, period (s), cost. Returns {allowed, tokens left}.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local period = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + (now - ts) * capacity / period)
+local allowed = 0
+if tokens >= cost then
+    tokens = tokens - cost
+    allowed = 1
+end
+
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(period))
+return {allowed, tostring(tokens)}
+"""
+
+
+class MemoryTokenBucket:
+    """Per-process token buckets with the same semantics as the Lua script."""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def consume(self, key, capacity, period, cost=1):
+        now = time.monotonic()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + (now - ts) * capacity / period)
+            allowed = tokens >= cost
+            if allowed:
+                tokens -= cost
+            self._buckets[key] = (tokens, now)
+        return allowed
+
+    def reset(self, key=None):
+        with self._lock:
+            if key is None:
+                self._buckets.clear()
+            else:
+                self._buckets.pop(key, None)
+
+
+class RedisTokenBucket:
+    def __init__(self, fallback):
+        self.fallback = fallback
+        self._script = None
+
+    def consume(self, key, capacity, period, cost=1):
+        try:
+            if self._script is None:
+                self._script = get_redis().register_script(TOKEN_BUCKET_LUA)
+            allowed, _tokens = self._script(keys=[KEY_PREFIX + key], args=[capacity, period, cost])
+            return bool(allowed)
+        except RedisError:
+            logger.warning('Rate limiter unavailable; applying per-process limit for %s', key)
+            return self.fallback.consume(key, capacity, period, cost)
+
+    def reset(self, key=None):
+        self.fallback.reset(key)
+        if key is not None:
+            try:
+                get_redis().delete(KEY_PREFIX + key)
+            except RedisError:
+                pass
+
+
+memory_bucket = MemoryTokenBucket()
+redis_bucket = RedisTokenBucket(fallback=memory_bucket)
+
+
+def get_bucket():
+    if getattr(settings, 'RATE_LIMIT_BACKEND', 'redis') == 'memory':
+        return memory_bucket
+    return redis_bucket
+
+
+def consume(key, capacity, period, cost=1):
+    """
+    Take ``cost`` tokens from bucket ``key``; False when the limit is exhausted.
+
+    A ``capacity`` of 0 means unlimited.
+    """
+    if not capacity:
+        return True
+    return get_bucket().consume(key, capacity, period, cost)
+
+
+def reset(key=None):
+    get_bucket().reset(key)
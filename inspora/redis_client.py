@@ -0,0 +1,15 @@
+"""
+Shared Redis connection for Inspora project.
+"""
+import redis
+from django.conf import settings
+
+_client = None
+
+
+def get_redis():
+    """Return the process-wide Redis client for ``settings.REDIS_URL``."""
+    global _client
+    if _client is None:
+        _client = redis.Redis.from_url(settings.REDIS_URL)
+    return _client
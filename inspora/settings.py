@@ -57,8 +57,10 @@ MIDDLEWARE = [
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'accounts.middleware.SessionTrackingMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'audit.middleware.AuditMiddleware',
     
 ]
 
@@ -134,6 +136,13 @@ STATICFILES_DIRS = [
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Project archival
+PROJECT_ARCHIVE_ROOT = config('PROJECT_ARCHIVE_ROOT', default=str(BASE_DIR / 'archives'))
+PROJECT_ARCHIVE_AFTER_DAYS = config('PROJECT_ARCHIVE_AFTER_DAYS', default=180, cast=int)
+
+# Activity feeds (entries kept per project/user timeline in Redis)
+ACTIVITY_FEED_LENGTH = config('ACTIVITY_FEED_LENGTH', default=200, cast=int)
+
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
@@ -206,6 +215,87 @@ CELERY_ACCEPT_CONTENT = ['json']
 CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = TIME_ZONE
+# Run tasks inline (no worker) in development and tests
+CELERY_TASK_ALWAYS_EAGER = config('CELERY_TASK_ALWAYS_EAGER', default=False, cast=bool)
+CELERY_BEAT_SCHEDULE = {
+    'flush-automation-counters': {
+        'task': 'automations.tasks.flush_automation_counters',
+        'schedule': 60.0,
+    },
+    'reap-automation-executions': {
+        'task': 'automations.tasks.reap_automation_executions',
+        'schedule': 60.0,
+    },
+    'drain-audit-stream': {
+        'task': 'audit.tasks.drain_audit_stream',
+        'schedule': 10.0,
+    },
+    'apply-audit-retention': {
+        'task': 'audit.tasks.apply_audit_retention',
+        'schedule': 24 * 60 * 60.0,
+    },
+    'seal-audit-chain': {
+        'task': 'audit.tasks.seal_audit_chain',
+        'schedule': 60 * 60.0,
+    },
+    'flush-session-activity': {
+        'task': 'accounts.tasks.flush_session_activity',
+        'schedule': 60.0,
+    },
+    'aggregate-session-stats': {
+        'task': 'accounts.tasks.aggregate_session_stats',
+        'schedule': 60 * 60.0,
+    },
+}
+
+# Proxies whose X-Forwarded-For header is trusted for the client IP (addresses or networks)
+TRUSTED_PROXIES = config('TRUSTED_PROXIES', default='', cast=lambda v: [s.strip() for s in v.split(',') if s.strip()])
+
+# Rate limiting ('redis', or 'memory' for per-process buckets in tests)
+RATE_LIMIT_BACKEND = config('RATE_LIMIT_BACKEND', default='redis')
+
+# Session tracking: seconds between recorded activity of one session
+SESSION_ACTIVITY_INTERVAL = config('SESSION_ACTIVITY_INTERVAL', default=5 * 60, cast=int)
+
+# Audit logging
+AUDIT_ENABLED = config('AUDIT_ENABLED', default=True, cast=bool)
+AUDIT_BUFFER_SIZE = 500  # queued events that trigger a flush
+AUDIT_FLUSH_INTERVAL = 5  # seconds the oldest queued event may wait
+# 'redis' spills queued events to a Redis stream written by drain_audit_stream
+# (batches that fail to write directly are spilled there either way)
+AUDIT_SPILL = config('AUDIT_SPILL', default='')
+AUDIT_PARTITION_MONTHS_AHEAD = 3  # monthly partitions created ahead (PostgreSQL)
+AUDIT_RETENTION_CHUNK_SIZE = 5000  # logs deleted per statement where partitions are not dropped
+AUDIT_EXPORT_ROOT = config('AUDIT_EXPORT_ROOT', default=str(BASE_DIR / 'exports' / 'audit'))
+AUDIT_EXPORT_CHUNK_SIZE = 2000  # rows fetched per round trip while exporting
+# Days fine-grained dashboard rollups are kept (day rollups are kept indefinitely)
+AUDIT_ROLLUP_RETENTION_DAYS = {'minute': 2, 'hour': 90}
+AUDIT_EXCLUDED_APPS = {'audit', 'admin', 'sessions', 'contenttypes', 'migrations'}
+AUDIT_EXCLUDED_MODELS = {
+    'automations.automationexecution',
+    'automations.automationexecutionlog',
+    'projects.projectactivity',
+    'notifications_app.notification',
+}
+# Field values never written to audit events: a field name, or app_label.model.field
+AUDIT_REDACTED_FIELDS = {'password'}
+
+# Outgoing webhooks
+WEBHOOK_SIGNING_SECRET = config('WEBHOOK_SIGNING_SECRET', default='')
+WEBHOOK_TIMEOUT = config('WEBHOOK_TIMEOUT', default=10, cast=int)  # seconds per attempt
+WEBHOOK_POOL_HOSTS = 50  # hosts with pooled connections
+WEBHOOK_POOL_SIZE = 20  # keep-alive connections per host
+WEBHOOK_MAX_BACKOFF = 60 * 60  # seconds
+
+# Workflow automations
+# Custom automation actions users may reference by name: {'name': 'dotted.path.to.callable'}
+AUTOMATION_CUSTOM_ACTIONS = {}
+# Automations triggered by other automations' actions stop past this depth
+AUTOMATION_MAX_CHAIN_DEPTH = config('AUTOMATION_MAX_CHAIN_DEPTH', default=5, cast=int)
+# Executions running actions at once per team (or per owner without a team); 0 for no limit
+AUTOMATION_TEAM_CONCURRENCY = config('AUTOMATION_TEAM_CONCURRENCY', default=4, cast=int)
+# Seconds a single automation task may run before its current action is interrupted
+AUTOMATION_TASK_TIME_LIMIT = config('AUTOMATION_TASK_TIME_LIMIT', default=600, cast=int)
 
 # Crispy Forms
 CRISPY_ALLOWED_TEMPLATE_PACKS = "bootstrap5"
@@ -0,0 +1,28 @@
+"""
+Admin configuration for notifications app.
+"""
+from django.contrib import admin, messages
+from .models import WebhookDeadLetter
+
+
+@admin.register(WebhookDeadLetter)
+class WebhookDeadLetterAdmin(admin.ModelAdmin):
+    list_display = ['id', 'event', 'url', 'source', 'status', 'attempts', 'last_status_code', 'created_at', 'replayed_at']
+    list_filter = ['status', 'event', 'created_at']
+    search_fields = ['url', 'source', 'delivery_id', 'last_error']
+    date_hierarchy = 'created_at'
+    readonly_fields = ['url', 'body', 'headers', 'event', 'source', 'delivery_id', 'attempts',
+                       'last_error', 'last_status_code', 'created_at', 'replayed_at']
+    actions = ['replay', 'discard']
+
+    @admin.action(description='Replay selected webhooks')
+    def replay(self, request, queryset):
+        letters = list(queryset.filter(status='pending'))
+        delivered = sum(letter.replay() for letter in letters)
+        level = messages.SUCCESS if delivered == len(letters) else messages.WARNING
+        self.message_user(request, f'Delivered {delivered} of {len(letters)} webhooks.', level)
+
+    @admin.action(description='Discard selected webhooks')
+    def discard(self, request, queryset):
+        updated = queryset.filter(status='pending').update(status='discarded')
+        self.message_user(request, f'Discarded {updated} webhooks.')
@@ -0,0 +1,27 @@
+"""
+API URLs for notifications app.
+"""
+from django.urls import path, include
+from django.http import JsonResponse
+from rest_framework.routers import SimpleRouter
+from . import api_views
+
+router = SimpleRouter()
+router.register('notifications', api_views.NotificationViewSet, basename='notification')
+
+def api_status(request):
+    """Simple API status endpoint for testing."""
+    return JsonResponse({
+        'status': 'success',
+        'message': 'Notifications API is working!',
+        'app': 'notifications',
+        'endpoints': {
+            'notifications': '/api/notifications/notifications/',
+        }
+    })
+
+urlpatterns = [
+    path('', api_status, name='api_status'),
+    path('status/', api_status, name='api_status_detail'),
+    path('', include(router.urls)),
+]
@@ -0,0 +1,22 @@
+"""
+API views for notifications app.
+"""
+from rest_framework import viewsets
+from .models import Notification
+from .serializers import NotificationSerializer
+
+
+class NotificationViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    The requester's notifications, with the objects they refer to resolved in bulk.
+    """
+    serializer_class = NotificationSerializer
+    filterset_fields = ['is_read', 'is_archived', 'notification_type', 'priority']
+    ordering_fields = ['created_at', 'priority']
+
+    def get_queryset(self):
+        return (
+            Notification.objects.filter(recipient=self.request.user)
+            .select_related('sender')
+            .with_related_objects()
+        )
@@ -0,0 +1,34 @@
+"""
+Management command to replay dead-lettered webhooks.
+"""
+from django.core.management.base import BaseCommand
+
+from notifications_app.models import WebhookDeadLetter
+
+
+class Command(BaseCommand):
+    help = 'Replay pending webhook dead letters'
+
+    def add_arguments(self, parser):
+        parser.add_argument('ids', nargs='*', type=int, help='Dead letter ids (default: all pending)')
+        parser.add_argument('--source', help='Only replay letters from this source, e.g. automation_action:7')
+        parser.add_argument('--limit', type=int, default=None, help='Replay at most this many')
+
+    def handle(self, *args, **options):
+        letters = WebhookDeadLetter.objects.filter(status='pending').order_by('created_at')
+        if options['ids']:
+            letters = letters.filter(pk__in=options['ids'])
+        if options['source']:
+            letters = letters.filter(source=options['source'])
+        if options['limit']:
+            letters = letters[:options['limit']]
+
+        delivered = failed = 0
+        for letter in letters.iterator():
+            if letter.replay():
+                delivered += 1
+            else:
+                failed += 1
+                self.stdout.write(self.style.WARNING(f'Failed {letter.pk} {letter.url}: {letter.last_error}'))
+
+        self.stdout.write(self.style.SUCCESS(f'Delivered {delivered} webhook(s), {failed} still failing'))
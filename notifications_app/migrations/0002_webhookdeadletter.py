@@ -0,0 +1,37 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notifications_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WebhookDeadLetter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('url', models.URLField(max_length=500)),
+                ('body', models.TextField()),
+                ('headers', models.JSONField(blank=True, default=dict)),
+                ('event', models.CharField(blank=True, max_length=100)),
+                ('source', models.CharField(blank=True, db_index=True, max_length=100)),
+                ('delivery_id', models.CharField(max_length=36)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('replayed', 'Replayed'), ('discarded', 'Discarded')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('last_error', models.TextField(blank=True)),
+                ('last_status_code', models.PositiveIntegerField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('replayed_at', models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                'verbose_name': 'Webhook Dead Letter',
+                'verbose_name_plural': 'Webhook Dead Letters',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['status', 'created_at'], name='notificatio_status_a7b20c_idx')],
+            },
+        ),
+    ]
@@ -9,6 +9,9 @@ from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
 from simple_history.models import HistoricalRecords
 
+from inspora.generic import GenericRelatedQuerySet, get_related_object
+from inspora.ratelimit import consume
+
 User = get_user_model()
 
 
@@ -69,6 +72,8 @@ class Notification(models.Model):
     # History tracking
     history = HistoricalRecords()
     
+    objects = GenericRelatedQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('Notification')
@@ -99,13 +104,8 @@ class Notification(models.Model):
             self.save(update_fields=['is_sent', 'sent_at'])
     
     def get_related_object(self):
-        """Get the related object if content_type and object_id are set."""
-        if self.content_type and self.object_id:
-            try:
-                return self.content_type.get_object_for_this_type(id=self.object_id)
-            except:
-                return None
-        return None
+        """Get the related object, or None if it is unset or no longer exists."""
+        return get_related_object(self)
 
 
 class NotificationTemplate(models.Model):
@@ -222,6 +222,9 @@ class NotificationChannel(models.Model):
     
     def send_notification(self, notification, context_data):
         """Send notification through this channel."""
+        if not consume(f'notification_channel:{self.pk}', self.rate_limit, 60 * 60):
+            # Over the channel's hourly limit
+            return False
         try:
             if self.channel_type == 'email':
                 return self._send_email(notification, context_data)
@@ -253,9 +256,44 @@ class NotificationChannel(models.Model):
         pass
     
     def _send_webhook(self, notification, context_data):
-        """Send webhook notification."""
-        # Implementation for webhook notifications
-        pass
+        """
+        Post the notification to ``config['url']``.
+
+        A failed attempt is retried in the background ``retry_count`` times.
+        """
+        from .tasks import deliver_webhook
+        from .webhooks import WebhookError, WebhookRequest, backoff, dead_letter, send
+        
+        request = WebhookRequest.build(
+            self.config['url'],
+            {
+                'notification': {
+                    'id': notification.pk,
+                    'title': notification.title,
+                    'message': notification.message,
+                    'type': notification.notification_type,
+                    'priority': notification.priority,
+                    'recipient': notification.recipient_id,
+                    'action_url': notification.action_url,
+                },
+                'context': context_data,
+            },
+            headers=self.config.get('headers'),
+            event='notification',
+            source=f'notification_channel:{self.pk}',
+        )
+        try:
+            send(request)
+        except WebhookError as e:
+            if self.retry_count:
+                deliver_webhook.apply_async(
+                    (request.to_dict(), 1, self.retry_count, self.retry_delay),
+                    countdown=backoff(0, self.retry_delay),
+                )
+            else:
+                dead_letter(e, attempts=1)
+            return False
+        return True
     
     def _send_custom(self, notification, context_data):
         """Send custom notification."""
@@ -365,3 +403,70 @@ class NotificationGroup(models.Model):
     def get_notifications_count(self):
         """Get count of notifications in this group."""
         return self.notifications.count()
+
+
+class WebhookDeadLetter(models.Model):
+    """
+    Webhook deliveries that failed after all retries, kept for replay.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('replayed', 'Replayed'),
+        ('discarded', 'Discarded'),
+    ]
+    
+    # Request
+    url = models.URLField(max_length=500)
+    body = models.TextField()
+    headers = models.JSONField(default=dict, blank=True)
+    event = models.CharField(max_length=100, blank=True)
+    source = models.CharField(max_length=100, blank=True, db_index=True)  # e.g. automation_action:7
+    delivery_id = models.CharField(max_length=36)
+    
+    # Delivery state
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+    last_status_code = models.PositiveIntegerField(null=True, blank=True)
+    
+    # Metadata
+    created_at = models.DateTimeField(auto_now_add=True)
+    replayed_at = models.DateTimeField(null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('Webhook Dead Letter')
+        verbose_name_plural = _('Webhook Dead Letters')
+        indexes = [
+            models.Index(fields=['status', 'created_at']),
+        ]
+    
+    def __str__(self):
+        return f"{self.event or 'webhook'} to {self.url} ({self.status})"
+    
+    def to_request(self):
+        from .webhooks import WebhookRequest
+        
+        return WebhookRequest(self.url, self.body, headers=self.headers, event=self.event,
+                              source=self.source, delivery_id=self.delivery_id)
+    
+    def replay(self):
+        """
+        Send the request again, keeping its delivery id so receivers can
+        de-duplicate. Returns whether it was delivered.
+        """
+        from django.utils import timezone
+        from .webhooks import WebhookError, send
+        
+        self.attempts += 1
+        try:
+            send(self.to_request())
+        except WebhookError as e:
+            self.last_error = str(e)
+            self.last_status_code = e.status_code
+            self.save(update_fields=['attempts', 'last_error', 'last_status_code'])
+            return False
+        self.status = 'replayed'
+        self.replayed_at = timezone.now()
+        self.save(update_fields=['attempts', 'status', 'replayed_at'])
+        return True
@@ -0,0 +1,23 @@
+"""
+Serializers for notifications app.
+"""
+from rest_framework import serializers
+from inspora.generic import related_object_data
+from .models import Notification
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    sender_username = serializers.CharField(source='sender.username', read_only=True, default=None)
+    related_object = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Notification
+        fields = [
+            'id', 'title', 'message', 'notification_type', 'priority',
+            'is_read', 'is_archived', 'data', 'action_url',
+            'sender', 'sender_username', 'related_object', 'created_at', 'read_at',
+        ]
+        read_only_fields = fields
+
+    def get_related_object(self, notification):
+        return related_object_data(notification)
@@ -0,0 +1,27 @@
+"""
+Celery tasks for notifications.
+"""
+from celery import shared_task
+
+from .webhooks import WebhookError, WebhookRequest, backoff, dead_letter, send
+
+
+@shared_task
+def deliver_webhook(request_data, attempt=0, retry_count=0, retry_delay=60):
+    """
+    Attempt a webhook delivery, rescheduling failures with backoff until
+    ``retry_count`` retries are used up, then dead-lettering it.
+    """
+    request = WebhookRequest.from_dict(request_data)
+    try:
+        return send(request)
+    except WebhookError as e:
+        if attempt < retry_count:
+            deliver_webhook.apply_async(
+                (request_data, attempt + 1, retry_count, retry_delay),
+                countdown=backoff(attempt, retry_delay),
+            )
+        else:
+            dead_letter(e, attempts=attempt + 1)
+        return None
+
@@ -0,0 +1,67 @@
+"""
+Local stand-in for webhook receivers, for tests and benchmarks.
+
+    with WebhookStubServer(responses=[500, 200]) as server:
+        send(WebhookRequest.build(server.url, {'ok': True}))
+        server.requests  # [(path, headers, body), ...]
+
+``responses`` are the status codes returned in turn; once used up every
+request gets ``default_status``.
+"""
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0))).decode()
+        status = self.server.stub.record(self.path, dict(self.headers), body)
+        self.send_response(status)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    def log_message(self, format, *args):
+        pass
+
+
+class WebhookStubServer:
+    def __init__(self, responses=None, default_status=200, record=True):
+        self.responses = list(responses or [])
+        self.default_status = default_status
+        self.keep_requests = record
+        self.requests = []
+        self.count = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(('127.0.0.1', 0), _Handler)
+        self._server.daemon_threads = True
+        self._server.stub = self
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self._server.server_address
+        return f'http://{host}:{port}/hook'
+
+    def record(self, path, headers, body):
+        with self._lock:
+            self.count += 1
+            if self.keep_requests:
+                self.requests.append((path, headers, body))
+            return self.responses.pop(0) if self.responses else self.default_status
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
@@ -0,0 +1,222 @@
+"""
+Webhook delivery for Inspora platform.
+
+Automation ``webhook`` actions and ``webhook`` notification channels post
+JSON through one process-wide ``requests.Session``, whose adapter keeps a
+pool of keep-alive connections per host. Each attempt is signed with
+HMAC-SHA256 over ``"<timestamp>.<body>"``::
+
+    X-Inspora-Signature: t=1700000000,v1=<hex digest>
+
+using the ``secret`` of the action or channel config, or
+``settings.WEBHOOK_SIGNING_SECRET``. Secrets are looked up from the
+request's ``source`` at send time, so they never travel through Celery or
+the dead-letter table.
+
+Failed attempts are retried with exponential backoff and jitter; requests
+that exhaust their retries are kept as ``WebhookDeadLetter`` rows that can
+be replayed.
+"""
+import hashlib
+import hmac
+import json
+import os
+import random
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from requests.adapters import HTTPAdapter
+
+SIGNATURE_HEADER = 'X-Inspora-Signature'
+DELIVERY_HEADER = 'X-Inspora-Delivery'
+EVENT_HEADER = 'X-Inspora-Event'
+
+# Receivers should reject signatures older than this (seconds)
+SIGNATURE_TOLERANCE = 5 * 60
+
+
+class WebhookError(Exception):
+    """A delivery attempt failed; ``request`` is the ``WebhookRequest`` sent."""
+
+    def __init__(self, message, request, status_code=None):
+        super().__init__(message)
+        self.request = request
+        self.status_code = status_code
+
+
+class WebhookRequest:
+    """One webhook payload, serialised once and re-signed on every attempt."""
+    __slots__ = ('url', 'body', 'headers', 'event', 'source', 'delivery_id')
+
+    def __init__(self, url, body, headers=None, event='', source='', delivery_id=None):
+        self.url = url
+        self.body = body
+        self.headers = dict(headers or {})
+        self.event = event
+        self.source = source
+        self.delivery_id = delivery_id or str(uuid.uuid4())
+
+    @classmethod
+    def build(cls, url, payload, **kwargs):
+        body = json.dumps(payload, cls=DjangoJSONEncoder, separators=(',', ':'))
+        return cls(url, body, **kwargs)
+
+    def to_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(**data)
+
+
+# Signing
+
+def sign(secret, body, timestamp=None):
+    timestamp = int(time.time() if timestamp is None else timestamp)
+    digest = hmac.new(secret.encode(), f'{timestamp}.{body}'.encode(), hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={digest}'
+
+
+def verify_signature(secret, body, header, tolerance=SIGNATURE_TOLERANCE):
+    """Check a ``X-Inspora-Signature`` header, as a receiver would."""
+    try:
+        parts = dict(part.split('=', 1) for part in header.split(','))
+        timestamp = int(parts['t'])
+    except (KeyError, ValueError):
+        return False
+    if abs(time.time() - timestamp) > tolerance:
+        return False
+    return hmac.compare_digest(sign(secret, body, timestamp), header)
+
+
+def signing_secret(source):
+    """Secret for a ``source`` such as ``automation_action:7`` or ``notification_channel:3``."""
+    kind, _, pk = source.partition(':')
+    config = None
+    if kind == 'automation_action':
+        config = apps.get_model('automations', 'AutomationAction').objects.filter(
+            pk=pk).values_list('action_config', flat=True).first()
+    elif kind == 'notification_channel':
+        config = apps.get_model('notifications_app', 'NotificationChannel').objects.filter(
+            pk=pk).values_list('config', flat=True).first()
+    return (config or {}).get('secret') or settings.WEBHOOK_SIGNING_SECRET
+
+
+# Backoff
+
+def backoff(attempt, base, cap=None):
+    """
+    Seconds to wait before retry number ``attempt + 1``.
+
+    Doubles ``base`` per attempt up to ``cap`` and picks a random point in
+    the upper half of that window, so retries of a burst of failures spread
+    out instead of arriving together.
+    """
+    cap = settings.WEBHOOK_MAX_BACKOFF if cap is None else cap
+    window = min(cap, base * 2 ** attempt)
+    return window / 2 + random.uniform(0, window / 2)
+
+
+# Transport
+
+_session = None
+_session_pid = None
+_session_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide session with a connection pool per host."""
+    global _session, _session_pid
+    if _session is None or _session_pid != os.getpid():
+        with _session_lock:
+            if _session is None or _session_pid != os.getpid():
+                session = requests.Session()
+                adapter = HTTPAdapter(
+                    pool_connections=settings.WEBHOOK_POOL_HOSTS,
+                    pool_maxsize=settings.WEBHOOK_POOL_SIZE,
+                    max_retries=0,
+                )
+                session.mount('http://', adapter)
+                session.mount('https://', adapter)
+                _session, _session_pid = session, os.getpid()
+    return _session
+
+
+def send(request, timeout=None, secret=None):
+    """
+    Make one delivery attempt; return the response status code.
+
+    Raises ``WebhookError`` on connection errors and non-2xx responses.
+    """
+    secret = signing_secret(request.source) if secret is None else secret
+    headers = {
+        'Content-Type': 'application/json',
+        'User-Agent': 'Inspora-Webhooks/1.0',
+        DELIVERY_HEADER: request.delivery_id,
+        **request.headers,
+    }
+    if request.event:
+        headers[EVENT_HEADER] = request.event
+    if secret:
+        headers[SIGNATURE_HEADER] = sign(secret, request.body)
+
+    try:
+        response = get_session().post(
+            request.url, data=request.body.encode(), headers=headers,
+            timeout=timeout or settings.WEBHOOK_TIMEOUT,
+        )
+    except requests.RequestException as e:
+        raise WebhookError(f'{type(e).__name__}: {e}', request)
+    # Drain the body so the connection goes back to the pool
+    response.content
+    if not 200 <= response.status_code < 300:
+        raise WebhookError(f'HTTP {response.status_code}', request, response.status_code)
+    return response.status_code
+
+
+def send_many(webhook_requests, workers=16, timeout=None, secret=None):
+    """
+    Deliver many requests concurrently over the shared pool, one attempt each.
+
+    Returns ``(delivered, failures)`` where ``failures`` is a list of
+    ``WebhookError``.
+    """
+    secrets = {}
+    for request in webhook_requests:
+        if request.source not in secrets:
+            secrets[request.source] = signing_secret(request.source) if secret is None else secret
+
+    def attempt(request):
+        try:
+            send(request, timeout, secrets[request.source])
+        except WebhookError as e:
+            return e
+        return None
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        failures = [error for error in pool.map(attempt, webhook_requests) if error is not None]
+    return len(webhook_requests) - len(failures), failures
+
+
+def dead_letter(error, attempts):
+    """Keep a request that exhausted its retries for replay."""
+    from .models import WebhookDeadLetter
+
+    request = error.request
+    return WebhookDeadLetter.objects.create(
+        url=request.url,
+        body=request.body,
+        headers=request.headers,
+        event=request.event,
+        source=request.source,
+        delivery_id=request.delivery_id,
+        attempts=attempts,
+        last_error=str(error),
+        last_status_code=error.status_code,
+    )
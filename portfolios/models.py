@@ -9,6 +9,7 @@ from simple_history.models import HistoricalRecords
 from accounts.models import Team
 from projects.models import Project
 from goals.models import Goal
+from audit.mixins import FieldTrackingMixin
 
 User = get_user_model()
 
@@ -186,7 +187,7 @@ class PortfolioMetrics(models.Model):
         return None
 
 
-class PortfolioMember(models.Model):
+class PortfolioMember(FieldTrackingMixin, models.Model):
     """
     Members with access to portfolio.
     """
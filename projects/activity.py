@@ -0,0 +1,255 @@
+"""
+Project activity feeds for Inspora platform.
+
+Task, comment and membership changes are appended once to ``ProjectActivity``
+and, after the transaction commits, fanned out on write into Redis sorted
+sets: one timeline per project (``feed:project:{id}``) and one per member
+(``feed:user:{id}``), each trimmed to ``ACTIVITY_FEED_LENGTH`` entries and
+scored by timestamp. Reading a dashboard feed is then a single
+``ZREVRANGEBYSCORE`` instead of a union over several tables.
+
+Redis is an optimisation only: cold or unreachable timelines are served
+from (and rebuilt from) the ``ProjectActivity`` table.
+"""
+import json
+import logging
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from redis.exceptions import RedisError
+
+from audit.capture import current_request
+from inspora.redis_client import get_redis
+from .models import ProjectMember, ProjectActivity
+
+logger = logging.getLogger(__name__)
+
+PROJECT_FEED_KEY = 'feed:project:{project_id}'
+USER_FEED_KEY = 'feed:user:{user_id}'
+
+# Task fields whose changes are worth a feed entry
+TRACKED_TASK_FIELDS = ('title', 'status', 'priority', 'due_date', 'section_id', 'assignee_id')
+
+def _current_actor():
+    # The request audit.middleware.AuditMiddleware is handling, if any
+    request = current_request.get()
+    user = getattr(request, 'user', None)
+    if user is not None and user.is_authenticated:
+        return user
+    return None
+
+
+def serialize_activity(activity):
+    actor = activity.actor
+    return {
+        'id': activity.pk,
+        'project_id': activity.project_id,
+        'actor_id': activity.actor_id,
+        'actor': actor.username if actor else None,
+        'verb': activity.verb,
+        'target_type': activity.target_type,
+        'target_id': activity.target_id,
+        'summary': activity.summary,
+        'data': activity.data,
+        'created_at': activity.created_at,
+        'ts': activity.created_at.timestamp(),
+    }
+
+
+def _feed_entry(activity):
+    return json.dumps(serialize_activity(activity), cls=DjangoJSONEncoder, sort_keys=True)
+
+
+def _push(pipe, key, entries):
+    """Queue ``entries`` ({member: score}) onto ``key`` and trim it."""
+    pipe.zadd(key, entries)
+    pipe.zremrangebyrank(key, 0, -settings.ACTIVITY_FEED_LENGTH - 1)
+
+
+def record_activity(project_id, verb, target, summary, actor=None, data=None):
+    """
+    Append one activity to ``project_id``'s feed.
+
+    ``actor`` defaults to the user of the current request. Fan-out to Redis
+    and the project's WebSocket group happens once the transaction commits.
+    """
+    activity = ProjectActivity.objects.create(
+        project_id=project_id,
+        actor=actor or _current_actor(),
+        verb=verb,
+        target_type=target._meta.model_name,
+        target_id=target.pk,
+        summary=summary[:255],
+        data=data or {},
+    )
+    transaction.on_commit(lambda: publish_activity(activity))
+    return activity
+
+
+def publish_activity(activity):
+    """Fan ``activity`` out to the project timeline and every member's timeline."""
+    entry = _feed_entry(activity)
+    score = activity.created_at.timestamp()
+    member_ids = ProjectMember.objects.filter(
+        project_id=activity.project_id, is_active=True
+    ).values_list('user_id', flat=True)
+
+    try:
+        pipe = get_redis().pipeline(transaction=False)
+        _push(pipe, PROJECT_FEED_KEY.format(project_id=activity.project_id), {entry: score})
+        for user_id in member_ids:
+            _push(pipe, USER_FEED_KEY.format(user_id=user_id), {entry: score})
+        pipe.execute()
+    except RedisError:
+        logger.warning('Activity feed unavailable; activity %s not fanned out', activity.pk)
+
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    try:
+        async_to_sync(channel_layer.group_send)(f'project_{activity.project_id}', {
+            'type': 'project_activity',
+            'activity': json.loads(entry),
+        })
+    except (RedisError, OSError):
+        logger.warning('Could not broadcast activity %s', activity.pk)
+
+
+def _read(key, limit, before, rebuild):
+    """
+    Return up to ``limit`` entries of ``key`` older than ``before``, newest first.
+
+    ``rebuild`` returns the ``ProjectActivity`` rows for a cold key; they are
+    written back so the next read is served from Redis.
+    """
+    max_score = f'({before}' if before is not None else '+inf'
+    try:
+        client = get_redis()
+        pipe = client.pipeline(transaction=False)
+        pipe.exists(key)
+        pipe.zrevrangebyscore(key, max_score, '-inf', start=0, num=limit)
+        exists, entries = pipe.execute()
+    except RedisError:
+        logger.warning('Activity feed unavailable; reading %s from database', key)
+        return _from_rows(rebuild(), limit, before)
+
+    if exists:
+        return [json.loads(entry) for entry in entries]
+
+    rows = list(rebuild())
+    if rows:
+        try:
+            pipe = client.pipeline(transaction=False)
+            _push(pipe, key, {_feed_entry(row): row.created_at.timestamp() for row in rows})
+            pipe.execute()
+        except RedisError:
+            pass
+    return _from_rows(rows, limit, before)
+
+
+def _from_rows(rows, limit, before):
+    feed = []
+    for row in rows:
+        if before is not None and row.created_at.timestamp() >= before:
+            continue
+        feed.append(json.loads(_feed_entry(row)))
+        if len(feed) == limit:
+            break
+    return feed
+
+
+def get_project_feed(project_id, limit=20, before=None):
+    """Latest activity of one project."""
+    def rebuild():
+        return ProjectActivity.objects.filter(project_id=project_id).select_related('actor')[
+            :settings.ACTIVITY_FEED_LENGTH
+        ]
+
+    return _read(PROJECT_FEED_KEY.format(project_id=project_id), limit, before, rebuild)
+
+
+def get_user_feed(user, permissions, limit=20, before=None):
+    """
+    Latest activity across the projects ``user`` belongs to.
+
+    Entries from projects the user has since left are dropped on read, using
+    the already-resolved ``permissions`` snapshot.
+    """
+    project_ids = permissions.project_ids()
+
+    def rebuild():
+        return ProjectActivity.objects.filter(project_id__in=project_ids).select_related('actor')[
+            :settings.ACTIVITY_FEED_LENGTH
+        ]
+
+    feed = _read(USER_FEED_KEY.format(user_id=user.pk), limit, before, rebuild)
+    return [entry for entry in feed if entry['project_id'] in project_ids]
+
+
+# Signal handlers
+
+def _is_direct_delete(sender, origin):
+    """True when ``sender`` rows are deleted directly rather than by a cascade."""
+    model = getattr(origin, 'model', type(origin))
+    return model is sender
+
+
+def task_saved(sender, instance, created, **kwargs):
+    if kwargs.get('raw'):
+        return
+    if created:
+        record_activity(instance.project_id, 'task_created', instance,
+                        f'created task "{instance.title}"', actor=_current_actor() or instance.created_by)
+        return
+
+    diff = instance.get_field_diff()
+    changed = [name for name in TRACKED_TASK_FIELDS if name in diff]
+    if not changed:
+        return
+
+    if 'status' in changed and instance.status == 'completed':
+        verb, summary = 'task_completed', f'completed task "{instance.title}"'
+    elif changed == ['assignee_id'] and instance.assignee_id:
+        verb, summary = 'task_assigned', f'assigned task "{instance.title}" to {instance.assignee.username}'
+    else:
+        verb, summary = 'task_updated', f'updated task "{instance.title}"'
+    record_activity(instance.project_id, verb, instance, summary, data={'changed': changed})
+
+
+def task_deleted(sender, instance, origin=None, **kwargs):
+    if _is_direct_delete(sender, origin):
+        record_activity(instance.project_id, 'task_deleted', instance, f'deleted task "{instance.title}"')
+
+
+def comment_saved(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        task = instance.task
+        record_activity(task.project_id, 'comment_added', instance, f'commented on "{task.title}"',
+                        actor=instance.author, data={'task_id': task.pk})
+
+
+def member_saved(sender, instance, created, **kwargs):
+    if created and not kwargs.get('raw'):
+        record_activity(instance.project_id, 'member_joined', instance,
+                        f'added {instance.user.username} as {instance.role}',
+                        data={'user_id': instance.user_id, 'role': instance.role})
+
+
+def member_deleted(sender, instance, origin=None, **kwargs):
+    if _is_direct_delete(sender, origin):
+        record_activity(instance.project_id, 'member_removed', instance,
+                        f'removed {instance.user.username}', data={'user_id': instance.user_id})
+
+
+def connect_activity_signals():
+    from tasks.models import Task, TaskComment
+
+    post_save.connect(task_saved, sender=Task, dispatch_uid='activity_task_saved')
+    post_delete.connect(task_deleted, sender=Task, dispatch_uid='activity_task_deleted')
+    post_save.connect(comment_saved, sender=TaskComment, dispatch_uid='activity_comment_saved')
+    post_save.connect(member_saved, sender=ProjectMember, dispatch_uid='activity_member_saved')
+    post_delete.connect(member_deleted, sender=ProjectMember, dispatch_uid='activity_member_deleted')
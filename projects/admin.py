@@ -2,7 +2,7 @@
 Admin configuration for projects app.
 """
 from django.contrib import admin
-from .models import Project, ProjectSection, ProjectMember
+from .models import Project, ProjectSection, ProjectMember, ProjectActivity, ArchivedProject
 
 
 @admin.register(Project)
@@ -43,3 +43,23 @@ class ProjectMemberAdmin(admin.ModelAdmin):
     list_filter = ['role', 'is_active', 'project', 'joined_at']
     search_fields = ['user__username', 'project__name']
     list_editable = ['role', 'is_active']
+
+
+@admin.register(ProjectActivity)
+class ProjectActivityAdmin(admin.ModelAdmin):
+    list_display = ['summary', 'project', 'actor', 'verb', 'created_at']
+    list_filter = ['verb', 'created_at']
+    search_fields = ['summary', 'project__name', 'actor__username']
+    date_hierarchy = 'created_at'
+    list_select_related = ['project', 'actor']
+    raw_id_fields = ['project', 'actor']
+
+
+@admin.register(ArchivedProject)
+class ArchivedProjectAdmin(admin.ModelAdmin):
+    list_display = ['name', 'original_id', 'status', 'owner', 'team', 'task_count', 'snapshot_size', 'archived_at']
+    list_filter = ['status', 'team', 'archived_at']
+    search_fields = ['name', 'owner__username']
+    date_hierarchy = 'archived_at'
+    readonly_fields = [field.name for field in ArchivedProject._meta.fields]
+    filter_horizontal = ['members']
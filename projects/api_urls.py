@@ -1,8 +1,16 @@
 """
 API URLs for projects app.
 """
-from django.urls import path
+from django.urls import path, include
 from django.http import JsonResponse
+from rest_framework.routers import SimpleRouter
+from . import api_views
+
+router = SimpleRouter()
+router.register('projects', api_views.ProjectViewSet, basename='project')
+router.register('sections', api_views.ProjectSectionViewSet, basename='project-section')
+router.register('members', api_views.ProjectMemberViewSet, basename='project-member')
+router.register('archive', api_views.ArchivedProjectViewSet, basename='archived-project')
 
 def api_status(request):
     """Simple API status endpoint for testing."""
@@ -13,11 +21,15 @@ def api_status(request):
         'endpoints': {
             'projects': '/api/projects/projects/',
             'sections': '/api/projects/sections/',
-            'members': '/api/projects/members/'
+            'members': '/api/projects/members/',
+            'archive': '/api/projects/archive/',
+            'activity': '/api/projects/activity/'
         }
     })
 
 urlpatterns = [
     path('', api_status, name='api_status'),
     path('status/', api_status, name='api_status_detail'),
+    path('activity/', api_views.ActivityFeedView.as_view(), name='activity_feed'),
+    path('', include(router.urls)),
 ]
@@ -0,0 +1,231 @@
+"""
+API views for projects app.
+"""
+from django.db import transaction
+from django.db.models import Prefetch
+from rest_framework import permissions, status, viewsets
+from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.response import Response
+from rest_framework.views import APIView
+from accounts.permissions import get_permissions
+from inspora.mixins import ETagRetrieveMixin
+from .activity import get_project_feed, get_user_feed
+from .archive import ArchiveError, archive_project, read_snapshot, restore_project
+from .models import Project, ProjectSection, ProjectMember, ArchivedProject
+from .serializers import (
+    ProjectSerializer, ProjectDetailSerializer,
+    ProjectSectionSerializer, ProjectMemberSerializer, ProjectFromTemplateSerializer,
+    ArchivedProjectSerializer,
+)
+from .services import create_project_from_template
+
+
+FEED_PAGE_SIZE = 20
+FEED_MAX_PAGE_SIZE = 100
+
+
+def _feed_response(request, read_feed):
+    """
+    Page through a Redis activity timeline.
+
+    ``?before=<ts>`` continues from the ``next_before`` cursor of the
+    previous page; ``?limit=`` caps the page size.
+    """
+    try:
+        limit = min(int(request.query_params.get('limit', FEED_PAGE_SIZE)), FEED_MAX_PAGE_SIZE)
+        before = request.query_params.get('before')
+        before = float(before) if before else None
+    except ValueError:
+        raise ValidationError({'detail': 'limit and before must be numbers.'})
+    if limit < 1:
+        raise ValidationError({'limit': 'Must be a positive number.'})
+
+    feed = read_feed(limit, before)
+    return Response({
+        'results': feed,
+        'next_before': feed[-1]['ts'] if len(feed) == limit else None,
+    })
+
+
+class ProjectRolePermission(permissions.BasePermission):
+    """
+    Object-level check against the requester's ``ProjectMember`` flags.
+
+    Views declare which flag guards writes via ``write_permission``; deleting
+    or archiving a project additionally requires the owner role. Actions listed in a
+    view's ``member_actions`` only need membership.
+    """
+
+    def has_object_permission(self, request, view, obj):
+        if request.method in permissions.SAFE_METHODS or view.action in getattr(view, 'member_actions', ()):
+            # Querysets are already scoped to the requester's projects.
+            return True
+
+        project_id = obj.pk if isinstance(obj, Project) else obj.project_id
+        permission = view.write_permission
+        if isinstance(obj, Project) and view.action in ('destroy', 'archive'):
+            permission = 'is_owner'
+        return get_permissions(request).has_project_perm(project_id, permission)
+
+
+class ProjectViewSet(ETagRetrieveMixin, viewsets.ModelViewSet):
+    """
+    Projects the requester is an active member of.
+    """
+    permission_classes = [permissions.IsAuthenticated, ProjectRolePermission]
+    write_permission = 'can_edit_project'
+    member_actions = ('instantiate',)
+    filterset_fields = ['status', 'priority', 'team', 'is_template']
+    search_fields = ['name', 'description']
+    ordering_fields = ['created_at', 'updated_at', 'due_date', 'name', 'priority']
+    ordering = ['-created_at']
+
+    def get_queryset(self):
+        queryset = Project.objects.visible_to(self.request.user)
+
+        if self.action in ('destroy', 'instantiate', 'archive'):
+            return queryset
+
+        queryset = queryset.select_related('owner', 'team').with_task_counts()
+        if self.action == 'retrieve':
+            queryset = queryset.prefetch_related(
+                Prefetch('sections', queryset=ProjectSection.objects.with_task_counts()),
+                Prefetch('members', queryset=ProjectMember.objects.filter(is_active=True).select_related('user')),
+            )
+        return queryset
+
+    def get_serializer_class(self):
+        if self.action == 'retrieve':
+            return ProjectDetailSerializer
+        if self.action == 'instantiate':
+            return ProjectFromTemplateSerializer
+        return ProjectSerializer
+
+    @transaction.atomic
+    def perform_create(self, serializer):
+        project = serializer.save(owner=self.request.user)
+        ProjectMember.objects.create(project=project, user=self.request.user, role='owner')
+
+    @action(detail=True, methods=['post'])
+    def instantiate(self, request, pk=None):
+        """Create a new project from this template."""
+        template = self.get_object()
+        if not template.is_template:
+            return Response({'detail': 'Project is not a template.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        project = create_project_from_template(template, request.user, **serializer.validated_data)
+
+        project = Project.objects.select_related('owner', 'team').with_task_counts().get(pk=project.pk)
+        return Response(ProjectSerializer(project, context=self.get_serializer_context()).data,
+                        status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['post'])
+    def archive(self, request, pk=None):
+        """Move this project into cold storage."""
+        try:
+            archived = archive_project(self.get_object(), archived_by=request.user)
+        except ArchiveError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(ArchivedProjectSerializer(archived).data, status=status.HTTP_201_CREATED)
+
+    @action(detail=True, methods=['get'])
+    def activity(self, request, pk=None):
+        """Latest activity of this project, newest first."""
+        try:
+            project_id = int(pk)
+        except ValueError:
+            raise NotFound
+        # Membership comes from the permission snapshot, so reads never touch the project tables
+        if not get_permissions(request).is_project_member(project_id):
+            raise NotFound
+        return _feed_response(request, lambda limit, before: get_project_feed(project_id, limit, before))
+
+
+class ActivityFeedView(APIView):
+    """
+    Latest activity across every project the requester belongs to.
+    """
+    permission_classes = [permissions.IsAuthenticated]
+
+    def get(self, request):
+        user_permissions = get_permissions(request)
+        return _feed_response(
+            request, lambda limit, before: get_user_feed(request.user, user_permissions, limit, before)
+        )
+
+
+class ProjectSectionViewSet(ETagRetrieveMixin, viewsets.ModelViewSet):
+    """
+    Sections of projects the requester is an active member of.
+    """
+    serializer_class = ProjectSectionSerializer
+    permission_classes = [permissions.IsAuthenticated, ProjectRolePermission]
+    write_permission = 'can_edit_project'
+    filterset_fields = ['project']
+    search_fields = ['name']
+    ordering_fields = ['order', 'name']
+    ordering = ['order', 'name']
+
+    def get_queryset(self):
+        queryset = ProjectSection.objects.visible_to(self.request.user)
+        if self.action in ('list', 'retrieve'):
+            return queryset.with_task_counts()
+        return queryset
+
+
+class ProjectMemberViewSet(ETagRetrieveMixin, viewsets.ModelViewSet):
+    """
+    Memberships of projects the requester is an active member of.
+    """
+    serializer_class = ProjectMemberSerializer
+    permission_classes = [permissions.IsAuthenticated, ProjectRolePermission]
+    write_permission = 'can_manage_members'
+    filterset_fields = ['project', 'user', 'role', 'is_active']
+    ordering_fields = ['joined_at', 'role']
+
+    def get_queryset(self):
+        queryset = ProjectMember.objects.visible_to(self.request.user)
+        if self.action in ('list', 'retrieve'):
+            return queryset.select_related('user')
+        return queryset
+
+
+class ArchivedProjectViewSet(viewsets.ReadOnlyModelViewSet):
+    """
+    Read-only access to archived projects the requester was a member of.
+    """
+    serializer_class = ArchivedProjectSerializer
+    filterset_fields = ['status', 'team', 'owner']
+    search_fields = ['name']
+    ordering_fields = ['archived_at', 'name', 'project_created_at']
+
+    def get_queryset(self):
+        return ArchivedProject.objects.filter(members=self.request.user).select_related('owner')
+
+    @action(detail=True, methods=['get'])
+    def tasks(self, request, pk=None):
+        """Tasks stored in the archived snapshot."""
+        archived = self.get_object()
+        try:
+            tasks = [fields for _label, fields in read_snapshot(archived, model='tasks.task')]
+        except ArchiveError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+        page = self.paginate_queryset(tasks)
+        return self.get_paginated_response(page)
+
+    @action(detail=True, methods=['post'])
+    def restore(self, request, pk=None):
+        """Move an archived project back into the live tables."""
+        archived = self.get_object()
+        if archived.owner_id != request.user.pk and not request.user.is_staff:
+            return Response({'detail': 'Only the project owner can restore it.'}, status=status.HTTP_403_FORBIDDEN)
+        try:
+            project = restore_project(archived)
+        except ArchiveError as e:
+            return Response({'detail': str(e)}, status=status.HTTP_409_CONFLICT)
+
+        project = Project.objects.select_related('owner', 'team').with_task_counts().get(pk=project.pk)
+        return Response(ProjectSerializer(project, context=self.get_serializer_context()).data)
@@ -5,3 +5,7 @@ class ProjectsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'projects'
     verbose_name = 'Project Management'
+    
+    def ready(self):
+        from .activity import connect_activity_signals
+        connect_activity_signals()
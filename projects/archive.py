@@ -0,0 +1,289 @@
+"""
+Project archival for Inspora platform.
+
+Completed and cancelled projects older than ``PROJECT_ARCHIVE_AFTER_DAYS``
+are written to a gzipped JSON-lines snapshot under ``PROJECT_ARCHIVE_ROOT``
+and removed from the live tables, so list views and their ``-created_at``
+sorts only scan live work. Each snapshot line is ``{"model": ..., "fields":
+{...}}``; the first line is the project itself. Attachment files stay in
+media storage; only their metadata rows are archived.
+"""
+import gzip
+import hashlib
+import json
+import os
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from accounts.models import User, Team
+from accounts.permissions import bump_membership_version
+from portfolios.models import Portfolio, PortfolioProject
+from tasks.models import Task, TaskComment, TaskAttachment
+from .models import Project, ProjectSection, ProjectMember, ProjectActivity, ArchivedProject
+
+ARCHIVABLE_STATUSES = ('completed', 'cancelled')
+
+# Models in dependency order: restoring inserts them in this order.
+SNAPSHOT_MODELS = [
+    (Project, 'pk'),
+    (ProjectSection, 'project_id'),
+    (ProjectMember, 'project_id'),
+    (Task, 'project_id'),
+    (TaskComment, 'task__project_id'),
+    (TaskAttachment, 'task__project_id'),
+    (PortfolioProject, 'project_id'),
+    (ProjectActivity, 'project_id'),
+]
+
+# auto_now / auto_now_add columns are overwritten by bulk_create, so restore
+# writes the archived values back with bulk_update.
+TIMESTAMP_FIELDS = {
+    Project: ['created_at', 'updated_at'],
+    ProjectMember: ['joined_at'],
+    Task: ['created_at', 'updated_at'],
+    TaskComment: ['created_at', 'updated_at'],
+    TaskAttachment: ['uploaded_at'],
+    PortfolioProject: ['added_at'],
+    ProjectActivity: ['created_at'],
+}
+
+# User references in a snapshot, mapped to whether they are required.
+# Missing required users fall back to the project owner, optional ones to None.
+USER_FIELDS = {
+    'owner_id': True,
+    'user_id': True,
+    'created_by_id': True,
+    'author_id': True,
+    'uploaded_by_id': True,
+    'added_by_id': True,
+    'assignee_id': False,
+    'actor_id': False,
+}
+
+RESTORE_BATCH_SIZE = 1000
+
+
+class ArchiveError(Exception):
+    """Raised when a project cannot be archived or restored."""
+
+
+def archivable_projects(days=None, now=None):
+    """Finished, non-template projects untouched for at least ``days`` days."""
+    days = settings.PROJECT_ARCHIVE_AFTER_DAYS if days is None else days
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    return Project.objects.filter(
+        status__in=ARCHIVABLE_STATUSES, is_template=False, updated_at__lt=cutoff,
+    ).filter(Q(completed_date__isnull=True) | Q(completed_date__lt=cutoff.date()))
+
+
+def _snapshot_path(project):
+    root = Path(settings.PROJECT_ARCHIVE_ROOT)
+    stamp = timezone.now().strftime('%Y%m%d%H%M%S')
+    return root / str(project.created_at.year) / f'project-{project.pk}-{stamp}.jsonl.gz'
+
+
+def _write_snapshot(project, path):
+    """Stream every row of ``project`` into ``path``; return per-model counts."""
+    counts = {}
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + '.tmp')
+
+    with gzip.open(tmp_path, 'wt', encoding='utf-8') as snapshot:
+        for model, lookup in SNAPSHOT_MODELS:
+            label = model._meta.label_lower
+            rows = model.objects.filter(**{lookup: project.pk}).order_by('pk').values()
+            counts[label] = 0
+            for row in rows.iterator(chunk_size=2000):
+                snapshot.write(json.dumps({'model': label, 'fields': row}, cls=DjangoJSONEncoder))
+                snapshot.write('\n')
+                counts[label] += 1
+
+    with open(tmp_path, 'rb') as snapshot:
+        os.fsync(snapshot.fileno())
+    os.replace(tmp_path, path)
+    return counts
+
+
+def _file_checksum(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as snapshot:
+        for block in iter(lambda: snapshot.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def archive_project(project, archived_by=None):
+    """
+    Snapshot ``project`` to disk and delete it from the live tables.
+
+    One transaction locks the project and its tasks, writes and fsyncs the
+    snapshot, records the ``ArchivedProject`` and deletes the live rows.
+    The locks keep sections, members, tasks, comments and attachments from
+    being added while the snapshot is taken, so nothing is deleted without
+    being archived. If the transaction fails the snapshot file is removed
+    again.
+    """
+    if project.is_template:
+        raise ArchiveError('Templates cannot be archived.')
+
+    path = _snapshot_path(project)
+    try:
+        with transaction.atomic():
+            project = Project.objects.select_for_update().get(pk=project.pk)
+            list(Task.objects.select_for_update().filter(project=project).values_list('pk', flat=True))
+            counts = _write_snapshot(project, path)
+            member_ids = list(ProjectMember.objects.filter(project=project).values_list('user_id', flat=True))
+            archived = ArchivedProject.objects.create(
+                original_id=project.pk,
+                name=project.name,
+                status=project.status,
+                owner_id=project.owner_id,
+                team_id=project.team_id,
+                snapshot_path=str(path),
+                snapshot_size=path.stat().st_size,
+                checksum=_file_checksum(path),
+                task_count=counts['tasks.task'],
+                comment_count=counts['tasks.taskcomment'],
+                attachment_count=counts['tasks.taskattachment'],
+                project_created_at=project.created_at,
+                completed_date=project.completed_date,
+                archived_by=archived_by,
+            )
+            archived.members.set(member_ids)
+            project.delete()
+    except Exception:
+        path.unlink(missing_ok=True)
+        raise
+    return archived
+
+
+def read_snapshot(archived, model=None):
+    """Yield ``(model_label, fields)`` records from an archived snapshot."""
+    path = Path(archived.snapshot_path)
+    if not path.exists():
+        raise ArchiveError(f'Snapshot {path} is missing.')
+
+    with gzip.open(path, 'rt', encoding='utf-8') as snapshot:
+        for line in snapshot:
+            record = json.loads(line)
+            if model is None or record['model'] == model:
+                yield record['model'], record['fields']
+
+
+def _decode(model, fields):
+    """Turn a snapshot row back into an unsaved model instance."""
+    values = {}
+    for field in model._meta.concrete_fields:
+        if field.attname not in fields:
+            continue
+        value = fields[field.attname]
+        internal_type = field.get_internal_type()
+        if value is not None and internal_type == 'DateTimeField':
+            value = parse_datetime(value)
+        elif value is not None and internal_type == 'DateField':
+            value = parse_date(value)
+        elif value is not None and internal_type == 'DecimalField':
+            value = field.to_python(value)
+        values[field.attname] = value
+    return model(**values)
+
+
+def _task_depth_order(tasks):
+    """Order tasks so every parent is inserted before its subtasks."""
+    parents = {task.pk: task.parent_task_id for task in tasks}
+
+    def depth_of(task):
+        depth, parent_id = 0, task.parent_task_id
+        while parent_id in parents and depth <= len(parents):
+            depth, parent_id = depth + 1, parents[parent_id]
+        return depth
+
+    return sorted(tasks, key=depth_of)
+
+
+def restore_project(archived):
+    """
+    Recreate an archived project with its original primary keys.
+
+    References to users who no longer exist fall back to the project owner
+    (or to ``None`` for optional fields such as the assignee); memberships
+    of such users are not restored.
+    """
+    records = {}
+    for label, fields in read_snapshot(archived):
+        records.setdefault(label, []).append(fields)
+
+    project_rows = records.get('projects.project', [])
+    if len(project_rows) != 1:
+        raise ArchiveError('Snapshot does not contain exactly one project.')
+    if Project.objects.filter(pk=archived.original_id).exists():
+        raise ArchiveError(f'Project {archived.original_id} already exists.')
+
+    user_ids = set(User.objects.values_list('pk', flat=True).filter(
+        pk__in={value for rows in records.values() for row in rows
+                for key, value in row.items() if key in USER_FIELDS and value is not None}
+    ))
+    owner_id = project_rows[0]['owner_id']
+    if owner_id not in user_ids:
+        raise ArchiveError('The project owner no longer exists.')
+    team_id = project_rows[0]['team_id']
+    if team_id is not None and not Team.objects.filter(pk=team_id).exists():
+        project_rows[0]['team_id'] = None
+    portfolio_links = records.get('portfolios.portfolioproject', [])
+    if portfolio_links:
+        existing = set(Portfolio.objects.filter(
+            pk__in={row['portfolio_id'] for row in portfolio_links}
+        ).values_list('pk', flat=True))
+        records['portfolios.portfolioproject'] = [
+            row for row in portfolio_links if row['portfolio_id'] in existing
+        ]
+
+    with transaction.atomic():
+        member_ids = {owner_id}
+        for model, _lookup in SNAPSHOT_MODELS:
+            objs = [_decode(model, row) for row in records.get(model._meta.label_lower, [])]
+            if model is ProjectMember:
+                # Memberships of deleted users are dropped, not handed to the owner (who has one)
+                objs = [obj for obj in objs if obj.user_id in user_ids]
+                member_ids.update(obj.user_id for obj in objs)
+            if not objs:
+                continue
+            for obj in objs:
+                _remap_users(obj, user_ids, owner_id)
+            if model is Task:
+                objs = _task_depth_order(objs)
+
+            timestamps = [
+                {name: getattr(obj, name) for name in TIMESTAMP_FIELDS.get(model, [])} for obj in objs
+            ]
+            model.objects.bulk_create(objs, batch_size=RESTORE_BATCH_SIZE)
+            if model in TIMESTAMP_FIELDS:
+                for obj, values in zip(objs, timestamps):
+                    for name, value in values.items():
+                        setattr(obj, name, value)
+                model.objects.bulk_update(objs, TIMESTAMP_FIELDS[model], batch_size=RESTORE_BATCH_SIZE)
+
+        project = Project.objects.get(pk=archived.original_id)
+        snapshot_path = archived.snapshot_path
+        archived.delete()
+        transaction.on_commit(lambda: Path(snapshot_path).unlink(missing_ok=True))
+        # bulk_create sends no post_save, so cached permissions are not invalidated by signals
+        for user_id in member_ids:
+            transaction.on_commit(lambda user_id=user_id: bump_membership_version(user_id))
+    return project
+
+
+def _remap_users(obj, user_ids, owner_id):
+    for attname, required in USER_FIELDS.items():
+        if not hasattr(obj, attname):
+            continue
+        value = getattr(obj, attname)
+        if value is not None and value not in user_ids:
+            setattr(obj, attname, owner_id if required else None)
@@ -0,0 +1,38 @@
+"""
+Management command to move finished projects into cold storage.
+"""
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from projects.archive import ArchiveError, archivable_projects, archive_project
+
+
+class Command(BaseCommand):
+    help = 'Archive completed/cancelled projects older than PROJECT_ARCHIVE_AFTER_DAYS'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.PROJECT_ARCHIVE_AFTER_DAYS,
+                            help='Archive projects untouched for this many days')
+        parser.add_argument('--limit', type=int, default=None, help='Archive at most this many projects')
+        parser.add_argument('--dry-run', action='store_true')
+
+    def handle(self, *args, **options):
+        projects = archivable_projects(days=options['days']).order_by('updated_at')
+        if options['limit']:
+            projects = projects[:options['limit']]
+
+        archived = 0
+        for project in projects.iterator():
+            if options['dry_run']:
+                self.stdout.write(f'Would archive: {project.pk} {project.name}')
+                continue
+            try:
+                snapshot = archive_project(project)
+            except ArchiveError as e:
+                self.stdout.write(self.style.WARNING(f'Skipped {project.pk} {project.name}: {e}'))
+                continue
+            archived += 1
+            self.stdout.write(f'Archived {project.pk} {project.name} -> {snapshot.snapshot_path}')
+
+        if not options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f'Archived {archived} project(s)'))
@@ -0,0 +1,81 @@
+"""
+Management command to benchmark creating a project from a large template.
+"""
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from projects.models import Project, ProjectSection
+from projects.services import create_project_from_template
+from tasks.models import Task
+
+User = get_user_model()
+
+
+class Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = 'Benchmark create_project_from_template on a generated template (rolled back afterwards)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--tasks', type=int, default=5000, help='Top-level tasks in the template')
+        parser.add_argument('--sections', type=int, default=50)
+        parser.add_argument('--subtasks-per-task', type=int, default=0,
+                            help='Subtasks under every 10th task')
+        parser.add_argument('--runs', type=int, default=3)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise Rollback
+        except Rollback:
+            pass
+
+    def _run(self, options):
+        owner = User.objects.create_user(username=f'bench-{int(time.time())}')
+        template = Project.objects.create(
+            name='Benchmark template', owner=owner, is_template=True,
+            start_date=timezone.localdate(), tags=['benchmark'],
+        )
+        sections = ProjectSection.objects.bulk_create(
+            ProjectSection(project=template, name=f'Section {i}', order=i) for i in range(options['sections'])
+        )
+        today = timezone.localdate()
+        parents = Task.objects.bulk_create(
+            Task(
+                title=f'Task {i}', project=template, section=sections[i % len(sections)] if sections else None,
+                created_by=owner, due_date=today + timedelta(days=i % 90),
+                tags=['bench'], custom_fields={'estimate': i % 8},
+            )
+            for i in range(options['tasks'])
+        )
+        Task.objects.bulk_create(
+            Task(
+                title=f'Subtask {n} of {parent.pk}', project=template, created_by=owner,
+                is_subtask=True, parent_task=parent, due_date=parent.due_date,
+            )
+            for parent in parents[::10]
+            for n in range(options['subtasks_per_task'])
+        )
+        total = template.tasks.count()
+        self.stdout.write(f'Template: {len(sections)} sections, {total} tasks')
+
+        start_date = today + timedelta(days=30)
+        for run in range(1, options['runs'] + 1):
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                project = create_project_from_template(template, owner, name=f'Clone {run}', start_date=start_date)
+                elapsed = time.perf_counter() - started
+            copied = project.tasks.count()
+            self.stdout.write(
+                f'Run {run}: {copied} tasks in {elapsed * 1000:.1f} ms, {len(queries)} queries '
+                f'({copied / elapsed:,.0f} tasks/s)'
+            )
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-19 05:28
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0002_archivedproject'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProjectActivity',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('verb', models.CharField(choices=[('task_created', 'Task created'), ('task_updated', 'Task updated'), ('task_completed', 'Task completed'), ('task_assigned', 'Task assigned'), ('task_deleted', 'Task deleted'), ('comment_added', 'Comment added'), ('member_joined', 'Member joined'), ('member_removed', 'Member removed')], max_length=30)),
+                ('target_type', models.CharField(max_length=30)),
+                ('target_id', models.PositiveBigIntegerField()),
+                ('summary', models.CharField(max_length=255)),
+                ('data', models.JSONField(blank=True, default=dict)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('actor', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='project_activities', to=settings.AUTH_USER_MODEL)),
+                ('project', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='activities', to='projects.project')),
+            ],
+            options={
+                'verbose_name': 'Project Activity',
+                'verbose_name_plural': 'Project Activities',
+                'ordering': ['-created_at'],
+                'indexes': [models.Index(fields=['project', '-created_at'], name='projects_pr_project_7b6ff5_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,25 @@
+from django.db import migrations
+from django.db.models import F
+
+
+def add_owner_memberships(apps, schema_editor):
+    # Projects created without an owner ProjectMember row
+    Project = apps.get_model('projects', 'Project')
+    ProjectMember = apps.get_model('projects', 'ProjectMember')
+    missing = Project.objects.exclude(members__user_id=F('owner_id'))
+    ProjectMember.objects.bulk_create([
+        ProjectMember(project_id=project_id, user_id=user_id, role='owner', can_edit_project=True,
+                      can_manage_tasks=True, can_manage_members=True)
+        for project_id, user_id in missing.values_list('pk', 'owner_id').iterator()
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('projects', '0003_projectactivity'),
+    ]
+
+    operations = [
+        migrations.RunPython(add_owner_memberships, migrations.RunPython.noop),
+    ]
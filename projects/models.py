@@ -2,12 +2,46 @@
 Project management models for Inspora platform.
 """
 from django.db import models
+from django.db.models import Count, Exists, OuterRef, Q
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from accounts.models import User, Team
+from audit.mixins import FieldTrackingMixin
 
 
-class Project(models.Model):
+class MemberScopedQuerySet(models.QuerySet):
+    """
+    QuerySet that can be narrowed to rows whose project the user belongs to.
+    """
+    project_ref = 'project'
+    
+    def visible_to(self, user):
+        """Limit to rows on projects where ``user`` has an active membership."""
+        memberships = ProjectMember.objects.filter(
+            project=OuterRef(self.project_ref), user=user, is_active=True
+        )
+        return self.filter(Exists(memberships))
+
+
+class ProjectQuerySet(MemberScopedQuerySet):
+    project_ref = 'pk'
+    
+    def with_task_counts(self):
+        """Annotate total and completed task counts in the same query."""
+        return self.annotate(
+            task_count=Count('tasks'),
+            completed_task_count=Count('tasks', filter=Q(tasks__status='completed')),
+        )
+
+
+class ProjectSectionQuerySet(MemberScopedQuerySet):
+    
+    def with_task_counts(self):
+        """Annotate the number of tasks in each section."""
+        return self.annotate(task_count=Count('tasks'))
+
+
+class Project(FieldTrackingMixin, models.Model):
     """
     Project model for organizing work and tasks.
     """
@@ -51,6 +85,8 @@ class Project(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     tags = models.JSONField(default=list, blank=True)
     
+    objects = ProjectQuerySet.as_manager()
+    
     class Meta:
         ordering = ['-created_at']
         verbose_name = _('Project')
@@ -88,6 +124,8 @@ class ProjectSection(models.Model):
     description = models.TextField(blank=True)
     order = models.PositiveIntegerField(default=0)
     
+    objects = ProjectSectionQuerySet.as_manager()
+    
     class Meta:
         ordering = ['order', 'name']
         unique_together = ['project', 'name']
@@ -96,7 +134,7 @@ class ProjectSection(models.Model):
         return f"{self.project.name} - {self.name}"
 
 
-class ProjectMember(models.Model):
+class ProjectMember(FieldTrackingMixin, models.Model):
     """
     Project team members with roles and permissions.
     """
@@ -120,6 +158,8 @@ class ProjectMember(models.Model):
     is_active = models.BooleanField(default=True)
     joined_at = models.DateTimeField(auto_now_add=True)
     
+    objects = MemberScopedQuerySet.as_manager()
+    
     class Meta:
         unique_together = ['project', 'user']
         ordering = ['project', 'role', 'user__username']
@@ -140,3 +180,84 @@ class ProjectMember(models.Model):
             self.can_manage_tasks = True
         
         super().save(*args, **kwargs)
+
+
+class ArchivedProject(models.Model):
+    """
+    A project moved out of the live tables into a compressed snapshot.
+
+    The snapshot is a gzipped JSON-lines file holding the project with its
+    sections, members, tasks, comments and attachment metadata; this row
+    keeps just enough to list, authorise and restore it.
+    """
+    original_id = models.BigIntegerField(unique=True)
+    name = models.CharField(max_length=200)
+    status = models.CharField(max_length=20, choices=Project.STATUS_CHOICES)
+    owner = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='archived_projects', null=True, blank=True)
+    team = models.ForeignKey(Team, on_delete=models.SET_NULL, related_name='archived_projects', null=True, blank=True)
+    members = models.ManyToManyField(User, related_name='archived_project_memberships', blank=True)
+    
+    # Snapshot
+    snapshot_path = models.CharField(max_length=500)
+    snapshot_size = models.PositiveBigIntegerField(default=0)
+    checksum = models.CharField(max_length=64)
+    task_count = models.PositiveIntegerField(default=0)
+    comment_count = models.PositiveIntegerField(default=0)
+    attachment_count = models.PositiveIntegerField(default=0)
+    
+    # Dates
+    project_created_at = models.DateTimeField()
+    completed_date = models.DateField(null=True, blank=True)
+    archived_at = models.DateTimeField(auto_now_add=True)
+    archived_by = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='+', null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-archived_at']
+        verbose_name = _('Archived Project')
+        verbose_name_plural = _('Archived Projects')
+    
+    def __str__(self):
+        return f"{self.name} (archived)"
+    
+    def get_absolute_url(self):
+        return reverse('projects:archive_detail', kwargs={'pk': self.pk})
+
+
+class ProjectActivity(models.Model):
+    """
+    One entry in a project's activity feed.
+
+    Rows are the durable record; the per-project and per-user timelines
+    served to the dashboard are materialised in Redis (see
+    ``projects.activity``) and can be rebuilt from this table.
+    """
+    VERB_CHOICES = [
+        ('task_created', 'Task created'),
+        ('task_updated', 'Task updated'),
+        ('task_completed', 'Task completed'),
+        ('task_assigned', 'Task assigned'),
+        ('task_deleted', 'Task deleted'),
+        ('comment_added', 'Comment added'),
+        ('member_joined', 'Member joined'),
+        ('member_removed', 'Member removed'),
+    ]
+    
+    project = models.ForeignKey(Project, on_delete=models.CASCADE, related_name='activities')
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, related_name='project_activities', null=True, blank=True)
+    verb = models.CharField(max_length=30, choices=VERB_CHOICES)
+    target_type = models.CharField(max_length=30)
+    target_id = models.PositiveBigIntegerField()
+    summary = models.CharField(max_length=255)
+    data = models.JSONField(default=dict, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    
+    class Meta:
+        ordering = ['-created_at']
+        verbose_name = _('Project Activity')
+        verbose_name_plural = _('Project Activities')
+        indexes = [
+            models.Index(fields=['project', '-created_at']),
+        ]
+    
+    def __str__(self):
+        return self.summary
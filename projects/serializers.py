@@ -0,0 +1,95 @@
+"""
+Serializers for projects app.
+"""
+from rest_framework import serializers
+from accounts.models import Team
+from accounts.permissions import get_permissions
+from .models import Project, ProjectSection, ProjectMember, ArchivedProject
+
+
+class ProjectSectionSerializer(serializers.ModelSerializer):
+    task_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta:
+        model = ProjectSection
+        fields = ['id', 'project', 'name', 'description', 'order', 'task_count']
+
+    def validate_project(self, project):
+        """Only allow sections on projects the requester can edit."""
+        permissions = get_permissions(self.context['request'])
+        if not permissions.has_project_perm(project.pk, 'can_edit_project'):
+            raise serializers.ValidationError('You do not have permission to edit this project.')
+        return project
+
+
+class ProjectMemberSerializer(serializers.ModelSerializer):
+    username = serializers.CharField(source='user.username', read_only=True)
+
+    class Meta:
+        model = ProjectMember
+        fields = [
+            'id', 'project', 'user', 'username', 'role',
+            'can_edit_project', 'can_manage_tasks', 'can_manage_members',
+            'is_active', 'joined_at',
+        ]
+        read_only_fields = ['can_edit_project', 'can_manage_tasks', 'can_manage_members', 'joined_at']
+
+    def validate_project(self, project):
+        """Only allow membership changes on projects the requester manages."""
+        permissions = get_permissions(self.context['request'])
+        if not permissions.has_project_perm(project.pk, 'can_manage_members'):
+            raise serializers.ValidationError('You do not have permission to manage members of this project.')
+        return project
+
+
+class ProjectSerializer(serializers.ModelSerializer):
+    owner = serializers.PrimaryKeyRelatedField(read_only=True)
+    owner_username = serializers.CharField(source='owner.username', read_only=True)
+    team_name = serializers.CharField(source='team.name', read_only=True, default=None)
+    task_count = serializers.IntegerField(read_only=True, default=0)
+    completed_task_count = serializers.IntegerField(read_only=True, default=0)
+
+    class Meta:
+        model = Project
+        fields = [
+            'id', 'name', 'description', 'status', 'priority',
+            'start_date', 'due_date', 'completed_date',
+            'owner', 'owner_username', 'team', 'team_name',
+            'progress', 'is_template', 'tags',
+            'task_count', 'completed_task_count',
+            'created_at', 'updated_at',
+        ]
+        read_only_fields = ['created_at', 'updated_at']
+
+
+class ProjectDetailSerializer(ProjectSerializer):
+    sections = ProjectSectionSerializer(many=True, read_only=True)
+    members = ProjectMemberSerializer(many=True, read_only=True)
+
+    class Meta(ProjectSerializer.Meta):
+        fields = ProjectSerializer.Meta.fields + ['sections', 'members']
+
+
+class ProjectFromTemplateSerializer(serializers.Serializer):
+    name = serializers.CharField(max_length=200, required=False)
+    start_date = serializers.DateField(required=False)
+    team = serializers.PrimaryKeyRelatedField(queryset=Team.objects.all(), required=False, allow_null=True)
+
+    def validate_team(self, team):
+        """Only allow teams the requester belongs to."""
+        if team is not None and not get_permissions(self.context['request']).is_team_member(team.pk):
+            raise serializers.ValidationError('You are not a member of this team.')
+        return team
+
+
+class ArchivedProjectSerializer(serializers.ModelSerializer):
+    owner_username = serializers.CharField(source='owner.username', read_only=True, default=None)
+
+    class Meta:
+        model = ArchivedProject
+        fields = [
+            'id', 'original_id', 'name', 'status', 'owner', 'owner_username', 'team',
+            'task_count', 'comment_count', 'attachment_count', 'snapshot_size',
+            'project_created_at', 'completed_date', 'archived_at', 'archived_by',
+        ]
+        read_only_fields = fields
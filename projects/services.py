@@ -0,0 +1,124 @@
+"""
+Project services for Inspora platform.
+"""
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from inspora.db import bulk_create_with_pks
+from tasks.models import Task
+from .models import Project, ProjectSection, ProjectMember
+
+TEMPLATE_TASK_FIELDS = [
+    'id', 'title', 'description', 'priority', 'section_id', 'parent_task_id', 'is_subtask',
+    'due_date', 'start_date', 'estimated_hours', 'tags', 'custom_fields',
+]
+
+
+def _template_anchor(template, tasks):
+    """Date the template's schedule is measured from."""
+    if template.start_date:
+        return template.start_date
+    dates = [task['due_date'] for task in tasks if task['due_date']]
+    dates += [task['start_date'].date() for task in tasks if task['start_date']]
+    return min(dates) if dates else None
+
+
+def _task_generations(tasks):
+    """
+    Split template tasks into generations so parents are inserted first.
+
+    Generation 0 holds top-level tasks (and tasks whose parent is outside the
+    template); generation ``n`` holds the children of generation ``n - 1``.
+    """
+    children = {}
+    roots = []
+    ids = {task['id'] for task in tasks}
+    for task in tasks:
+        parent_id = task['parent_task_id']
+        if parent_id is None or parent_id not in ids:
+            roots.append(task)
+        else:
+            children.setdefault(parent_id, []).append(task)
+
+    generation = roots
+    while generation:
+        yield generation
+        generation = [child for task in generation for child in children.get(task['id'], ())]
+
+
+@transaction.atomic
+def create_project_from_template(template, owner, name=None, start_date=None, team=None):
+    """
+    Instantiate ``template`` as a new project owned by ``owner``.
+
+    Sections, tasks and subtasks (with ``parent_task`` remapped), tags and
+    custom fields are copied with one ``bulk_create`` per table and task
+    generation, inside a single transaction. Task dates are shifted so the
+    template's schedule starts on ``start_date`` (today by default).
+    """
+    start_date = start_date or timezone.localdate()
+    sections = list(
+        ProjectSection.objects.filter(project=template).values('id', 'name', 'description', 'order')
+    )
+    tasks = list(template.tasks.order_by('pk').values(*TEMPLATE_TASK_FIELDS))
+
+    anchor = _template_anchor(template, tasks)
+    shift = start_date - anchor if anchor else timedelta(0)
+
+    project = Project.objects.create(
+        name=name or template.name,
+        description=template.description,
+        priority=template.priority,
+        start_date=start_date,
+        due_date=template.due_date + shift if template.due_date else None,
+        owner=owner,
+        team=team if team is not None else template.team,
+        tags=list(template.tags),
+    )
+    ProjectMember.objects.create(project=project, user=owner, role='owner')
+
+    new_sections = bulk_create_with_pks(
+        ProjectSection,
+        [
+            ProjectSection(project=project, name=section['name'],
+                           description=section['description'], order=section['order'])
+            for section in sections
+        ],
+        readback=ProjectSection.objects.filter(project=project),
+    )
+    section_map = {section['id']: new.pk for section, new in zip(sections, new_sections)}
+
+    task_map = {}
+    for depth, generation in enumerate(_task_generations(tasks)):
+        if depth == 0:
+            readback = Task.objects.filter(project=project, parent_task__isnull=True)
+        else:
+            parent_ids = {task_map[task['parent_task_id']] for task in generation}
+            readback = Task.objects.filter(parent_task_id__in=parent_ids)
+        new_tasks = bulk_create_with_pks(
+            Task,
+            [
+                Task(
+                    title=task['title'],
+                    description=task['description'],
+                    priority=task['priority'],
+                    project=project,
+                    section_id=section_map.get(task['section_id']),
+                    created_by=owner,
+                    is_subtask=task['is_subtask'],
+                    parent_task_id=task_map.get(task['parent_task_id']),
+                    due_date=task['due_date'] + shift if task['due_date'] else None,
+                    start_date=task['start_date'] + shift if task['start_date'] else None,
+                    estimated_hours=task['estimated_hours'],
+                    tags=task['tags'],
+                    custom_fields=task['custom_fields'],
+                )
+                for task in generation
+            ],
+            readback=readback,
+        )
+        task_map.update((task['id'], new.pk) for task, new in zip(generation, new_tasks))
+
+    return project
@@ -36,6 +36,10 @@ urlpatterns = [
     path('templates/<int:pk>/edit/', views.ProjectTemplateEditView.as_view(), name='template_edit'),
     path('templates/<int:pk>/delete/', views.ProjectTemplateDeleteView.as_view(), name='template_delete'),
     
+    # Archived projects
+    path('archive/', views.ArchivedProjectListView.as_view(), name='archive_list'),
+    path('archive/<int:pk>/', views.ArchivedProjectDetailView.as_view(), name='archive_detail'),
+    
     # Project categories
     path('categories/', views.ProjectCategoryListView.as_view(), name='category_list'),
     path('categories/create/', views.ProjectCategoryCreateView.as_view(), name='category_create'),
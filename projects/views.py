@@ -6,7 +6,9 @@ from django.contrib.auth.decorators import login_required
 from django.contrib.auth.mixins import LoginRequiredMixin
 from django.views.generic import ListView, DetailView, CreateView, UpdateView, DeleteView
 from django.urls import reverse_lazy
-from .models import Project, ProjectSection, ProjectMember
+from accounts.permissions import ProjectPermissionRequiredMixin
+from .archive import ArchiveError, read_snapshot
+from .models import Project, ProjectSection, ProjectMember, ArchivedProject
 
 
 class ProjectListView(LoginRequiredMixin, ListView):
@@ -29,13 +31,19 @@ class ProjectCreateView(LoginRequiredMixin, CreateView):
     
     def form_valid(self, form):
         form.instance.owner = self.request.user
-        return super().form_valid(form)
+        response = super().form_valid(form)
+        ProjectMember.objects.get_or_create(
+            project=self.object, user=self.request.user, defaults={'role': 'owner'}
+        )
+        return response
     
     def get_success_url(self):
         return reverse_lazy('projects:project_detail', kwargs={'pk': self.object.pk})
 
 
-class ProjectEditView(LoginRequiredMixin, UpdateView):
+class ProjectEditView(LoginRequiredMixin, ProjectPermissionRequiredMixin, UpdateView):
+    project_permission = 'can_edit_project'
+    project_url_kwarg = 'pk'
     model = Project
     template_name = 'projects/project_form.html'
     fields = ['name', 'description', 'status', 'priority', 'start_date', 'due_date', 'team']
@@ -44,7 +52,9 @@ class ProjectEditView(LoginRequiredMixin, UpdateView):
         return reverse_lazy('projects:project_detail', kwargs={'pk': self.object.pk})
 
 
-class ProjectDeleteView(LoginRequiredMixin, DeleteView):
+class ProjectDeleteView(LoginRequiredMixin, ProjectPermissionRequiredMixin, DeleteView):
+    project_permission = 'is_owner'
+    project_url_kwarg = 'pk'
     model = Project
     template_name = 'projects/project_confirm_delete.html'
     success_url = reverse_lazy('projects:project_list')
@@ -77,7 +87,9 @@ class ProjectSectionsView(LoginRequiredMixin, ListView):
         return context
 
 
-class SectionCreateView(LoginRequiredMixin, CreateView):
+class SectionCreateView(LoginRequiredMixin, ProjectPermissionRequiredMixin, CreateView):
+    project_permission = 'can_edit_project'
+    project_url_kwarg = 'pk'
     model = ProjectSection
     template_name = 'projects/section_form.html'
     fields = ['name', 'description', 'order']
@@ -87,13 +99,15 @@ class SectionCreateView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class SectionEditView(LoginRequiredMixin, UpdateView):
+class SectionEditView(LoginRequiredMixin, ProjectPermissionRequiredMixin, UpdateView):
+    project_permission = 'can_edit_project'
     model = ProjectSection
     template_name = 'projects/section_form.html'
     fields = ['name', 'description', 'order']
 
 
-class SectionDeleteView(LoginRequiredMixin, DeleteView):
+class SectionDeleteView(LoginRequiredMixin, ProjectPermissionRequiredMixin, DeleteView):
+    project_permission = 'can_edit_project'
     model = ProjectSection
     template_name = 'projects/section_confirm_delete.html'
     success_url = reverse_lazy('projects:project_list')
@@ -113,7 +127,9 @@ class ProjectMembersView(LoginRequiredMixin, ListView):
         return context
 
 
-class ProjectMemberAddView(LoginRequiredMixin, CreateView):
+class ProjectMemberAddView(LoginRequiredMixin, ProjectPermissionRequiredMixin, CreateView):
+    project_permission = 'can_manage_members'
+    project_url_kwarg = 'pk'
     model = ProjectMember
     template_name = 'projects/member_form.html'
     fields = ['user', 'role']
@@ -123,13 +139,15 @@ class ProjectMemberAddView(LoginRequiredMixin, CreateView):
         return super().form_valid(form)
 
 
-class ProjectMemberEditView(LoginRequiredMixin, UpdateView):
+class ProjectMemberEditView(LoginRequiredMixin, ProjectPermissionRequiredMixin, UpdateView):
+    project_permission = 'can_manage_members'
     model = ProjectMember
     template_name = 'projects/member_form.html'
     fields = ['user', 'role']
 
 
-class ProjectMemberRemoveView(LoginRequiredMixin, DeleteView):
+class ProjectMemberRemoveView(LoginRequiredMixin, ProjectPermissionRequiredMixin, DeleteView):
+    project_permission = 'can_manage_members'
     model = ProjectMember
     template_name = 'projects/member_confirm_delete.html'
     success_url = reverse_lazy('projects:project_list')
@@ -223,3 +241,38 @@ class ProjectCategoryDeleteView(LoginRequiredMixin, DeleteView):
     model = Project
     template_name = 'projects/category_confirm_delete.html'
     success_url = reverse_lazy('projects:category_list')
+
+
+class ArchivedProjectListView(LoginRequiredMixin, ListView):
+    model = ArchivedProject
+    template_name = 'projects/archive_list.html'
+    context_object_name = 'archived_projects'
+    paginate_by = 20
+    
+    def get_queryset(self):
+        return ArchivedProject.objects.filter(members=self.request.user).select_related('owner', 'team')
+
+
+class ArchivedProjectDetailView(LoginRequiredMixin, DetailView):
+    model = ArchivedProject
+    template_name = 'projects/archive_detail.html'
+    context_object_name = 'archived'
+    max_tasks = 500
+    
+    def get_queryset(self):
+        return ArchivedProject.objects.filter(members=self.request.user).select_related('owner', 'team')
+    
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        tasks = []
+        try:
+            for _label, fields in read_snapshot(self.object, model='tasks.task'):
+                tasks.append(fields)
+                if len(tasks) >= self.max_tasks:
+                    break
+            context['snapshot_missing'] = False
+        except ArchiveError:
+            context['snapshot_missing'] = True
+        context['tasks'] = tasks
+        context['tasks_truncated'] = self.object.task_count > len(tasks)
+        return context
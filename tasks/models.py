@@ -5,10 +5,11 @@ from django.db import models
 from django.utils.translation import gettext_lazy as _
 from django.urls import reverse
 from accounts.models import User
+from audit.mixins import FieldTrackingMixin
 from projects.models import Project, ProjectSection
 
 
-class Task(models.Model):
+class Task(FieldTrackingMixin, models.Model):
     """
     Task model for individual work items.
     """